@@ -0,0 +1,362 @@
+import argparse
+import atexit
+import json
+import os
+import platform
+import random
+import statistics
+import string
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# --- Hot Path Benchmarks ---
+# Micro-benchmarks for the parsing and lookup code that runs on every profile
+# refresh, search and card build. Everything runs offline against synthetic
+# fixtures (a 5,000 element `nix profile list --json`, search hits, large
+# collections); nothing touches nix, the network or the real config dir.
+#
+#   python benchmarks/bench_hot_paths.py [--repeat N] [--only NAME ...]
+#                                        [--output results.json]
+#
+# Results are printed (or written) as JSON, one entry per benchmark with
+# min / median / mean times in milliseconds, so runs can be diffed.
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+PROFILE_ELEMENTS = 5000
+SEARCH_HITS = 2000
+CART_ITEMS = 2000
+FAVOURITES = 500
+SAVED_LISTS = 20
+LIST_ITEMS = 250
+LOOKUPS = 5000
+SEARCH_HISTORY = 500
+
+SYSTEM = "x86_64-linux"
+ATTR_SETS = ["", "python3Packages", "haskellPackages", "kdePackages", "nodePackages"]
+
+# Set up by setup_environment()
+modules = {}
+
+
+def setup_environment():
+    # The app writes to ~/.config/all-might; point HOME at a throwaway dir
+    # before anything reads CONFIG_DIR. Registered before persistence is
+    # imported, so its flush_all at exit still runs before the dir is removed.
+    home = tempfile.TemporaryDirectory(prefix="all-might-bench-")
+    atexit.register(home.cleanup)
+    os.environ["HOME"] = home.name
+    sys.path.insert(0, str(SRC_DIR))
+
+    import nix_profile
+    import persistence
+    import updates
+    import utils
+    from state import state
+
+    modules.update(
+        nix_profile=nix_profile,
+        persistence=persistence,
+        updates=updates,
+        utils=utils,
+        state=state,
+    )
+
+
+# --- Fixtures ---
+def _store_hash(rng):
+    return "".join(rng.choices(string.ascii_lowercase + string.digits, k=32))
+
+
+def _version(rng):
+    return ".".join(str(rng.randint(0, 30)) for _ in range(rng.randint(1, 3)))
+
+
+def make_profile_json(count, seed=1):
+    rng = random.Random(seed)
+    elements = {}
+    for i in range(count):
+        pname = f"pkg{i}"
+        attr_set = rng.choice(ATTR_SETS)
+        attr = f"{attr_set}.{pname}" if attr_set else pname
+        version = _version(rng)
+        store_paths = [f"/nix/store/{_store_hash(rng)}-{pname}-{version}"]
+        if rng.random() < 0.3:
+            # Split outputs: the main output isn't always first
+            store_paths.insert(
+                0, f"/nix/store/{_store_hash(rng)}-{pname}-{version}-man"
+            )
+        elements[pname] = {
+            "active": True,
+            "attrPath": f"legacyPackages.{SYSTEM}.{attr}",
+            "originalUrl": "flake:nixpkgs",
+            "url": "github:NixOS/nixpkgs/0000000000000000000000000000000000000000",
+            "outputs": None,
+            "priority": 5,
+            "storePaths": store_paths,
+        }
+    return {"elements": elements, "version": 3}
+
+
+def make_search_hits(count, seed=2):
+    # About a fifth of the hits repeat an earlier (pname, version)
+    rng = random.Random(seed)
+    unique = count - count // 5
+    hits = []
+    for i in range(unique):
+        pname = f"pkg{i}"
+        hits.append(
+            {
+                "package_attr_name": pname,
+                "package_attr_set": rng.choice(ATTR_SETS) or "No package set",
+                "package_pname": pname,
+                "package_pversion": _version(rng),
+                "package_description": f"Description of {pname}",
+            }
+        )
+    for _ in range(count - unique):
+        hits.append(dict(rng.choice(hits[:unique])))
+    rng.shuffle(hits)
+    return hits
+
+
+def make_package(i):
+    return {
+        "package_attr_name": f"pkg{i}",
+        "package_attr_set": "No package set",
+        "package_pname": f"pkg{i}",
+        "package_pversion": "1.0",
+        "package_description": f"Description of pkg{i}",
+        "package_license_set": ["MIT"],
+        "package_programs": [f"pkg{i}"],
+    }
+
+
+# --- Benchmarks ---
+# Each sets up its fixture and returns (item count, run); only run() is timed.
+
+
+def bench_extract_attr_set():
+    extract_attr_set = modules["updates"].extract_attr_set
+    profile = make_profile_json(PROFILE_ELEMENTS)
+    attr_paths = [e["attrPath"] for e in profile["elements"].values()]
+
+    def run():
+        for attr_path in attr_paths:
+            extract_attr_set(attr_path)
+
+    return len(attr_paths), run
+
+
+def bench_parse_store_paths():
+    # Store path -> (name, version); was updates.get_store_path_info
+    parse_store_paths = modules["nix_profile"].parse_store_paths
+    profile = make_profile_json(PROFILE_ELEMENTS)
+    all_paths = [e["storePaths"] for e in profile["elements"].values()]
+
+    def run():
+        for store_paths in all_paths:
+            parse_store_paths(store_paths)
+
+    return len(all_paths), run
+
+
+def bench_profile_snapshot():
+    # Parsing `nix profile list --json` into a snapshot and installed_items
+    ProfileSnapshot = modules["nix_profile"].ProfileSnapshot
+    profile = make_profile_json(PROFILE_ELEMENTS)
+
+    def run():
+        ProfileSnapshot.from_json(profile).installed_items()
+
+    return PROFILE_ELEMENTS, run
+
+
+def bench_refresh_installed_cache():
+    # AppState.refresh_installed_cache with the nix call answered by the
+    # fixture: parse, diff against the previous snapshot, reconcile tracking
+    nix_profile = modules["nix_profile"]
+    state = modules["state"]
+    profile = make_profile_json(PROFILE_ELEMENTS)
+    # Every run after the first sees a few changes, like a real refresh
+    changed = json.loads(json.dumps(profile))
+    for key in list(changed["elements"])[:50]:
+        del changed["elements"][key]
+    fixtures = [profile, changed]
+    turn = [0]
+
+    def load_fixture():
+        turn[0] += 1
+        return nix_profile.ProfileSnapshot.from_json(fixtures[turn[0] % 2])
+
+    nix_profile.profile_service._load = load_fixture
+
+    def run():
+        nix_profile.profile_service.invalidate()
+        state.refresh_installed_cache()
+
+    return PROFILE_ELEMENTS, run
+
+
+def bench_dedupe_hits():
+    # The de-duplication execute_nix_search applies to every result page
+    dedupe_hits = modules["utils"].dedupe_hits
+    hits = make_search_hits(SEARCH_HITS)
+
+    def run():
+        dedupe_hits(hits)
+
+    return len(hits), run
+
+
+def _fill_collections():
+    state = modules["state"]
+    channel = "nixos-unstable"
+    if len(state.cart_items) >= CART_ITEMS:
+        return channel
+    state.restore_cart(
+        [{"package": make_package(i), "channel": channel} for i in range(CART_ITEMS)]
+    )
+    for i in range(FAVOURITES):
+        state.toggle_favourite(make_package(i * 3), channel)
+    for n in range(SAVED_LISTS):
+        start = n * (CART_ITEMS // SAVED_LISTS)
+        state.save_list(
+            f"list-{n}",
+            [
+                {"package": make_package(start + i), "channel": channel}
+                for i in range(LIST_ITEMS)
+            ],
+        )
+    state.search_history = [f"query {i}" for i in range(SEARCH_HISTORY)]
+    modules["persistence"].flush_all()
+    return channel
+
+
+def bench_collection_lookups():
+    # is_in_cart / is_favourite / get_containing_lists, all keyed by
+    # _get_pkg_id, as every card build and refresh calls them
+    state = modules["state"]
+    channel = _fill_collections()
+    rng = random.Random(3)
+    # Half hits, half misses
+    packages = [make_package(rng.randrange(CART_ITEMS * 2)) for _ in range(LOOKUPS)]
+
+    def run():
+        for package in packages:
+            state.is_in_cart(package, channel)
+            state.is_favourite(package, channel)
+            state.get_containing_lists(package, channel)
+
+    return LOOKUPS, run
+
+
+def bench_save_settings():
+    # save_settings with large collections loaded, including the write
+    state = modules["state"]
+    _fill_collections()
+    writer = state._stores["config"].writer
+
+    def run():
+        state.save_settings()
+        writer.flush()
+
+    return 1, run
+
+
+def bench_save_collections():
+    # Rewriting the cart, favourites and lists files (JSON backend)
+    state = modules["state"]
+    _fill_collections()
+    writers = [
+        state._stores[name].writer
+        for name in ("packages", "cart", "favourites", "lists")
+    ]
+
+    def run():
+        state.save_cart()
+        state.save_favourites()
+        state.save_lists()
+        for writer in writers:
+            writer.flush()
+
+    return CART_ITEMS + FAVOURITES + SAVED_LISTS * LIST_ITEMS, run
+
+
+BENCHMARKS = {
+    "extract_attr_set": bench_extract_attr_set,
+    "parse_store_paths": bench_parse_store_paths,
+    "profile_snapshot": bench_profile_snapshot,
+    "refresh_installed_cache": bench_refresh_installed_cache,
+    "dedupe_hits": bench_dedupe_hits,
+    "collection_lookups": bench_collection_lookups,
+    "save_settings": bench_save_settings,
+    "save_collections": bench_save_collections,
+}
+
+
+# --- Runner ---
+def measure(run, repeat, warmup=1):
+    for _ in range(warmup):
+        run()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - started) * 1000)
+    return times
+
+
+def run_benchmarks(names, repeat):
+    results = []
+    for name in names:
+        items, run = BENCHMARKS[name]()
+        times = measure(run, repeat)
+        median = statistics.median(times)
+        results.append(
+            {
+                "name": name,
+                "items": items,
+                "repeat": repeat,
+                "min_ms": round(min(times), 4),
+                "median_ms": round(median, 4),
+                "mean_ms": round(statistics.fmean(times), 4),
+                "stdev_ms": round(statistics.stdev(times), 4) if repeat > 1 else 0.0,
+                "per_item_us": round(median * 1000 / items, 4),
+            }
+        )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Offline micro-benchmarks for the parsing and lookup hot paths"
+    )
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--only", nargs="+", choices=sorted(BENCHMARKS), help="benchmarks to run"
+    )
+    parser.add_argument("--output", help="write the JSON here instead of stdout")
+    args = parser.parse_args(argv)
+
+    setup_environment()
+    results = run_benchmarks(args.only or list(BENCHMARKS), max(1, args.repeat))
+    report = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "benchmarks": results,
+    }
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
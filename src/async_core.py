@@ -0,0 +1,121 @@
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# --- Async Execution Core ---
+# One asyncio event loop, running on a single background thread, executes the
+# app's subprocesses and background work. Subprocess output is streamed with
+# asyncio, so a running nix command costs a coroutine instead of a thread.
+# Blocking calls that have no async version (http_client requests, file
+# parsing) run on a small shared pool instead of one new thread each.
+#
+# Everything started here returns a TaskHandle that can be cancelled from any
+# thread; cancelling a subprocess task terminates the process.
+
+MAX_BLOCKING_WORKERS = 8
+TERMINATE_TIMEOUT = 5  # seconds before a cancelled process is killed
+# Process output is read in chunks of this size and split into lines here:
+# StreamReader's own line reading fails on lines over 64 KiB, which long nix
+# build log lines exceed
+STREAM_CHUNK_SIZE = 64 * 1024
+
+
+class TaskHandle:
+    def __init__(self, future):
+        self._future = future  # concurrent.futures.Future
+
+    def cancel(self):
+        return self._future.cancel()
+
+    def cancelled(self):
+        return self._future.cancelled()
+
+    def done(self):
+        return self._future.done()
+
+    def result(self, timeout=None):
+        return self._future.result(timeout)
+
+    def add_done_callback(self, cb):
+        # cb(handle) runs on the loop thread once the task is finished
+        self._future.add_done_callback(lambda _: cb(self))
+
+
+class AsyncCore:
+    def __init__(self, max_blocking_workers=MAX_BLOCKING_WORKERS):
+        self._loop = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_blocking_workers, thread_name_prefix="all-might-io"
+        )
+
+    @property
+    def loop(self):
+        # Started on first use
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="all-might-async", daemon=True
+                ).start()
+                self._loop = loop
+            return self._loop
+
+    def submit(self, coro):
+        # Schedules a coroutine from any thread
+        return TaskHandle(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def run_blocking(self, fn, *args, **kwargs):
+        # Fire-and-forget replacement for threading.Thread(target=fn).start()
+        return self.submit(self.to_thread(fn, *args, **kwargs))
+
+    async def to_thread(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    # --- Subprocesses ---
+    async def stream_process(self, args, on_line, on_start=None):
+        # Runs args, calling on_line(text) for every line of stdout/stderr.
+        # Returns the exit code. Cancelling the task terminates the process.
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.STDOUT,
+        )
+        if on_start:
+            on_start(process)
+        try:
+            buffer = bytearray()
+            while chunk := await process.stdout.read(STREAM_CHUNK_SIZE):
+                buffer.extend(chunk)
+                end = buffer.rfind(b"\n")
+                if end < 0:
+                    continue
+                for raw in bytes(buffer[:end]).split(b"\n"):
+                    on_line(raw.decode("utf-8", errors="replace"))
+                del buffer[: end + 1]
+            if buffer:
+                # Last line without a newline
+                on_line(buffer.decode("utf-8", errors="replace"))
+            return await process.wait()
+        except asyncio.CancelledError:
+            await self._stop_process(process)
+            raise
+
+    async def _stop_process(self, process):
+        if process.returncode is not None:
+            return
+        try:
+            process.terminate()
+            await asyncio.wait_for(process.wait(), TERMINATE_TIMEOUT)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+        except ProcessLookupError:
+            pass
+
+
+core = AsyncCore()
@@ -7,6 +7,18 @@ CONFIG_DIR = os.path.expanduser("~/.config/all-might")
 CONFIG_FILE = os.path.join(CONFIG_DIR, "settings.json")
 TRACKING_FILE = os.path.join(CONFIG_DIR, "installed.json")
 PROCESSES_FILE = os.path.join(CONFIG_DIR, "processes.json")
+PACKAGES_FILE = os.path.join(CONFIG_DIR, "packages.json")
+CART_FILE = os.path.join(CONFIG_DIR, "cart.json")
+FAVOURITES_FILE = os.path.join(CONFIG_DIR, "favourites.json")
+LISTS_FILE = os.path.join(CONFIG_DIR, "lists.json")
+HISTORY_FILE = os.path.join(CONFIG_DIR, "history.json")
+MASTODON_CACHE_FILE = os.path.join(CONFIG_DIR, "mastodon_cache.json")
+STATE_DB_FILE = os.path.join(CONFIG_DIR, "state.db")
+INDEX_DIR = os.path.join(CONFIG_DIR, "index")
+SEARCH_CACHE_FILE = os.path.join(CONFIG_DIR, "search_cache.json")
+PROFILE_CACHE_FILE = os.path.join(CONFIG_DIR, "profile_cache.json")
+ICON_CACHE_DIR = os.path.join(CONFIG_DIR, "icons")
+LOGS_DIR = os.path.join(CONFIG_DIR, "logs")
 
 # --- Mock Data for Daily Digest ---
 DAILY_APPS = [
@@ -1,15 +1,14 @@
 import flet as ft
 import os
 import shlex
-import threading
-import time
 import subprocess
-import re
-import urllib.request
-from urllib.parse import urljoin, urlparse
 from state import state
 from utils import execute_nix_search
+from icons import icon_loader, icon_cache, ICON_FOUND, ICON_INVALID
 from process_view import ProcessView
+from ticker import ticker
+from async_core import core
+from package_record import PackageRecord
 
 
 class TypewriterControl(ft.Text):
@@ -18,52 +17,45 @@ class TypewriterControl(ft.Text):
         self.texts = texts
         self.speed = speed
         self.wait_time = wait_time
-        self.running = False
+        self._timer = None
         self.current_text_idx = 0
         self.char_idx = 0
         self.is_deleting = False
 
     def did_mount(self):
-        self.running = True
-        threading.Thread(target=self._animate, daemon=True).start()
+        self._timer = ticker.every(self.speed, self._step, owner=self)
 
     def will_unmount(self):
-        self.running = False
-
-    def _animate(self):
-        while self.running:
-            current_string = self.texts[self.current_text_idx]
-
-            if not self.is_deleting:
-                # Typing
-                if self.char_idx < len(current_string):
-                    self.char_idx += 1
-                    self.value = current_string[: self.char_idx] + "|"
-                    if self.page:
-                        self.update()
-                    time.sleep(self.speed)
-                else:
-                    # Finished typing, wait
-                    self.value = current_string  # Remove cursor blink effect or keep it? Let's remove
-                    if self.page:
-                        self.update()
-                    time.sleep(self.wait_time)
-                    self.is_deleting = True
-            else:
-                # Deleting
-                if self.char_idx > 0:
-                    self.char_idx -= 1
-                    self.value = current_string[: self.char_idx] + "|"
-                    if self.page:
-                        self.update()
-                    time.sleep(self.speed / 2)  # Backspace faster
-                else:
-                    # Finished deleting, move to next string
-                    self.is_deleting = False
-                    self.current_text_idx = (self.current_text_idx + 1) % len(
-                        self.texts
-                    )
-                    time.sleep(0.5)
+        self._timer.cancel()
+
+    def _step(self, timer):
+        # Returns the delay until the next step
+        current_string = self.texts[self.current_text_idx]
+
+        if not self.is_deleting:
+            # Typing
+            if self.char_idx < len(current_string):
+                self.char_idx += 1
+                self.value = current_string[: self.char_idx] + "|"
+                ticker.update(self)
+                return self.speed
+            # Finished typing, wait (without the cursor)
+            self.value = current_string
+            ticker.update(self)
+            self.is_deleting = True
+            return self.wait_time
+
+        # Deleting
+        if self.char_idx > 0:
+            self.char_idx -= 1
+            self.value = current_string[: self.char_idx] + "|"
+            ticker.update(self)
+            return self.speed / 2  # Backspace faster
+
+        # Finished deleting, move to next string
+        self.is_deleting = False
+        self.current_text_idx = (self.current_text_idx + 1) % len(self.texts)
+        return 0.5
 
 
 # --- Global Callback Reference ---
@@ -207,42 +199,37 @@ class UndoToast(ft.Container):
 
     def did_mount(self):
         self.cancelled = False
-        threading.Thread(target=self.run_timer, daemon=True).start()
+        ticker.every(
+            0.1,
+            self._tick,
+            lifetime=self.duration_seconds,
+            owner=self,
+            on_expire=self._expired,
+        )
 
     def will_unmount(self):
         self.cancelled = True
 
-    def run_timer(self):
-        step = 0.1
-        total_steps = int(self.duration_seconds / step)
-        for i in range(total_steps):
-            if self.cancelled:
-                return
-            time.sleep(step)
-            remaining = self.duration_seconds - (i * step)
-
-            if not self.page:
-                return
-            try:
-                self.progress_ring.value = remaining / self.duration_seconds
-                self.counter_text.value = str(int(remaining) + 1)
-                self.update()
-            except Exception:
-                return
+    def _tick(self, timer):
+        if self.cancelled:
+            timer.cancel()
+            return
+        remaining = max(0, self.duration_seconds - timer.elapsed)
+        self.progress_ring.value = remaining / self.duration_seconds
+        self.counter_text.value = str(int(remaining) + 1)
+        ticker.update(self)
 
-        if not self.cancelled:
-            if not self.page:
-                return
-            try:
-                self.progress_ring.value = 0
-                self.counter_text.value = "0"
-                self.update()
-            except Exception:
-                pass
+    def _expired(self):
+        if self.cancelled:
+            return
+        self.progress_ring.value = 0
+        self.counter_text.value = "0"
+        ticker.update(self)
+        ticker.after(0.5, self._timeout)
 
-            time.sleep(0.5)
-            if self.on_timeout and not self.cancelled:
-                self.on_timeout()
+    def _timeout(self, timer):
+        if self.on_timeout and not self.cancelled:
+            core.run_blocking(self.on_timeout)
 
     def handle_undo(self, e):
         self.cancelled = True
@@ -382,51 +369,45 @@ class DelayedActionToast(ft.Container):
 
     def did_mount(self):
         self.cancelled = False
-        threading.Thread(target=self.run_timer, daemon=True).start()
+        ticker.every(
+            0.1,
+            self._tick,
+            lifetime=self.duration_seconds,
+            owner=self,
+            on_expire=self._expired,
+        )
 
     def will_unmount(self):
         # If unmounted before completion without explicit cancel, we assume cancelled to be safe?
         # Or should we execute? Typically if UI disappears, we shouldn't trigger background side effects.
         self.cancelled = True
 
-    def run_timer(self):
-        step = 0.1
-        total_steps = int(self.duration_seconds / step)
-        for i in range(total_steps):
-            if self.cancelled:
-                return
-            time.sleep(step)
-            remaining = self.duration_seconds - (i * step)
-
-            if not self.page:
-                return
-            try:
-                self.progress_ring.value = remaining / self.duration_seconds
-                self.counter_text.value = str(int(remaining) + 1)
-                self.update()
-            except Exception:
-                return
+    def _tick(self, timer):
+        if self.cancelled:
+            timer.cancel()
+            return
+        remaining = max(0, self.duration_seconds - timer.elapsed)
+        self.progress_ring.value = remaining / self.duration_seconds
+        self.counter_text.value = str(int(remaining) + 1)
+        ticker.update(self)
 
-        if not self.cancelled:
-            if not self.page:
-                return
-            try:
-                self.progress_ring.value = 0
-                self.counter_text.value = "0"
-                self.update()
-            except Exception:
-                pass
+    def _expired(self):
+        if self.cancelled:
+            return
+        self.progress_ring.value = 0
+        self.counter_text.value = "0"
+        ticker.update(self)
+        ticker.after(0.5, self._timeout)
 
-            time.sleep(0.5)
-            if not self.cancelled and self.on_execute:
-                self.on_execute()
+    def _timeout(self, timer):
+        if self.cancelled:
+            return
+        if self.on_execute:
+            core.run_blocking(self.on_execute)
 
-            # Auto close self after execution
-            try:
-                self.visible = False
-                self.update()
-            except Exception:
-                pass
+        # Auto close self after execution
+        self.visible = False
+        ticker.update(self)
 
     def handle_cancel(self, e):
         self.cancelled = True
@@ -449,6 +430,9 @@ class DelayedActionToast(ft.Container):
             pass
 
 
+CAROUSEL_STEP = 0.05
+
+
 class AutoCarousel(ft.Container):
     def __init__(self, data_list):
         super().__init__(
@@ -467,8 +451,9 @@ class AutoCarousel(ft.Container):
         )
         self.data_list = data_list
         self.current_index = 0
-        self.running = False
         self.paused = False
+        self._timer = None
+        self._shown_for = 0.0  # seconds the current item has been counting down
 
         self.title_text = ft.Text(
             "", weight=ft.FontWeight.BOLD, size=20, color=ft.Colors.WHITE
@@ -519,6 +504,11 @@ class AutoCarousel(ft.Container):
         self.update_content()
 
     def update_content(self):
+        self._apply_item()
+        if self.page:
+            self.update()
+
+    def _apply_item(self):
         item = self.data_list[self.current_index]
         base_color = item.get("color", ft.Colors.BLUE)
 
@@ -537,55 +527,38 @@ class AutoCarousel(ft.Container):
         self.desc_text.value = item.get("desc", "")
         self.icon_view.name = item.get("icon", ft.Icons.INFO_OUTLINE)
 
-        if self.page:
-            self.update()
-
     def did_mount(self):
-        self.running = True
-        threading.Thread(target=self.loop, daemon=True).start()
+        self._timer = ticker.every(CAROUSEL_STEP, self._tick, owner=self)
 
     def will_unmount(self):
-        self.running = False
+        self._timer.cancel()
 
     def handle_hover(self, e):
         self.paused = e.data == "true"
         if self.paused:
+            self._shown_for = 0.0
             self.progress_bar.value = 1.0
             self.update_content()
             if self.page:
                 self.progress_bar.update()
 
-    def loop(self):
-        step = 0.05
-        while self.running:
-            if self.paused:
-                time.sleep(0.1)
-                continue
-
-            duration = max(1, state.carousel_timer)
-            steps_total = int(duration / step)
-
-            for i in range(steps_total):
-                if not self.running:
-                    return
-                if self.paused:
-                    break
-
-                time.sleep(step)
-                # Count down
-                progress = 1.0 - ((i + 1) / steps_total)
-                self.progress_bar.value = progress
-                if self.page:
-                    self.progress_bar.update()
-
-            if self.paused:
-                continue
-
-            self.current_index = (self.current_index + 1) % len(self.data_list)
-            self.update_content()
-            self.progress_bar.value = 1.0
-            if self.page:
-                self.progress_bar.update()
+    def _tick(self, timer):
+        if self.paused:
+            return
+
+        duration = max(1, state.carousel_timer)
+        self._shown_for += CAROUSEL_STEP
+        if self._shown_for < duration:
+            # Count down
+            self.progress_bar.value = 1.0 - (self._shown_for / duration)
+            ticker.update(self.progress_bar)
+            return
+
+        self._shown_for = 0.0
+        self.current_index = (self.current_index + 1) % len(self.data_list)
+        self._apply_item()
+        self.progress_bar.value = 1.0
+        ticker.update(self)
 
 
 show_toast_global = None
@@ -630,6 +603,21 @@ class GlassButton(ft.Container):
         )
 
 
+# --- Mounted Card Registry ---
+# pname -> {id(card): card} for cards currently on screen, so profile changes
+# only touch the cards they affect.
+_mounted_cards = {}
+
+
+def notify_cards_of_profile_change(diff):
+    for pname in diff.affected_names():
+        for card in list(_mounted_cards.get(pname, {}).values()):
+            card.refresh_installed_state()
+
+
+state.add_profile_listener(notify_cards_of_profile_change)
+
+
 class NixPackageCard(GlassContainer):
     def __init__(
         self,
@@ -643,7 +631,7 @@ class NixPackageCard(GlassContainer):
         on_install_change=None,
         show_dialog_callback=None,
     ):
-        self.pkg = package_data
+        self.pkg = PackageRecord.from_dict(package_data)
         self.page_ref = page_ref
         self.on_cart_change = on_cart_change
         self.is_cart_view = is_cart_view
@@ -660,13 +648,13 @@ class NixPackageCard(GlassContainer):
         homepage_list = self.pkg.get("package_homepage", [])
         homepage_url = (
             homepage_list[0]
-            if isinstance(homepage_list, list) and homepage_list
+            if isinstance(homepage_list, (list, tuple)) and homepage_list
             else ""
         )
         license_list = self.pkg.get("package_license_set", [])
         license_text = (
             license_list[0]
-            if isinstance(license_list, list) and license_list
+            if isinstance(license_list, (list, tuple)) and license_list
             else "Unknown"
         )
 
@@ -691,6 +679,21 @@ class NixPackageCard(GlassContainer):
             content=self.icon_placeholder, width=icon_size, height=icon_size
         )
 
+        # Show a previously cached icon straight away
+        self.icon_fresh = False
+        homepage_list = self.pkg.get("package_homepage", [])
+        self.homepage_url = (
+            homepage_list[0]
+            if isinstance(homepage_list, (list, tuple)) and homepage_list
+            else ""
+        )
+        if state.fetch_icons and self.homepage_url:
+            cached_path, self.icon_fresh = icon_cache.cached_icon(self.homepage_url)
+            if cached_path:
+                self.icon_url = cached_path
+                self.icon_image.src = self.icon_url
+                self.icon_container.content = self.icon_image
+
         self.programs_list = self.pkg.get("package_programs", [])
 
         # New: Tracking & Installed Status
@@ -930,31 +933,19 @@ class NixPackageCard(GlassContainer):
         )
 
         # Tracking Tags
-        self.installed_chip = None
-        if self.is_installed:
-            display_version = self.installed_version if self.installed_version else "?"
-            manager = "All-Might" if self.is_all_might else "External"
-
-            # Try to get a cleaner origin/channel string
-            # self.selected_channel usually holds "nixos-unstable" or "nixos-24.11"
-            # If external, it might be the inferred channel.
-            origin = self.selected_channel
-
-            chip_text = f"Installed ({display_version}) with {manager} from {origin}"
-
-            bg_col = ft.Colors.PURPLE_700 if self.is_all_might else ft.Colors.GREY_700
-
-            self.installed_chip = ft.Container(
-                padding=ft.padding.symmetric(horizontal=6, vertical=2),
-                border_radius=state.get_radius("chip"),
-                bgcolor=ft.Colors.with_opacity(0.8, bg_col),
-                content=ft.Text(
-                    chip_text,
-                    size=size_tag,
-                    color=ft.Colors.WHITE,
-                    weight=ft.FontWeight.BOLD,
-                ),
-            )
+        self.installed_chip_text = ft.Text(
+            "",
+            size=size_tag,
+            color=ft.Colors.WHITE,
+            weight=ft.FontWeight.BOLD,
+        )
+        self.installed_chip = ft.Container(
+            padding=ft.padding.symmetric(horizontal=6, vertical=2),
+            border_radius=state.get_radius("chip"),
+            content=self.installed_chip_text,
+        )
+        self.installed_chip_row = ft.Row([self.installed_chip])
+        self.update_installed_chip()
 
         footer_size = size_sm
 
@@ -1056,9 +1047,7 @@ class NixPackageCard(GlassContainer):
             self.tag_chip,
         ]
 
-        left_col_controls = [ft.Row(header_row_controls)]
-        if self.installed_chip:
-            left_col_controls.append(ft.Row([self.installed_chip]))
+        left_col_controls = [ft.Row(header_row_controls), self.installed_chip_row]
 
         # Description Rendering
         # Filter out "Installed from..." or "Installed via..." descriptions if we are showing the chip
@@ -1142,122 +1131,81 @@ class NixPackageCard(GlassContainer):
         )
         self.update_copy_tooltip()
 
-        if state.fetch_icons:
-            threading.Thread(target=self.fetch_icon, daemon=True).start()
-
-    def fetch_icon(self):
-        homepage_list = self.pkg.get("package_homepage", [])
-        homepage_url = (
-            homepage_list[0]
-            if isinstance(homepage_list, list) and homepage_list
-            else ""
-        )
-        if not homepage_url:
-            return
-
-        icon_url = None
-        headers = {"User-Agent": "Mozilla/5.0"}
+        self._icon_ticket = None
 
-        # 1. Prioritize favicon.ico at the root
-        try:
-            parsed_url = urlparse(homepage_url)
-            favicon_ico_url = f"{parsed_url.scheme}://{parsed_url.netloc}/favicon.ico"
-
-            req = urllib.request.Request(favicon_ico_url, headers=headers)
-            with urllib.request.urlopen(req, timeout=2) as response:
-                info = response.info()
-                content_type = info.get_content_type() if info else None
-                if content_type and content_type.startswith("image/"):
-                    icon_url = favicon_ico_url
-                    print(f"Found favicon.ico: {icon_url}")
-        except Exception:
-            pass  # favicon.ico not found, proceed to HTML parsing
+    def did_mount(self):
+        _mounted_cards.setdefault(self.pname, {})[id(self)] = self
+        if (
+            state.fetch_icons
+            and self.homepage_url
+            and not self.icon_fresh
+            and self._icon_ticket is None
+        ):
+            self._icon_ticket = icon_loader.request(
+                self.homepage_url, self.on_icon_resolved
+            )
 
-        # 2. Parse HTML for other icons if favicon.ico not found or invalid
-        if not icon_url:
-            try:
-                req = urllib.request.Request(homepage_url, headers=headers)
-                with urllib.request.urlopen(req, timeout=5) as response:
-                    html = response.read().decode("utf-8", errors="ignore")
-
-                icons = []
-                # Robust regex to find link tags and extract attributes order-independently
-                link_regex = re.compile(r"<link\s+[^>]*?>", re.IGNORECASE)
-
-                for match in link_regex.finditer(html):
-                    tag = match.group(0)
-                    if "rel=" in tag and "href=" in tag:
-                        # Extract rel
-                        rel_match = re.search(
-                            r'rel=["\'](.*?)["\']', tag, re.IGNORECASE
-                        )
-                        if not rel_match:
-                            continue
-                        rel_val = rel_match.group(1).lower()
-
-                        if any(
-                            r in rel_val
-                            for r in ["icon", "shortcut icon", "apple-touch-icon"]
-                        ):
-                            # Extract href
-                            href_match = re.search(
-                                r'href=["\'](.*?)["\']', tag, re.IGNORECASE
-                            )
-                            if href_match:
-                                href = href_match.group(1)
-
-                                # Extract size
-                                sizes_match = re.search(
-                                    r'sizes=["\'](\d+x\d+)["\']', tag, re.IGNORECASE
-                                )
-                                size = sizes_match.group(1) if sizes_match else "0x0"
-
-                                icons.append({"href": href, "size": size})
-
-                if icons:
-                    # Sort icons by size (smallest first)
-                    icons.sort(
-                        key=lambda x: int(x["size"].split("x")[0])
-                        if x["size"] != "0x0"
-                        else 999
-                    )
+    def will_unmount(self):
+        cards = _mounted_cards.get(self.pname)
+        if cards is not None:
+            cards.pop(id(self), None)
+            if not cards:
+                _mounted_cards.pop(self.pname, None)
+        icon_loader.cancel(self._icon_ticket)
+        self._icon_ticket = None
+
+    def update_installed_chip(self):
+        self.installed_chip_row.visible = self.is_installed
+        if not self.is_installed:
+            return
+        display_version = self.installed_version if self.installed_version else "?"
+        manager = "All-Might" if self.is_all_might else "External"
 
-                    # Get the best icon (smallest, but not 0x0 if possible)
-                    best_icon = icons[0]
-                    icon_url = best_icon["href"]
+        # Try to get a cleaner origin/channel string
+        # self.selected_channel usually holds "nixos-unstable" or "nixos-24.11"
+        # If external, it might be the inferred channel.
+        origin = self.selected_channel
 
-                    if not icon_url.startswith(("http:", "https:")):
-                        icon_url = urljoin(homepage_url, icon_url)
-                    print(f"Found icon URL from HTML: {icon_url}")
+        self.installed_chip_text.value = (
+            f"Installed ({display_version}) with {manager} from {origin}"
+        )
+        bg_col = ft.Colors.PURPLE_700 if self.is_all_might else ft.Colors.GREY_700
+        self.installed_chip.bgcolor = ft.Colors.with_opacity(0.8, bg_col)
 
-            except Exception as e:
-                print(f"Error parsing HTML for {homepage_url}: {e}")
+    def refresh_installed_state(self):
+        # Re-read installed/tracked status from state and update in place
+        self.is_installed = state.is_package_installed(self.pname)
+        self.is_all_might = state.is_tracked(self.pname, self.selected_channel)
+        if self.is_installed and not self.is_all_might:
+            if state.get_tracked_channel(self.pname):
+                self.is_all_might = True
+        self.installed_version = state.get_installed_version(self.pname)
 
-        if icon_url:
-            try:
-                req = urllib.request.Request(icon_url, headers=headers)
-                with urllib.request.urlopen(req, timeout=5) as response:
-                    info = response.info()
-                    content_type = info.get_content_type() if info else None
-                    if content_type and content_type.startswith("image/"):
-                        self.icon_url = icon_url
-                        self.icon_image.src = self.icon_url
-                        self.icon_container.content = self.icon_image
-                    else:
-                        print(
-                            f"Invalid content type '{content_type}' for icon: {icon_url}"
-                        )
-                        self.icon_container.content = ft.Icon(
-                            ft.Icons.BROKEN_IMAGE, color="onSurface"
-                        )
-
-            except Exception as e:
-                print(f"Error validating or fetching icon {icon_url}: {e}")
-                self.icon_container.content = ft.Icon(
-                    ft.Icons.BROKEN_IMAGE, color="onSurface"
-                )
+        try:
+            self.update_installed_chip()
+            self.channel_dropdown.items = self.build_channel_menu_items()
+            self.install_btn.visible = not self.is_installed
+            self.uninstall_btn.visible = self.is_installed
+            if self.page:
+                self.update()
+        except Exception as e:
+            print(f"Error refreshing installed state for {self.pname}: {e}")
+
+    def on_icon_resolved(self, status, icon_url):
+        self._icon_ticket = None
+        self.icon_fresh = True
+        if status == ICON_FOUND:
+            if icon_url == self.icon_url:
+                return
+            self.icon_url = icon_url
+            self.icon_image.src = self.icon_url
+            self.icon_container.content = self.icon_image
+        elif status == ICON_INVALID:
+            self.icon_container.content = ft.Icon(
+                ft.Icons.BROKEN_IMAGE, color="onSurface"
+            )
         else:
-            print(f"No icon found for {homepage_url}")
+            return
 
         if self.page:
             self.update()
@@ -1404,30 +1352,12 @@ class NixPackageCard(GlassContainer):
                     self.selected_channel,
                     attr_name=self.attr_name,
                     version=self.version,
-                    description=self.pkg.get("package_description"),
-                    homepage=self.pkg.get("package_homepage", []),
-                    license_set=self.pkg.get("package_license_set", []),
                     source_url=source_url,
                     programs=self.programs_list,
+                    package=self.pkg,
                 )
-                state.refresh_installed_cache()
-
-                self.is_installed = True
-                self.is_all_might = True
-                self.installed_version = state.get_installed_version(self.pname)
-
-                # Safe UI updates
-                try:
-                    self.channel_dropdown.items = self.build_channel_menu_items()
-                    if self.channel_dropdown.page:
-                        self.channel_dropdown.update()
-
-                    self.install_btn.visible = False
-                    self.uninstall_btn.visible = True
-                    if self.page_ref:
-                        self.update()
-                except Exception:
-                    pass
+                state.on_profile_changed()
+                self.refresh_installed_state()
 
                 if self.on_cart_change:
                     self.on_cart_change()
@@ -1452,39 +1382,34 @@ class NixPackageCard(GlassContainer):
 
         final_cmd = f"nix profile remove {target}"
 
-        def do_uninstall():
-            if self.show_toast:
-                self.show_toast(f"Uninstalling {self.pname}...")
-            try:
-                subprocess.run(shlex.split(final_cmd), check=True)
-
-                # Smart Untrack
-                if state.is_tracked(self.pname, self.selected_channel):
-                    state.untrack_install(self.pname, self.selected_channel)
-                else:
-                    tracked_ch = state.get_tracked_channel(self.pname)
-                    if tracked_ch:
-                        state.untrack_install(self.pname, tracked_ch)
+        def on_complete(success):
+            if not success:
+                return
 
-                state.refresh_installed_cache()  # Refresh cache
+            # Smart Untrack
+            if state.is_tracked(self.pname, self.selected_channel):
+                state.untrack_install(self.pname, self.selected_channel)
+            else:
+                tracked_ch = state.get_tracked_channel(self.pname)
+                if tracked_ch:
+                    state.untrack_install(self.pname, tracked_ch)
 
-                if self.show_toast:
-                    self.show_toast(f"Uninstalled {self.pname}")
-                self.is_installed = False
+            state.on_profile_changed()
 
-                self.channel_dropdown.items = self.build_channel_menu_items()
-                self.channel_dropdown.update()
+            if self.show_toast:
+                self.show_toast(f"Uninstalled {self.pname}")
+            self.refresh_installed_state()
+            if self.on_cart_change:
+                self.on_cart_change()
+            if self.on_install_change:
+                self.on_install_change()
 
-                self.install_btn.visible = True
-                self.uninstall_btn.visible = False
-                self.update()
-                if self.on_cart_change:
-                    self.on_cart_change()
-                if self.on_install_change:
-                    self.on_install_change()
-            except Exception as ex:
-                if self.show_toast:
-                    self.show_toast(f"Uninstall failed: {ex}")
+        def do_uninstall():
+            # Runs in the background like installs, with live output
+            view = ProcessView(f"Uninstalling {self.pname}", final_cmd, on_complete)
+            if self.show_dialog:
+                view.show(self.show_dialog)
+            view.start()
 
         duration = state.confirm_timer
         confirm_btn = ft.ElevatedButton(
@@ -1518,29 +1443,25 @@ class NixPackageCard(GlassContainer):
                 "Uninstall App?", content, [cancel_btn, confirm_btn]
             )
 
-        def timer_logic():
-            for i in range(duration, 0, -1):
-                if not confirm_btn.page:
-                    return
-                confirm_btn.text = f"Yes ({i}s)"
-                try:
-                    confirm_btn.update()
-                except Exception:
-                    pass
-                time.sleep(1)
-
-            if confirm_btn.page:
-                confirm_btn.text = "Yes"
-                confirm_btn.disabled = False
-                confirm_btn.bgcolor = ft.Colors.RED_700
-                confirm_btn.color = ft.Colors.WHITE
-                confirm_btn.on_click = handle_confirm
-                try:
-                    confirm_btn.update()
-                except Exception:
-                    pass
-
-        threading.Thread(target=timer_logic, daemon=True).start()
+        def show_countdown(timer):
+            confirm_btn.text = f"Yes ({duration - round(timer.elapsed)}s)"
+            ticker.update(confirm_btn)
+
+        def enable_confirm():
+            confirm_btn.text = "Yes"
+            confirm_btn.disabled = False
+            confirm_btn.bgcolor = ft.Colors.RED_700
+            confirm_btn.color = ft.Colors.WHITE
+            confirm_btn.on_click = handle_confirm
+            ticker.update(confirm_btn)
+
+        ticker.every(
+            1,
+            show_countdown,
+            lifetime=duration,
+            owner=confirm_btn,
+            on_expire=enable_confirm,
+        )
 
     def refresh_lists_state(self):
         containing_lists = state.get_containing_lists(self.pkg, self.selected_channel)
@@ -1667,6 +1588,7 @@ class NixPackageCard(GlassContainer):
             # Update tracking status for new channel
             self.is_all_might = state.is_tracked(self.pname, self.selected_channel)
             # is_installed check remains same (based on pname in profile)
+            self.update_installed_chip()
 
             self.install_btn.visible = not self.is_installed
             self.uninstall_btn.visible = self.is_installed
@@ -1816,3 +1738,179 @@ class NixPackageCard(GlassContainer):
             output_text.value = f"Error executing command:\n{str(ex)}"
             if self.page_ref:
                 self.page_ref.update()
+
+
+# --- Lazy Card List ---
+# Result, cart, list and Installed views can hold hundreds of packages.
+# ft.ListView only lays out the rows on screen, but every NixPackageCard put
+# into it is still built up front and sent to the client. LazyCardList keeps
+# the items as data and only holds cards for the visible window plus an
+# overscan. Cards are built as they scroll into the window; cards that move
+# further than LAZY_RELEASE_DISTANCE out of it are dropped and replaced by a
+# spacer. Flet only reports the total scroll extent, not the height of single
+# rows, so the spacer uses the average row height measured when the card was
+# dropped: cards much taller or shorter than the rest shift the scroll
+# position a little when they are built again.
+LAZY_INITIAL_CARDS = 12
+LAZY_OVERSCAN = 6
+LAZY_RELEASE_DISTANCE = 24  # cards beyond the window before they're dropped
+CARD_HEIGHT_ESTIMATE = 110  # px per row until real heights are measured
+
+
+class LazyCardList(ft.ListView):
+    def __init__(
+        self, build_card=None, footer_height=100, on_end_reached=None, **kwargs
+    ):
+        kwargs.setdefault("spacing", 10)
+        kwargs.setdefault("expand", True)
+        super().__init__(on_scroll=self.handle_scroll, on_scroll_interval=100, **kwargs)
+        self.build_card = build_card  # item -> control
+        # Called when the list is scrolled to its last item, e.g. to load the
+        # next page of search results
+        self.on_end_reached = on_end_reached
+        self.items = []
+        # Cards exist for items[start:built_count]
+        self.start = 0
+        self.built_count = 0
+        self._cards = {}  # index -> card
+        # Items built once and dropped since: index -> average row height at
+        # the time (px, with spacing). Items past max_built were never built.
+        self._released = {}
+        self.max_built = 0
+        self.row_height = CARD_HEIGHT_ESTIMATE
+        self.footer_height = footer_height or 0
+        self.top_spacer = ft.Container(height=0)
+        self.bottom_spacer = ft.Container(height=0)
+        # Spacer for the bottom nav, kept as the last row
+        self.footer = ft.Container(height=footer_height) if footer_height else None
+
+    def set_items(self, items, build_card=None, keep_window=False):
+        # keep_window: refreshing the same list in place, so keep the same
+        # window of cards and the scroll position stays where it was
+        if build_card:
+            self.build_card = build_card
+        self.items = list(items)
+        self._cards = {}
+        end = LAZY_INITIAL_CARDS + LAZY_OVERSCAN
+        if keep_window:
+            count = len(self.items)
+            end = max(end, self.built_count)
+            self.max_built = min(self.max_built, count)
+            self._released = {i: h for i, h in self._released.items() if i < count}
+        else:
+            self.start = 0
+            self.max_built = 0
+            self._released = {}
+        self._set_window(self.start, end, rebuild=True)
+
+    def append_items(self, items):
+        # Adds items behind the current ones without rebuilding their cards.
+        # Returns True if new cards were built (the list needs an update).
+        if not items:
+            return False
+        if not self.items:
+            # Replaces a placeholder message
+            self.set_items(items)
+            return True
+        all_built = self.built_count >= len(self.items)
+        self.items.extend(items)
+        if all_built:
+            # The user is already at the end, show some of the new ones
+            return self.build_until(self.built_count + LAZY_OVERSCAN)
+        return False
+
+    def show_message(self, control):
+        # Replaces the cards with a single placeholder (empty, error, loading)
+        self.items = []
+        self.start = 0
+        self.built_count = 0
+        self.max_built = 0
+        self._cards = {}
+        self._released = {}
+        self.controls = self._with_footer([control])
+
+    def _with_footer(self, controls):
+        if self.footer:
+            controls.append(self.footer)
+        return controls
+
+    def build_until(self, count):
+        # Builds cards up to index `count`; returns True if any were added
+        count = min(count, len(self.items))
+        if count <= self.built_count:
+            return False
+        return self._set_window(self.start, count)
+
+    def _set_window(self, start, end, rebuild=False):
+        # Keeps cards for items[start:end] only; returns True if it changed
+        end = min(end, len(self.items))
+        start = max(0, min(start, end))
+        if not rebuild and (start, end) == (self.start, self.built_count):
+            return False
+
+        for index in list(self._cards):
+            if not start <= index < end:
+                del self._cards[index]
+                self._released[index] = self.row_height
+        for index in range(start, end):
+            if index not in self._cards:
+                self._cards[index] = self.build_card(self.items[index])
+                self._released.pop(index, None)
+        self.start = start
+        self.built_count = end
+        self.max_built = max(self.max_built, end)
+
+        controls = []
+        spacing = self.spacing or 0
+        top = sum(self._released.get(i, 0) for i in range(start))
+        if top:
+            self.top_spacer.height = max(0, top - spacing)
+            controls.append(self.top_spacer)
+        controls.extend(self._cards[i] for i in range(start, end))
+        bottom = sum(self._released.get(i, 0) for i in range(end, self.max_built))
+        if bottom:
+            self.bottom_spacer.height = max(0, bottom - spacing)
+            controls.append(self.bottom_spacer)
+        self.controls = self._with_footer(controls)
+        return True
+
+    def _measure(self, content_height):
+        # Average row height of the built cards, from the total scroll extent
+        built = self.built_count - self.start
+        if built <= 0:
+            return
+        released = sum(self._released.values())
+        rows = (content_height - released - self.footer_height) / built
+        if rows > 0:
+            self.row_height = min(max(rows, 20), 2000)
+
+    def handle_scroll(self, e):
+        pixels = getattr(e, "pixels", 0) or 0
+        viewport = getattr(e, "viewport_dimension", 0) or 0
+        max_extent = getattr(e, "max_scroll_extent", 0) or 0
+        near_end = max_extent - pixels < viewport
+        if max_extent > 0:
+            self._measure(max_extent + viewport)
+
+        # Rows covering the viewport, plus the overscan on either side
+        first = int(pixels / self.row_height)
+        last = int((pixels + viewport) / self.row_height) + 1
+        start, end = self.start, self.built_count
+        if first - start > LAZY_OVERSCAN + LAZY_RELEASE_DISTANCE:
+            start = first - LAZY_OVERSCAN
+        elif first - LAZY_OVERSCAN < start:
+            start = max(0, first - LAZY_OVERSCAN)
+        if end - last > LAZY_OVERSCAN + LAZY_RELEASE_DISTANCE:
+            end = last + LAZY_OVERSCAN
+        elif last + LAZY_OVERSCAN > end:
+            end = last + LAZY_OVERSCAN
+        if near_end and self.built_count >= self.max_built:
+            # Close to the end of what's built: cards are taller than estimated
+            end = max(end, self.built_count + LAZY_OVERSCAN)
+
+        if self._set_window(start, end) and self.page:
+            self.update()
+
+        if near_end and self.items and self.built_count >= len(self.items):
+            if self.on_end_reached:
+                self.on_end_reached()
@@ -0,0 +1,215 @@
+import json
+import ssl
+import base64
+import threading
+import http.client
+from urllib.parse import unquote, urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass
+
+# --- Shared HTTP Client ---
+# One module-level client for search, Mastodon, OpenGraph and icon fetching.
+# Connections are pooled per host and kept alive between requests, the number
+# of requests in flight is capped, and timeouts/retries are applied uniformly.
+# HTTP(S)_PROXY / NO_PROXY are honoured like urllib.request does: plain http
+# goes through the proxy, https is tunnelled with CONNECT.
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+REDIRECT_CODES = (301, 302, 303, 307, 308)
+# Errors that usually mean a kept-alive connection was closed by the server
+RETRYABLE_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    ConnectionResetError,
+    BrokenPipeError,
+    ConnectionAbortedError,
+)
+
+
+class HttpResponse:
+    def __init__(self, status, headers, body, url, truncated=False):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.url = url
+        self.truncated = truncated  # body was cut off at max_bytes
+
+    @property
+    def ok(self):
+        return 200 <= self.status < 300
+
+    @property
+    def content_type(self):
+        value = self.headers.get("Content-Type", "") or ""
+        return value.split(";")[0].strip().lower() or None
+
+    def text(self, encoding="utf-8"):
+        return self.body.decode(encoding, errors="ignore")
+
+    def json(self):
+        return json.loads(self.body)
+
+
+class HttpClient:
+    def __init__(
+        self,
+        max_connections_per_host=4,
+        max_concurrency=8,
+        timeout=10,
+        retries=1,
+        user_agent=DEFAULT_USER_AGENT,
+    ):
+        self.max_connections_per_host = max_connections_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.user_agent = user_agent
+
+        self._ssl_context = ssl.create_default_context()
+        self._idle = {}  # (scheme, host, port) -> [connections]
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+
+    # --- Proxies ---
+    @staticmethod
+    def _proxy_for(scheme, host):
+        # (host, port, Proxy-Authorization value) or None for a direct connection
+        proxy_url = getproxies().get(scheme)
+        if not proxy_url or proxy_bypass(host):
+            return None
+        if "://" not in proxy_url:
+            proxy_url = f"http://{proxy_url}"
+        parts = urlsplit(proxy_url)
+        auth = None
+        if parts.username:
+            credentials = f"{unquote(parts.username)}:{unquote(parts.password or '')}"
+            auth = "Basic " + base64.b64encode(credentials.encode()).decode("ascii")
+        return parts.hostname, parts.port or 80, auth
+
+    # --- Connection Pool ---
+    def _acquire(self, pool_key, timeout):
+        scheme, host, port, proxy = pool_key
+        with self._lock:
+            idle = self._idle.get(pool_key)
+            if idle:
+                conn = idle.pop()
+                if conn.sock is not None:
+                    conn.sock.settimeout(timeout)
+                return conn, True
+
+        conn_host, conn_port = (host, port) if proxy is None else proxy[:2]
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(
+                conn_host, conn_port, timeout=timeout, context=self._ssl_context
+            )
+            if proxy is not None:
+                tunnel_headers = {"Proxy-Authorization": proxy[2]} if proxy[2] else None
+                conn.set_tunnel(host, port, headers=tunnel_headers)
+        else:
+            conn = http.client.HTTPConnection(conn_host, conn_port, timeout=timeout)
+        return conn, False
+
+    def _release(self, pool_key, conn, reusable):
+        if reusable:
+            with self._lock:
+                idle = self._idle.setdefault(pool_key, [])
+                if len(idle) < self.max_connections_per_host:
+                    idle.append(conn)
+                    return
+        conn.close()
+
+    def close(self):
+        with self._lock:
+            for conns in self._idle.values():
+                for conn in conns:
+                    conn.close()
+            self._idle.clear()
+
+    # --- Requests ---
+    def _send(self, method, url, headers, data, timeout, max_bytes):
+        parts = urlsplit(url)
+        scheme = parts.scheme.lower()
+        if scheme not in ("http", "https"):
+            raise ValueError(f"Unsupported URL scheme: {url}")
+        port = parts.port or (443 if scheme == "https" else 80)
+        proxy = self._proxy_for(scheme, parts.hostname)
+        pool_key = (scheme, parts.hostname, port, proxy)
+
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        if proxy is not None and scheme == "http":
+            # Plain http is sent to the proxy with the full URL
+            path = f"http://{parts.netloc}{path}"
+            if proxy[2]:
+                headers = {**headers, "Proxy-Authorization": proxy[2]}
+
+        attempt = 0
+        while True:
+            conn, reused = self._acquire(pool_key, timeout)
+            try:
+                conn.request(method, path, body=data, headers=headers)
+                resp = conn.getresponse()
+                if max_bytes is None:
+                    body = resp.read()
+                    truncated = False
+                else:
+                    body = resp.read(max_bytes + 1)
+                    truncated = len(body) > max_bytes
+                    body = body[:max_bytes]
+            except RETRYABLE_ERRORS:
+                conn.close()
+                # A stale pooled connection is always worth one fresh attempt
+                if reused or attempt < self.retries:
+                    if not reused:
+                        attempt += 1
+                    continue
+                raise
+            except Exception:
+                conn.close()
+                raise
+
+            # The rest of a truncated body is still on the connection
+            self._release(pool_key, conn, not resp.will_close and not truncated)
+            return HttpResponse(resp.status, resp.headers, body, url, truncated)
+
+    def request(
+        self,
+        method,
+        url,
+        headers=None,
+        data=None,
+        timeout=None,
+        max_redirects=5,
+        max_bytes=None,
+    ):
+        # max_bytes caps how much of the body is read (see HttpResponse.truncated)
+        final_headers = {"User-Agent": self.user_agent, "Connection": "keep-alive"}
+        if headers:
+            final_headers.update(headers)
+        if timeout is None:
+            timeout = self.timeout
+
+        with self._slots:
+            for _ in range(max_redirects + 1):
+                response = self._send(
+                    method, url, final_headers, data, timeout, max_bytes
+                )
+                location = response.headers.get("Location")
+                if response.status not in REDIRECT_CODES or not location:
+                    return response
+
+                url = urljoin(url, location)
+                if response.status == 303 or (
+                    response.status in (301, 302) and method == "POST"
+                ):
+                    method = "GET"
+                    data = None
+            return response
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, data=None, **kwargs):
+        return self.request("POST", url, data=data, **kwargs)
+
+
+http_client = HttpClient()
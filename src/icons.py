@@ -0,0 +1,407 @@
+import os
+import re
+import json
+import time
+import hashlib
+import mimetypes
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import urljoin, urlparse
+from http_client import http_client
+from constants import ICON_CACHE_DIR
+
+# --- Package Icon Resolution ---
+# Icon lookups run on a small fixed pool of workers instead of one thread per
+# card. Lookups for the same host are shared while they are in flight, and
+# a card that unmounts drops its interest so queued lookups can be skipped.
+# Resolved icons are kept on disk (see IconCache) so cards can show them
+# straight from a local file on the next render or app start.
+
+ICON_WORKERS = 4
+
+ICON_FOUND = "found"
+ICON_INVALID = "invalid"
+ICON_MISSING = "missing"
+
+ICON_HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+# Download caps: icons larger than this are treated as invalid, homepages are
+# only scanned this far for <link rel="icon"> tags
+ICON_MAX_BYTES = 512 * 1024
+PAGE_MAX_BYTES = 1024 * 1024
+
+# Found icons are revalidated after this long unless the server says otherwise
+ICON_TTL = 7 * 86400
+ICON_MIN_TTL = 86400
+ICON_MAX_TTL = 30 * 86400
+# Hosts without a usable icon are retried after this long
+ICON_NEGATIVE_TTL = 86400
+
+_max_age_regex = re.compile(r"max-age=(\d+)", re.IGNORECASE)
+
+
+def icon_cache_key(homepage_url):
+    # favicon.ico is probed at the host root first, so the host decides the icon
+    netloc = urlparse(homepage_url).netloc.lower()
+    return netloc or homepage_url
+
+
+def _is_image(response):
+    content_type = response.content_type
+    return (
+        response.ok
+        and not response.truncated
+        and content_type
+        and content_type.startswith("image/")
+    )
+
+
+def discover_icon_url(homepage_url):
+    # Returns (icon_url, response). response is set when the icon has already
+    # been downloaded while probing. Raises if the homepage can't be fetched.
+
+    # 1. Prioritize favicon.ico at the root
+    try:
+        parsed_url = urlparse(homepage_url)
+        favicon_ico_url = f"{parsed_url.scheme}://{parsed_url.netloc}/favicon.ico"
+
+        response = http_client.get(
+            favicon_ico_url, headers=ICON_HEADERS, timeout=2, max_bytes=ICON_MAX_BYTES
+        )
+        if _is_image(response):
+            print(f"Found favicon.ico: {favicon_ico_url}")
+            return favicon_ico_url, response
+    except Exception:
+        pass  # favicon.ico not found, proceed to HTML parsing
+
+    # 2. Parse HTML for other icons if favicon.ico not found or invalid
+    response = http_client.get(
+        homepage_url, headers=ICON_HEADERS, timeout=5, max_bytes=PAGE_MAX_BYTES
+    )
+    html = response.text()
+
+    icons = []
+    # Robust regex to find link tags and extract attributes order-independently
+    link_regex = re.compile(r"<link\s+[^>]*?>", re.IGNORECASE)
+
+    for match in link_regex.finditer(html):
+        tag = match.group(0)
+        if "rel=" in tag and "href=" in tag:
+            # Extract rel
+            rel_match = re.search(r'rel=["\'](.*?)["\']', tag, re.IGNORECASE)
+            if not rel_match:
+                continue
+            rel_val = rel_match.group(1).lower()
+
+            if any(r in rel_val for r in ["icon", "shortcut icon", "apple-touch-icon"]):
+                # Extract href
+                href_match = re.search(r'href=["\'](.*?)["\']', tag, re.IGNORECASE)
+                if href_match:
+                    href = href_match.group(1)
+
+                    # Extract size
+                    sizes_match = re.search(
+                        r'sizes=["\'](\d+x\d+)["\']', tag, re.IGNORECASE
+                    )
+                    size = sizes_match.group(1) if sizes_match else "0x0"
+
+                    icons.append({"href": href, "size": size})
+
+    if not icons:
+        return None, None
+
+    # Sort icons by size (smallest first)
+    icons.sort(
+        key=lambda x: int(x["size"].split("x")[0]) if x["size"] != "0x0" else 999
+    )
+
+    # Get the best icon (smallest, but not 0x0 if possible)
+    icon_url = icons[0]["href"]
+    if not icon_url.startswith(("http:", "https:")):
+        icon_url = urljoin(homepage_url, icon_url)
+    print(f"Found icon URL from HTML: {icon_url}")
+    return icon_url, None
+
+
+# --- On-disk Icon Cache ---
+class IconCache:
+    def __init__(self, directory=ICON_CACHE_DIR):
+        self.directory = directory
+        self.index_path = os.path.join(directory, "index.json")
+        # host -> {"status", "icon_url", "file", "etag", "last_modified", "expires_at"}
+        self.entries = None
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+
+    def _ensure_loaded(self):
+        if self.entries is not None:
+            return
+        entries = {}
+        if os.path.exists(self.index_path):
+            try:
+                with open(self.index_path, "r") as f:
+                    entries = json.load(f)
+            except Exception as e:
+                print(f"Error loading icon cache: {e}")
+        self.entries = entries
+
+    def lookup(self, key):
+        with self._lock:
+            self._ensure_loaded()
+            entry = self.entries.get(key)
+            return dict(entry) if entry else None
+
+    @staticmethod
+    def is_fresh(entry):
+        return entry.get("expires_at", 0) > time.time()
+
+    def blob_path(self, entry):
+        if not entry or not entry.get("file"):
+            return None
+        path = os.path.join(self.directory, entry["file"])
+        return path if os.path.exists(path) else None
+
+    def cached_icon(self, homepage_url):
+        # Returns (local_path, fresh) for an icon that is already on disk
+        entry = self.lookup(icon_cache_key(homepage_url))
+        if not entry or entry.get("status") != ICON_FOUND:
+            return None, False
+        path = self.blob_path(entry)
+        return path, bool(path) and self.is_fresh(entry)
+
+    @staticmethod
+    def _expiry_for(response):
+        ttl = ICON_TTL
+        match = _max_age_regex.search(response.headers.get("Cache-Control", "") or "")
+        if match:
+            ttl = min(max(int(match.group(1)), ICON_MIN_TTL), ICON_MAX_TTL)
+        return time.time() + ttl
+
+    def store_image(self, key, icon_url, response):
+        extension = mimetypes.guess_extension(response.content_type or "") or ".img"
+        file_name = hashlib.sha1(icon_url.encode()).hexdigest() + extension
+        try:
+            Path(self.directory).mkdir(parents=True, exist_ok=True)
+            path = os.path.join(self.directory, file_name)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(response.body)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error saving icon for {key}: {e}")
+            return None
+
+        with self._lock:
+            self._ensure_loaded()
+            old = self.entries.get(key)
+            self.entries[key] = {
+                "status": ICON_FOUND,
+                "icon_url": icon_url,
+                "file": file_name,
+                "etag": response.headers.get("ETag"),
+                "last_modified": response.headers.get("Last-Modified"),
+                "expires_at": self._expiry_for(response),
+            }
+        if old and old.get("file") and old["file"] != file_name:
+            self._remove_blob(old["file"])
+        self._save()
+        return path
+
+    def store_negative(self, key, status):
+        with self._lock:
+            self._ensure_loaded()
+            old = self.entries.get(key)
+            self.entries[key] = {
+                "status": status,
+                "expires_at": time.time() + ICON_NEGATIVE_TTL,
+            }
+        if old and old.get("file"):
+            self._remove_blob(old["file"])
+        self._save()
+
+    def touch(self, key, response):
+        # Server answered 304 Not Modified: keep the blob, push the expiry out
+        with self._lock:
+            self._ensure_loaded()
+            entry = self.entries.get(key)
+            if entry is None:
+                return
+            entry["expires_at"] = self._expiry_for(response)
+            entry["etag"] = response.headers.get("ETag") or entry.get("etag")
+        self._save()
+
+    def clear(self):
+        with self._lock:
+            self.entries = {}
+        with self._write_lock:
+            if os.path.isdir(self.directory):
+                for name in os.listdir(self.directory):
+                    try:
+                        os.remove(os.path.join(self.directory, name))
+                    except Exception as e:
+                        print(f"Error removing cached icon {name}: {e}")
+
+    def stats(self):
+        with self._lock:
+            self._ensure_loaded()
+            found = sum(
+                1 for e in self.entries.values() if e.get("status") == ICON_FOUND
+            )
+            return {"icons": found, "negative": len(self.entries) - found}
+
+    def _remove_blob(self, file_name):
+        try:
+            os.remove(os.path.join(self.directory, file_name))
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            print(f"Error removing cached icon {file_name}: {e}")
+
+    def _save(self):
+        with self._lock:
+            data = dict(self.entries)
+        try:
+            with self._write_lock:
+                Path(self.directory).mkdir(parents=True, exist_ok=True)
+                tmp_path = f"{self.index_path}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(data, f)
+                os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            print(f"Error saving icon cache: {e}")
+
+
+icon_cache = IconCache()
+
+
+# --- Worker Pool ---
+class IconLoader:
+    def __init__(self, cache, max_workers=ICON_WORKERS):
+        self.cache = cache
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="icon-loader"
+        )
+        self._lock = threading.Lock()
+        self._in_flight = {}  # host -> {"future": Future, "callbacks": {ticket: cb}}
+        self._next_ticket = 0
+
+    def request(self, homepage_url, callback):
+        # callback(status, icon_src) runs on a worker thread; icon_src is a
+        # local file path when the icon could be cached
+        key = icon_cache_key(homepage_url)
+        with self._lock:
+            self._next_ticket += 1
+            ticket = (key, self._next_ticket)
+
+            entry = self._in_flight.get(key)
+            if entry is None:
+                entry = {"future": None, "callbacks": {}}
+                self._in_flight[key] = entry
+                entry["future"] = self._executor.submit(self._run, key, homepage_url)
+            entry["callbacks"][ticket] = callback
+        return ticket
+
+    def cancel(self, ticket):
+        if ticket is None:
+            return
+        key = ticket[0]
+        with self._lock:
+            entry = self._in_flight.get(key)
+            if entry is None:
+                return
+            entry["callbacks"].pop(ticket, None)
+            # Nobody is waiting anymore: drop the lookup if it hasn't started
+            if not entry["callbacks"] and entry["future"].cancel():
+                del self._in_flight[key]
+
+    def _run(self, key, homepage_url):
+        try:
+            status, icon_src = self._load(key, homepage_url)
+        except Exception as e:
+            print(f"Error resolving icon for {homepage_url}: {e}")
+            status, icon_src = ICON_INVALID, None
+
+        with self._lock:
+            entry = self._in_flight.pop(key, None)
+        if entry is None:
+            return
+
+        for cb in list(entry["callbacks"].values()):
+            try:
+                cb(status, icon_src)
+            except Exception as e:
+                print(f"Error in icon callback: {e}")
+
+    def _load(self, key, homepage_url):
+        entry = self.cache.lookup(key)
+        if entry:
+            path = self.cache.blob_path(entry)
+            if self.cache.is_fresh(entry):
+                if entry["status"] != ICON_FOUND:
+                    return entry["status"], None
+                if path:
+                    return ICON_FOUND, path
+            elif entry["status"] == ICON_FOUND and path:
+                result = self._revalidate(key, entry, path)
+                if result:
+                    return result
+        return self._resolve(key, homepage_url)
+
+    def _revalidate(self, key, entry, path):
+        headers = dict(ICON_HEADERS)
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        try:
+            response = http_client.get(
+                entry["icon_url"], headers=headers, timeout=5, max_bytes=ICON_MAX_BYTES
+            )
+        except Exception as e:
+            # Offline or host down: keep showing what we have
+            print(f"Error revalidating icon {entry['icon_url']}: {e}")
+            return ICON_FOUND, path
+
+        if response.status == 304:
+            self.cache.touch(key, response)
+            return ICON_FOUND, path
+        if _is_image(response):
+            return ICON_FOUND, self.cache.store_image(
+                key, entry["icon_url"], response
+            ) or entry["icon_url"]
+        return None  # Icon moved or disappeared, rediscover it
+
+    def _resolve(self, key, homepage_url):
+        try:
+            icon_url, response = discover_icon_url(homepage_url)
+        except Exception as e:
+            # Not cached: the host may just be unreachable right now
+            print(f"Error parsing HTML for {homepage_url}: {e}")
+            return ICON_MISSING, None
+
+        if not icon_url:
+            print(f"No icon found for {homepage_url}")
+            self.cache.store_negative(key, ICON_MISSING)
+            return ICON_MISSING, None
+
+        try:
+            if response is None:
+                response = http_client.get(
+                    icon_url, headers=ICON_HEADERS, timeout=5, max_bytes=ICON_MAX_BYTES
+                )
+        except Exception as e:
+            print(f"Error validating or fetching icon {icon_url}: {e}")
+            return ICON_INVALID, None
+
+        if not _is_image(response):
+            print(
+                f"Invalid content type '{response.content_type}' for icon: {icon_url}"
+            )
+            self.cache.store_negative(key, ICON_INVALID)
+            return ICON_INVALID, None
+
+        return ICON_FOUND, self.cache.store_image(key, icon_url, response) or icon_url
+
+
+icon_loader = IconLoader(icon_cache)
@@ -0,0 +1,111 @@
+import threading
+
+# --- Job Scheduler ---
+# ProcessView.start() queues its command here instead of spawning it right
+# away. Jobs that change the nix profile run one at a time, since concurrent
+# `nix profile` invocations contend on the profile lock. Installs waiting next
+# to each other in the queue are merged into a single `nix profile add a b c`.
+# Read-only jobs run in parallel, up to max_parallel at once.
+
+INSTALL = "install"  # nix profile add, mergeable
+MUTATE = "mutate"  # any other profile change (remove, upgrade, ...)
+READ = "read"  # doesn't touch the profile
+
+READ_ONLY_PROFILE_COMMANDS = {"list", "history", "diff-closures"}
+DEFAULT_MAX_PARALLEL = 3
+
+
+def job_kind_for(cmd):
+    parts = cmd.split()
+    if parts[:2] != ["nix", "profile"] or len(parts) < 3:
+        return READ
+    if parts[2] in ("add", "install"):
+        return INSTALL
+    if parts[2] in READ_ONLY_PROFILE_COMMANDS:
+        return READ
+    return MUTATE
+
+
+def install_targets(cmd):
+    # "nix profile add a b" -> ["a", "b"]
+    return cmd.split()[3:]
+
+
+class JobScheduler:
+    def __init__(self, max_parallel=DEFAULT_MAX_PARALLEL):
+        self.max_parallel = max_parallel
+        self._lock = threading.Lock()
+        self._profile_queue = []  # waiting INSTALL / MUTATE jobs, in order
+        self._read_queue = []
+        self._profile_busy = False
+        self._running_reads = 0
+
+    def configure(self, max_parallel=None):
+        if max_parallel is not None:
+            self.max_parallel = max(1, int(max_parallel))
+        self._dispatch()
+
+    def submit(self, job):
+        with self._lock:
+            if job.kind == READ:
+                self._read_queue.append(job)
+            else:
+                self._profile_queue.append(job)
+        self._dispatch()
+
+    def cancel(self, job):
+        # Drops a job that hasn't started yet; returns True if it was queued
+        with self._lock:
+            for queue in (self._profile_queue, self._read_queue):
+                if job in queue:
+                    queue.remove(job)
+                    return True
+        return False
+
+    def queued_count(self):
+        with self._lock:
+            return len(self._profile_queue) + len(self._read_queue)
+
+    def retry_alone(self, jobs):
+        # A combined install failed: run its jobs again one by one, ahead of
+        # everything else in the queue. Called instead of job_finished.
+        with self._lock:
+            self._profile_queue[:0] = jobs
+            self._profile_busy = False
+        self._dispatch()
+
+    def job_finished(self, job):
+        with self._lock:
+            if job.kind == READ:
+                self._running_reads -= 1
+            else:
+                self._profile_busy = False
+        self._dispatch()
+
+    def _dispatch(self):
+        batches = []
+        with self._lock:
+            if not self._profile_busy and self._profile_queue:
+                batch = [self._profile_queue.pop(0)]
+                if batch[0].kind == INSTALL and batch[0].mergeable:
+                    # Only the installs directly behind it, so a queued
+                    # removal still runs in the order it was requested
+                    while (
+                        self._profile_queue
+                        and self._profile_queue[0].kind == INSTALL
+                        and self._profile_queue[0].mergeable
+                    ):
+                        batch.append(self._profile_queue.pop(0))
+                self._profile_busy = True
+                batches.append(batch)
+
+            while self._read_queue and self._running_reads < self.max_parallel:
+                self._running_reads += 1
+                batches.append([self._read_queue.pop(0)])
+
+        for batch in batches:
+            # The first job runs the command for the whole batch
+            batch[0].launch(batch[1:])
+
+
+job_scheduler = JobScheduler()
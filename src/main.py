@@ -1,5 +1,4 @@
 import flet as ft
-import time
 import threading
 import shlex
 import subprocess
@@ -14,6 +13,8 @@ from controls import (
     NixPackageCard,
     UndoToast,
     DelayedActionToast,
+    LazyCardList,
+    LAZY_INITIAL_CARDS,
 )
 from views import (
     get_home_view,
@@ -21,15 +22,25 @@ from views import (
     get_cart_view,
     get_lists_view,
     get_settings_view,
+    refresh_home_mastodon_caches,
 )
-from process_page import get_process_page
-from updates import get_installed_view
-from utils import execute_nix_search
+from process_view import ProcessView, BulkProcessView
+from utils import execute_nix_search, search_page_size, MAX_FILL_PAGES
+import package_index
+from nix_profile import profile_service, ProfileWatcher
+from async_core import core
+from ticker import ticker
+from startup import StartupTasks
 
 # --- Main Application ---
 
 
 def main(page: ft.Page):
+    # Installed state and Mastodon posts from the last session until the
+    # startup tasks have fresh ones
+    state.load_cached_profile()
+    state.load_mastodon_cache()
+
     page.title = APP_NAME
     page.theme_mode = ft.ThemeMode.DARK  # Enforce Dark Mode
     page.theme = ft.Theme(color_scheme_seed=state.theme_color)
@@ -40,6 +51,30 @@ def main(page: ft.Page):
     current_nav_idx = [0]
     current_results = []
     active_filters = {"No package set"}  # Default filter
+    # Paged search: each page holds search_limit results. The page after the
+    # loaded ones is prefetched and merged in once the results list is
+    # scrolled to its end. A new search bumps the generation so pages still
+    # arriving for the previous query are dropped.
+    search_paging = {
+        "query": "",
+        "channel": "",
+        "generation": 0,
+        "next_offset": 0,
+        "done": True,
+        "fetching": False,
+        "pending": None,  # fetched page waiting to be merged
+        "wanted": False,  # the list reached its end before the page arrived
+        "fill_pages": 0,  # pages loaded only to fill the first screen
+    }
+    # Guards search_paging; never held across a UI update
+    paging_lock = threading.Lock()
+    # Held while current_results and results_column change, so a page merged
+    # from the pool, a new query's results and a filter change don't
+    # interleave. Taken before paging_lock. Reentrant: rendering a page can
+    # merge the next one.
+    results_lock = threading.RLock()
+    search_task = [None]  # TaskHandle of the query running in the background
+    live_search_timer = [None]
     pending_filters = set()
 
     global_menu_card = GlassContainer(
@@ -395,25 +430,20 @@ def main(page: ft.Page):
         t_container.opacity = 1
         t_container.update()
 
-        def hide():
-            time.sleep(2.0)
+        def fade_out(timer):
             if current_toast_token[0] != my_token:
                 return
-            try:
-                t_container.opacity = 0
-                page.update()
-            except Exception:
-                pass
-            time.sleep(0.3)
+            t_container.opacity = 0
+            ticker.update(t_container)
+            ticker.after(0.3, remove)
+
+        def remove(timer):
             if current_toast_token[0] != my_token:
                 return
-            try:
-                toast_overlay_container.visible = False
-                page.update()
-            except Exception:
-                pass
+            toast_overlay_container.visible = False
+            ticker.update(toast_overlay_container)
 
-        threading.Thread(target=hide, daemon=True).start()
+        ticker.after(2.0, fade_out)
 
     def show_undo_toast(message, on_undo):
         current_toast_token[0] += 1
@@ -520,30 +550,25 @@ def main(page: ft.Page):
 
         close_dialog_func[0] = show_custom_dialog(title, content, actions)
 
-        def timer_logic():
-            for i in range(duration, 0, -1):
-                if not custom_dialog_overlay.visible:
-                    return
-                confirm_btn.text = f"Yes ({i}s)"
-                try:
-                    confirm_btn.update()
-                except Exception:
-                    pass
-                time.sleep(1)
-
-            if custom_dialog_overlay.visible:
-                confirm_btn.text = "Yes"
-                confirm_btn.disabled = False
-                confirm_btn.bgcolor = ft.Colors.RED_700
-                confirm_btn.color = ft.Colors.WHITE
-                try:
-                    confirm_btn.update()
-                except Exception:
-                    pass
-
-        threading.Thread(target=timer_logic, daemon=True).start()
-
-    results_column = ft.Column(spacing=10)
+        def show_countdown(timer):
+            if not custom_dialog_overlay.visible:
+                timer.cancel()
+                return
+            confirm_btn.text = f"Yes ({duration - round(timer.elapsed)}s)"
+            ticker.update(confirm_btn)
+
+        def enable_confirm():
+            if not custom_dialog_overlay.visible:
+                return
+            confirm_btn.text = "Yes"
+            confirm_btn.disabled = False
+            confirm_btn.bgcolor = ft.Colors.RED_700
+            confirm_btn.color = ft.Colors.WHITE
+            ticker.update(confirm_btn)
+
+        ticker.every(1, show_countdown, lifetime=duration, on_expire=enable_confirm)
+
+    results_column = LazyCardList()
 
     active_cart_list_control = [None]
 
@@ -599,30 +624,9 @@ def main(page: ft.Page):
     cart_header_bulk_btn = ft.Container()  # Placeholder for dynamic button
 
     def global_refresh_action(e=None):
+        # Cards on screen (and the Installed view) are notified of what changed
+        # through state's profile listeners, so nothing is rebuilt here
         state.refresh_installed_cache()
-        # Refresh current view if applicable
-        # We can check `current_nav_idx[0]`
-        idx = current_nav_idx[0]
-        if idx == 1:  # Search
-            # Re-render results?
-            # `perform_search` does logic.
-            # Just calling `update_results_list` might be enough if it re-reads state?
-            # `update_results_list` uses `NixPackageCard`. `NixPackageCard` checks `is_installed` on init.
-            # So we must recreate cards. `update_results_list` does that.
-            update_results_list()
-        elif idx == 2:  # Cart
-            refresh_cart_view()
-        elif idx == 3:  # Lists
-            # Depends on sub-view
-            if selected_list_name or is_viewing_favourites:
-                refresh_list_detail_view()
-            else:
-                refresh_lists_main_view()
-        elif idx == 4:  # Installed
-            content_area.content = get_installed_view(
-                page, on_global_cart_change, show_toast, global_refresh_action
-            )
-            content_area.update()
 
         show_toast("Status Refreshed")
 
@@ -810,7 +814,7 @@ def main(page: ft.Page):
     selected_list_name = None
     is_viewing_favourites = False
     lists_main_col = ft.Column(expand=False)
-    list_detail_col = ft.Column(expand=False)
+    list_detail_col = LazyCardList()
     lists_badge_count = ft.Text(
         str(len(state.saved_lists)),
         size=max(8, badge_size_val / 2),
@@ -1092,6 +1096,43 @@ def main(page: ft.Page):
         if list_detail_col.page:
             refresh_list_detail_view(update_ui=True)
 
+    def run_bulk_jobs(label, jobs, refresh_cb):
+        # jobs: list of (title, cmd, on_success). Each package gets its own
+        # ProcessView with its own status and result. The scheduler may combine
+        # queued installs into one command; those share one process, so only
+        # the first job of such a batch can cancel it.
+        total = len(jobs)
+        finished = [0]
+        succeeded = [0]
+        lock = threading.Lock()
+
+        def make_on_complete(on_success):
+            def on_complete(success):
+                if success:
+                    on_success()
+                with lock:
+                    finished[0] += 1
+                    if success:
+                        succeeded[0] += 1
+                    done = finished[0] == total
+                if done:
+                    state.on_profile_changed()
+                    if refresh_cb:
+                        refresh_cb()
+                    show_toast(f"{label}: {succeeded[0]} of {total} succeeded")
+
+            return on_complete
+
+        views = [
+            ProcessView(title, cmd, make_on_complete(on_success))
+            for title, cmd, on_success in jobs
+        ]
+        for view in views:
+            view.start()
+        # One overview of every job; each row opens that job's output
+        BulkProcessView(label, views).show(show_custom_dialog)
+        show_toast(f"{label}: {total} jobs queued, see Processes for details")
+
     def get_bulk_action_button(items, context_name, refresh_cb):
         if not items:
             return ft.Container()
@@ -1132,21 +1173,18 @@ def main(page: ft.Page):
             def run_uninstall_all(e):
                 def do_uninstall(e):
                     def actual_execution():
-                        show_toast(f"Uninstalling {len(targets)} packages...")
-                        try:
-                            subprocess.run(shlex.split(cmd), check=True)
-                            # Untrack
-                            for item in items:
-                                p = item["package"].get("package_pname")
-                                c = item["channel"]
-                                state.untrack_install(p, c)
-
-                            state.refresh_installed_cache()
-                            if refresh_cb:
-                                refresh_cb()
-                            show_toast("Bulk uninstall successful")
-                        except Exception as ex:
-                            show_toast(f"Bulk uninstall failed: {ex}")
+                        jobs = []
+                        for item in items:
+                            p = item["package"].get("package_pname", "Unknown")
+                            c = item["channel"]
+                            jobs.append(
+                                (
+                                    f"Uninstalling {p}",
+                                    f"nix profile remove nixpkgs/{c}#{p}",
+                                    lambda p=p, c=c: state.untrack_install(p, c),
+                                )
+                            )
+                        run_bulk_jobs("Bulk uninstall", jobs, refresh_cb)
 
                     show_delayed_toast(
                         f"Uninstalling {len(targets)} apps...", actual_execution
@@ -1182,20 +1220,16 @@ def main(page: ft.Page):
 
             def run_install_all(e):
                 def do_install():
-                    show_toast(f"Installing {len(targets)} packages...")
-                    try:
-                        subprocess.run(shlex.split(cmd), check=True)
-                        # Track all installed items (only the ones we installed? or all in list? Usually track what we just installed)
-                        for pname in missing_pnames_map:
-                            channel = missing_pnames_map[pname]
-                            state.track_install(pname, channel)
-
-                        state.refresh_installed_cache()
-                        show_toast("Bulk install successful")
-                        if refresh_cb:
-                            refresh_cb()
-                    except Exception as ex:
-                        show_toast(f"Bulk install failed: {ex}")
+                    # Track only the packages whose install succeeded
+                    jobs = [
+                        (
+                            f"Installing {pname}",
+                            f"nix profile add nixpkgs/{channel}#{pname}",
+                            lambda p=pname, c=channel: state.track_install(p, c),
+                        )
+                        for pname, channel in missing_pnames_map.items()
+                    ]
+                    run_bulk_jobs("Bulk install", jobs, refresh_cb)
 
                 close_dialog = [None]
 
@@ -1223,6 +1257,19 @@ def main(page: ft.Page):
                 on_click=run_install_all,
             )
 
+    def build_saved_item_card(item):
+        # Cards for cart / favourites / saved list entries
+        return NixPackageCard(
+            item["package"],
+            page,
+            item["channel"],
+            on_cart_change=on_global_cart_change,
+            is_cart_view=True,
+            show_toast_callback=show_toast,
+            on_menu_open=None,
+            show_dialog_callback=show_custom_dialog,
+        )
+
     def refresh_cart_view(update_ui=False):
         target_list = active_cart_list_control[0]
         if not target_list:
@@ -1253,9 +1300,8 @@ def main(page: ft.Page):
         )
         cart_header_bulk_btn.content = bulk_btn
 
-        target_list.controls.clear()
         if not state.cart_items:
-            target_list.controls.append(
+            target_list.show_message(
                 ft.Container(
                     content=ft.Text("Your cart is empty.", color="onSurface"),
                     alignment=ft.alignment.center,
@@ -1263,21 +1309,9 @@ def main(page: ft.Page):
                 )
             )
         else:
-            for item in state.cart_items:
-                pkg_data = item["package"]
-                saved_channel = item["channel"]
-                target_list.controls.append(
-                    NixPackageCard(
-                        pkg_data,
-                        page,
-                        saved_channel,
-                        on_cart_change=on_global_cart_change,
-                        is_cart_view=True,
-                        show_toast_callback=show_toast,
-                        on_menu_open=None,
-                        show_dialog_callback=show_custom_dialog,
-                    )
-                )
+            target_list.set_items(
+                state.cart_items, build_saved_item_card, keep_window=update_ui
+            )
 
         if update_ui:
             if cart_header.page:
@@ -1285,6 +1319,22 @@ def main(page: ft.Page):
             if target_list.page:
                 target_list.update()
 
+    def on_cart_profile_change(diff):
+        # The cart's bulk button switches between install and uninstall
+        if not cart_header.page:
+            return
+        cart_pnames = {
+            item["package"].get("package_pname") for item in state.cart_items
+        }
+        if cart_pnames.isdisjoint(diff.affected_names()):
+            return
+        cart_header_bulk_btn.content = get_bulk_action_button(
+            state.cart_items, "Cart", lambda: refresh_cart_view(True)
+        )
+        cart_header_bulk_btn.update()
+
+    state.add_profile_listener(on_cart_profile_change)
+
     def refresh_dropdown_options():
         if state.default_channel in state.active_channels:
             new_val = state.default_channel
@@ -1301,11 +1351,25 @@ def main(page: ft.Page):
         if channel_text.page:
             channel_text.update()
 
+    def filter_results(results):
+        if not active_filters:
+            return results
+        return [
+            pkg
+            for pkg in results
+            if pkg.get("package_attr_set", "No package set") in active_filters
+        ]
+
+    def set_result_count_text(filtered_count):
+        if not active_filters:
+            result_count_text.value = f"Showing total {len(current_results)} results"
+        else:
+            result_count_text.value = f"Showing {filtered_count} filtered results from total {len(current_results)} results"
+
     def update_results_list():
-        results_column.controls.clear()
         if current_results and "error" in current_results[0]:
             error_msg = current_results[0]["error"]
-            results_column.controls.append(
+            results_column.show_message(
                 ft.Container(
                     content=ft.Column(
                         [
@@ -1337,17 +1401,8 @@ def main(page: ft.Page):
                 result_count_text.update()
             return
 
-        filtered_data = []
-        if not active_filters:
-            filtered_data = current_results
-            result_count_text.value = f"Showing total {len(current_results)} results"
-        else:
-            filtered_data = [
-                pkg
-                for pkg in current_results
-                if pkg.get("package_attr_set", "No package set") in active_filters
-            ]
-            result_count_text.value = f"Showing {len(filtered_data)} filtered results from total {len(current_results)} results"
+        filtered_data = filter_results(current_results)
+        set_result_count_text(len(filtered_data))
 
         result_count_text.visible = True
         filter_count = len(active_filters)
@@ -1359,7 +1414,7 @@ def main(page: ft.Page):
             result_count_text.update()
 
         if not filtered_data:
-            results_column.controls.append(
+            results_column.show_message(
                 ft.Container(
                     content=ft.Text(
                         "No results found.",
@@ -1371,20 +1426,7 @@ def main(page: ft.Page):
                 )
             )
         else:
-            # Use .data if set, else .value fallback
-            current_ch = getattr(channel_dropdown, "data", channel_dropdown.value)
-            for pkg in filtered_data:
-                results_column.controls.append(
-                    NixPackageCard(
-                        pkg,
-                        page,
-                        current_ch,
-                        on_cart_change=on_global_cart_change,
-                        show_toast_callback=show_toast,
-                        on_menu_open=None,
-                        show_dialog_callback=show_custom_dialog,
-                    )
-                )
+            results_column.set_items(filtered_data)
         if results_column.page:
             results_column.update()
 
@@ -1559,35 +1601,205 @@ def main(page: ft.Page):
         suggestions_container.update()
         suggestions_dismiss_layer.update()
 
-    search_field.on_change = update_suggestions
     search_field.on_focus = update_suggestions
 
-    def perform_search(e):
-        if suggestions_container.visible:
+    def perform_search(e, live=False):
+        # Runs the query in the background; the input stays responsive.
+        # live: started by typing (see on_search_change) rather than submit
+        if live_search_timer[0]:
+            live_search_timer[0].cancel()
+        if suggestions_container.visible and not live:
             hide_suggestions()
 
-        if results_column.page:
-            results_column.controls = [
+        # Live searches keep the previous results until the new ones arrive
+        if results_column.page and not live:
+            results_column.show_message(
                 ft.Container(
                     content=ft.ProgressRing(color=ft.Colors.PURPLE_400),
                     alignment=ft.alignment.center,
                     padding=20,
                 )
-            ]
+            )
             results_column.update()
         if filter_menu.visible:
             toggle_filter_menu(False)
         query = search_field.value
-        state.add_to_search_history(query)  # Save history
+        if not live:
+            state.add_to_search_history(query)  # Save history
 
         current_channel = getattr(channel_dropdown, "data", channel_dropdown.value)
-        active_filters.clear()
-        active_filters.add("No package set")
+        # Live searches get here off the UI thread: a page merge still running
+        # for the previous query must not see a half-reset filter set
+        with results_lock:
+            active_filters.clear()
+            active_filters.add("No package set")
+            with paging_lock:
+                search_paging.update(
+                    query=query,
+                    channel=current_channel,
+                    generation=search_paging["generation"] + 1,
+                    next_offset=search_page_size(),
+                    # No more pages until the first one is on screen
+                    done=True,
+                    fetching=False,
+                    pending=None,
+                    wanted=False,
+                    fill_pages=0,
+                )
+                generation = search_paging["generation"]
+
+        # A superseded query that hasn't started yet is dropped; one already
+        # waiting on the backend is discarded when it returns
+        if search_task[0]:
+            search_task[0].cancel()
+        search_task[0] = core.run_blocking(
+            run_search, generation, query, current_channel
+        )
+
+    def run_search(generation, query, channel):
         nonlocal current_results
         try:
-            current_results = execute_nix_search(query, current_channel)
-        finally:
+            results = execute_nix_search(query, channel)
+        except Exception as ex:
+            print(f"Search failed: {ex}")
+            results = [{"error": f"Execution Error: {str(ex)}"}]
+
+        # Renders run one at a time, so an older query can't overwrite a
+        # newer one; a query superseded by now isn't rendered at all
+        with results_lock:
+            with paging_lock:
+                if generation != search_paging["generation"]:
+                    return
+                search_paging["done"] = not results or "error" in results[0]
+            current_results = results
             update_results_list()
+            fill_results_view()
+        prefetch_next_page()
+
+    def on_search_change(e):
+        update_suggestions(e)
+        if not state.live_search:
+            return
+        # Debounce: only the last keystroke within the delay starts a search
+        if live_search_timer[0]:
+            live_search_timer[0].cancel()
+        if not (search_field.value or "").strip():
+            return
+        # The search itself runs on the pool, not on the ticker thread
+        live_search_timer[0] = ticker.after(
+            state.live_search_delay / 1000,
+            lambda timer: core.run_blocking(perform_search, None, live=True),
+        )
+
+    search_field.on_change = on_search_change
+
+    def prefetch_next_page():
+        with paging_lock:
+            if search_paging["done"] or search_paging["fetching"]:
+                return
+            if search_paging["pending"] is not None:
+                return
+            search_paging["fetching"] = True
+            args = (
+                search_paging["generation"],
+                search_paging["query"],
+                search_paging["channel"],
+                search_paging["next_offset"],
+            )
+        core.run_blocking(fetch_results_page, *args)
+
+    def fetch_results_page(generation, query, channel, offset):
+        page_results = execute_nix_search(query, channel, offset)
+        with paging_lock:
+            if generation != search_paging["generation"]:
+                return  # a newer search has started
+            search_paging["fetching"] = False
+            if not page_results or "error" in page_results[0]:
+                if page_results:
+                    print(f"Error loading more results: {page_results[0]['error']}")
+                search_paging["done"] = True
+                return
+            search_paging["next_offset"] = offset + search_page_size()
+            search_paging["pending"] = page_results
+            merge_now = search_paging["wanted"]
+        if merge_now:
+            merge_pending_page()
+
+    def merge_pending_page():
+        nonlocal current_results
+        with results_lock:
+            with paging_lock:
+                page_results = search_paging["pending"]
+                search_paging["pending"] = None
+                search_paging["wanted"] = False
+            # The page belongs to the results on screen: a new search drops
+            # the pending page and can't render its own while this is held
+            if not page_results:
+                return
+
+            # Pages can overlap when the index changed in between
+            seen = {
+                (p.get("package_pname", ""), p.get("package_pversion", ""))
+                for p in current_results
+            }
+            new_results = [
+                p
+                for p in page_results
+                if (p.get("package_pname", ""), p.get("package_pversion", ""))
+                not in seen
+            ]
+            current_results = current_results + new_results
+
+            # Earlier cards stay as they are; only the new ones are appended
+            changed = results_column.append_items(filter_results(new_results))
+            set_result_count_text(len(filter_results(current_results)))
+            if result_count_text.page:
+                result_count_text.update()
+            if changed and results_column.page:
+                results_column.update()
+
+            fill_results_view()
+        prefetch_next_page()
+
+    def load_more_results():
+        # results_column reached its last item
+        with paging_lock:
+            if search_paging["done"]:
+                return
+            has_page = search_paging["pending"] is not None
+            if not has_page:
+                search_paging["wanted"] = True
+        if has_page:
+            merge_pending_page()
+        else:
+            prefetch_next_page()
+
+    def fill_results_view():
+        # With few (filtered) results the list can't be scrolled, so it would
+        # never reach its end: keep loading until the first screen is full,
+        # up to MAX_FILL_PAGES pages per query
+        if len(results_column.items) >= LAZY_INITIAL_CARDS:
+            return
+        with paging_lock:
+            if search_paging["fill_pages"] >= MAX_FILL_PAGES:
+                return
+            search_paging["fill_pages"] += 1
+        load_more_results()
+
+    def build_result_card(pkg):
+        # Cards use the channel the results were searched in
+        return NixPackageCard(
+            pkg,
+            page,
+            search_paging["channel"],
+            on_cart_change=on_global_cart_change,
+            show_toast_callback=show_toast,
+            on_menu_open=None,
+            show_dialog_callback=show_custom_dialog,
+        )
+
+    results_column.build_card = build_result_card
+    results_column.on_end_reached = load_more_results
 
     def toggle_filter_menu(visible):
         if visible:
@@ -1627,10 +1839,14 @@ def main(page: ft.Page):
             filter_dismiss_layer.update()
 
     def apply_filters():
-        active_filters.clear()
-        active_filters.update(pending_filters)
         toggle_filter_menu(False)
-        update_results_list()
+        # A page merged meanwhile is filtered and rendered once, not lost
+        # or duplicated
+        with results_lock:
+            active_filters.clear()
+            active_filters.update(pending_filters)
+            update_results_list()
+            fill_results_view()
 
     search_field.on_submit = perform_search
     filter_menu.content.controls[3].controls[0].on_click = lambda e: toggle_filter_menu(
@@ -1850,7 +2066,6 @@ def main(page: ft.Page):
             lists_main_col.update()
 
     def refresh_list_detail_view(update_ui=False):
-        list_detail_col.controls.clear()
         items = []
         if is_viewing_favourites:
             items = state.favourites
@@ -1858,7 +2073,7 @@ def main(page: ft.Page):
             items = state.saved_lists[selected_list_name]
 
         if not items:
-            list_detail_col.controls.append(
+            list_detail_col.show_message(
                 ft.Container(
                     content=ft.Text("This list is empty.", color="onSurface"),
                     alignment=ft.alignment.center,
@@ -1866,21 +2081,9 @@ def main(page: ft.Page):
                 )
             )
         else:
-            for item in items:
-                pkg_data = item["package"]
-                saved_channel = item["channel"]
-                list_detail_col.controls.append(
-                    NixPackageCard(
-                        pkg_data,
-                        page,
-                        saved_channel,
-                        on_cart_change=on_global_cart_change,
-                        is_cart_view=True,
-                        show_toast_callback=show_toast,
-                        on_menu_open=None,
-                        show_dialog_callback=show_custom_dialog,
-                    )
-                )
+            list_detail_col.set_items(
+                items, build_saved_item_card, keep_window=update_ui
+            )
 
         if update_ui and list_detail_col.page:
             list_detail_col.update()
@@ -2063,6 +2266,9 @@ def main(page: ft.Page):
 
         if idx == 0:
             content_area.content = get_home_view()
+            if "home_posts" in startup_tasks.timings:
+                # Later visits retry posts the startup fetch didn't get
+                core.run_blocking(fetch_home_posts)
         elif idx == 1:
             content_area.content = get_search_view(
                 perform_search,
@@ -2079,7 +2285,7 @@ def main(page: ft.Page):
                 ),
             )
         elif idx == 2:
-            active_cart_list_control[0] = ft.Column(spacing=10)
+            active_cart_list_control[0] = LazyCardList()
             content_area.content = get_cart_view(
                 lambda: refresh_cart_view(), cart_header, active_cart_list_control[0]
             )
@@ -2101,6 +2307,9 @@ def main(page: ft.Page):
                 refresh_callback=global_refresh_action,
             )
         elif idx == 4:
+            # Imported on first use (warmed up by the startup tasks)
+            from updates import get_installed_view
+
             content_area.content = get_installed_view(
                 page,
                 on_global_cart_change,
@@ -2109,6 +2318,8 @@ def main(page: ft.Page):
                 refresh_callback=global_refresh_action,
             )
         elif idx == 5:
+            from process_page import get_process_page
+
             content_area.content = get_process_page(
                 show_custom_dialog, show_destructive_dialog, show_undo_toast
             )
@@ -2126,16 +2337,41 @@ def main(page: ft.Page):
             )
         content_area.update()
 
-    def auto_refresh_loop():
-        while True:
-            if state.auto_refresh_ui:
-                try:
-                    state.refresh_installed_cache()
-                except Exception:
-                    pass
-            time.sleep(max(1, state.auto_refresh_interval))
+    def fetch_home_posts():
+        # Home shows cached Mastodon posts right away; rebuild it once fresh
+        # ones arrive if it's still the visible page
+        if refresh_home_mastodon_caches() and current_nav_idx[0] == 0:
+            content_area.content = get_home_view()
+            content_area.update()
 
-    threading.Thread(target=auto_refresh_loop, daemon=True).start()
+    def start_profile_watcher():
+        # Auto refresh: reload the installed cache when the nix profile changes
+        ProfileWatcher(
+            profile_service,
+            on_change=state.refresh_installed_cache,
+            is_enabled=lambda: state.auto_refresh_ui,
+            poll_interval=lambda: state.auto_refresh_interval,
+        ).start()
+
+    def warm_up_views():
+        # Module imports for pages that aren't shown on launch
+        import updates  # noqa: F401
+        import process_page  # noqa: F401
+
+    def warm_up_index():
+        # The first search doesn't pay the offline index load cost
+        if state.use_offline_index:
+            package_index.get_index(state.default_channel)
+
+    # Everything below starts after the first frame (see the end of main)
+    startup_tasks = StartupTasks()
+    startup_tasks.add("profile", state.refresh_installed_cache)
+    # The watcher's first check would otherwise start a second scan
+    startup_tasks.add("profile_watcher", start_profile_watcher, after=["profile"])
+    startup_tasks.add("processes", state.load_processes)
+    startup_tasks.add("views", warm_up_views)
+    startup_tasks.add("index", warm_up_index)
+    startup_tasks.add("home_posts", fetch_home_posts)
 
     def handle_resize(e):
         if navbar_ref[0]:
@@ -2151,50 +2387,58 @@ def main(page: ft.Page):
     default_bg_container.rotate = ft.Rotate(0, alignment=ft.alignment.center)
     default_bg_container.scale = ft.Scale(1)
 
-    def rotation_loop():
-        angle = 0.0
-        while True:
-            if state.bg_rotation:
-                angle += state.bg_rotation_speed
-                if angle >= 360:
-                    angle -= 360
-
-                rad = angle * 3.14159 / 180.0
-
-                scale_val = state.bg_rotation_scale
-
-                # Apply to both
-                bg_image_control.rotate.angle = rad
-                bg_image_control.scale.scale = scale_val
-
-                default_bg_container.rotate.angle = rad
-                default_bg_container.scale.scale = scale_val
-
-                try:
-                    if bg_image_control.page and bg_image_control.visible:
-                        bg_image_control.update()
-                    if default_bg_container.page and default_bg_container.visible:
-                        default_bg_container.update()
-                except Exception:
-                    pass
-                time.sleep(0.05)
-            else:
-                # Reset if needed
-                if bg_image_control.scale.scale != 1:
-                    bg_image_control.rotate.angle = 0
-                    bg_image_control.scale.scale = 1
-                    default_bg_container.rotate.angle = 0
-                    default_bg_container.scale.scale = 1
-                    try:
-                        if bg_image_control.page:
-                            bg_image_control.update()
-                        if default_bg_container.page:
-                            default_bg_container.update()
-                    except Exception:
-                        pass
-                time.sleep(1.0)
-
-    threading.Thread(target=rotation_loop, daemon=True).start()
+    rotation_angle = [0.0]
+
+    def rotation_step(timer):
+        # Returns the delay until the next step
+        if state.bg_rotation:
+            rotation_angle[0] += state.bg_rotation_speed
+            if rotation_angle[0] >= 360:
+                rotation_angle[0] -= 360
+
+            rad = rotation_angle[0] * 3.14159 / 180.0
+
+            scale_val = state.bg_rotation_scale
+
+            # Apply to both
+            bg_image_control.rotate.angle = rad
+            bg_image_control.scale.scale = scale_val
+
+            default_bg_container.rotate.angle = rad
+            default_bg_container.scale.scale = scale_val
+
+            if bg_image_control.visible:
+                ticker.update(bg_image_control)
+            if default_bg_container.visible:
+                ticker.update(default_bg_container)
+            return 0.05
+
+        # Reset if needed
+        if bg_image_control.scale.scale != 1:
+            bg_image_control.rotate.angle = 0
+            bg_image_control.scale.scale = 1
+            default_bg_container.rotate.angle = 0
+            default_bg_container.scale.scale = 1
+            ticker.update(bg_image_control, default_bg_container)
+        return 1.0
+
+    ticker.every(0.05, rotation_step)
+
+    # Periodic UI work stops while the window is hidden or minimised
+    def handle_lifecycle_change(e):
+        if e.data in ("hide", "pause", "detach"):
+            ticker.pause()
+        elif e.data in ("show", "resume"):
+            ticker.resume()
+
+    def handle_window_event(e):
+        if e.data == "minimize":
+            ticker.pause()
+        elif e.data == "restore":
+            ticker.resume()
+
+    page.on_app_lifecycle_state_change = handle_lifecycle_change
+    page.on_window_event = handle_window_event
 
     # Main Page Layout
     # Use a Stack to layer background, main content, and floating nav/overlays
@@ -2225,6 +2469,7 @@ def main(page: ft.Page):
 
     # Initial Route
     on_nav_change(0)
+    startup_tasks.run()
 
 
 if __name__ == "__main__":
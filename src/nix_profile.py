@@ -0,0 +1,314 @@
+import json
+import os
+import re
+import time
+import threading
+import subprocess
+from constants import PROFILE_CACHE_FILE
+from persistence import atomic_write_json
+from ticker import ticker
+from async_core import core
+
+# --- Nix Profile Snapshot ---
+# `nix profile list --json` is run in one place and parsed once into
+# ProfileElement objects. State (installed_items, tracking reconcile) and the
+# Installed view both read the same snapshot instead of spawning the command
+# themselves. Call invalidate() after anything that changes the profile.
+# The last listing is also kept on disk, so the next launch can show what's
+# installed before its own scan has finished (load_cached).
+
+# Profile symlinks, old and new (XDG) locations
+PROFILE_LINKS = [
+    "~/.nix-profile",
+    "~/.local/state/nix/profiles/profile",
+    "/nix/var/nix/profiles/per-user/{user}/profile",
+]
+
+# How often the profile links are stat'ed for changes
+PROFILE_STAT_INTERVAL = 2
+# Cap for the polling fallback backoff (multiples of the base interval)
+PROFILE_MAX_BACKOFF = 32
+
+_version_regex = re.compile(r"-(\d+(\.\d+)*[a-zA-Z0-9_\.]*)$")
+
+
+def _strip_hash(store_path):
+    basename = os.path.basename(store_path)
+    # Remove hash (32 chars) + dash = 33 chars
+    if len(basename) > 33 and basename[32] == "-":
+        return basename[33:]
+    return basename
+
+
+def parse_store_paths(store_paths):
+    # Returns (store_path, name, version) for the path that looks most like the
+    # package main output. Usually it ends with the version number.
+    for path in store_paths:
+        rest = _strip_hash(path)
+        match = _version_regex.search(rest)
+        if match:
+            return path, rest[: match.start()], match.group(1)
+
+    # Fallback to the first path if no clear version found
+    path = store_paths[0]
+    rest = _strip_hash(path)
+    match = re.search(r"-(\d)", rest)
+    if match:
+        return path, rest[: match.start()], rest[match.start() + 1 :]
+    return path, rest, "?"
+
+
+def profile_fingerprint():
+    # Each profile generation is a new symlink target with its own manifest, so
+    # the resolved links plus manifest mtimes change whenever the profile does.
+    # Returns None when no profile link can be found.
+    user = os.environ.get("USER", "")
+    fingerprint = []
+    for link in PROFILE_LINKS:
+        path = os.path.expanduser(link.format(user=user))
+        if not os.path.lexists(path):
+            continue
+        target = os.path.realpath(path)
+        try:
+            manifest_mtime = os.stat(os.path.join(target, "manifest.json")).st_mtime_ns
+        except OSError:
+            manifest_mtime = None
+        fingerprint.append((path, target, manifest_mtime))
+    return tuple(fingerprint) or None
+
+
+class ProfileElement:
+    def __init__(self, key, attr_path, original_url, store_paths):
+        self.key = key
+        self.attr_path = attr_path
+        self.original_url = original_url
+        self.store_paths = store_paths
+        self.store_path, self.name, self.version = parse_store_paths(store_paths)
+
+    @classmethod
+    def from_json(cls, key, info):
+        store_paths = info.get("storePaths", [])
+        if not store_paths:
+            return None
+        return cls(
+            key,
+            info.get("attrPath", "") or "",
+            info.get("originalUrl", "") or "",
+            store_paths,
+        )
+
+
+class ProfileSnapshot:
+    def __init__(self, elements, taken_at=None, fingerprint=None, started_at=None):
+        self.elements = elements
+        self.taken_at = taken_at or time.time()
+        # When the listing command started: changes made after that may be
+        # missing from this snapshot
+        self.started_at = started_at or self.taken_at
+        # profile_fingerprint() as of just before the command ran
+        self.fingerprint = fingerprint
+
+    def __len__(self):
+        return len(self.elements)
+
+    @property
+    def age(self):
+        return time.time() - self.taken_at
+
+    def installed_items(self):
+        # pname -> list of {'key', 'attrPath', 'version'} (AppState.installed_items)
+        items = {}
+        for element in self.elements:
+            items.setdefault(element.name, []).append(
+                {
+                    "key": element.key,
+                    "attrPath": element.attr_path,
+                    "version": element.version,
+                }
+            )
+        return items
+
+    def signature(self):
+        return frozenset((e.key, tuple(e.store_paths)) for e in self.elements)
+
+    @classmethod
+    def from_json(cls, data):
+        elements = []
+        for key, info in data.get("elements", {}).items():
+            element = ProfileElement.from_json(key, info)
+            if element is not None:
+                elements.append(element)
+        return cls(elements)
+
+
+class ProfileDiff:
+    def __init__(self, added, removed, changed):
+        self.added = added  # [ProfileElement]
+        self.removed = removed  # [ProfileElement]
+        self.changed = changed  # [(old ProfileElement, new ProfileElement)]
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def affected_names(self):
+        names = {e.name for e in self.added}
+        names.update(e.name for e in self.removed)
+        for old, new in self.changed:
+            names.add(old.name)
+            names.add(new.name)
+        return names
+
+
+def diff_snapshots(old, new):
+    # Elements are matched by their profile key; a different set of store
+    # paths under the same key means it was upgraded or rebuilt.
+    old_by_key = {e.key: e for e in old.elements} if old else {}
+    new_by_key = {e.key: e for e in new.elements} if new else {}
+
+    added = [e for key, e in new_by_key.items() if key not in old_by_key]
+    removed = [e for key, e in old_by_key.items() if key not in new_by_key]
+    changed = [
+        (old_by_key[key], e)
+        for key, e in new_by_key.items()
+        if key in old_by_key and old_by_key[key].store_paths != e.store_paths
+    ]
+    return ProfileDiff(added, removed, changed)
+
+
+class ProfileService:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._snapshot = None
+
+    @property
+    def current(self):
+        return self._snapshot
+
+    def get(self, max_age=None):
+        # Cached snapshot if there is one (and it's young enough), else a fresh one
+        snapshot = self._snapshot
+        if snapshot is not None and (max_age is None or snapshot.age <= max_age):
+            return snapshot
+        return self.refresh()
+
+    def refresh(self):
+        requested_at = time.time()
+        with self._lock:
+            # Someone else ran the command while we waited: reuse it, but only
+            # if it started after we asked, or it may predate our change
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.started_at >= requested_at:
+                return snapshot
+
+            snapshot = self._load()
+            if snapshot is not None:
+                self._snapshot = snapshot
+            return snapshot
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def load_cached(self):
+        # Snapshot of the previous session's last scan, or None
+        try:
+            with open(PROFILE_CACHE_FILE, "r") as f:
+                snapshot = ProfileSnapshot.from_json(json.load(f))
+            snapshot.taken_at = os.path.getmtime(PROFILE_CACHE_FILE)
+            snapshot.started_at = snapshot.taken_at
+            return snapshot
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Error loading cached nix profile: {e}")
+            return None
+
+    def _load(self):
+        try:
+            started_at = time.time()
+            fingerprint = profile_fingerprint()
+            result = subprocess.run(
+                ["nix", "profile", "list", "--json"],
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+            )
+            if result.returncode != 0:
+                print(f"Error listing nix profile: {result.stderr.strip()}")
+                return None
+            data = json.loads(result.stdout)
+            snapshot = ProfileSnapshot.from_json(data)
+            snapshot.fingerprint = fingerprint
+            snapshot.started_at = started_at
+            try:
+                atomic_write_json(PROFILE_CACHE_FILE, data)
+            except Exception as e:
+                print(f"Error caching nix profile: {e}")
+            return snapshot
+        except Exception as e:
+            print(f"Error listing nix profile: {e}")
+            return None
+
+
+profile_service = ProfileService()
+
+
+class ProfileWatcher:
+    # Calls on_change() when the profile changes. Normally that is detected by
+    # stat'ing the profile links; if there are none to stat, on_change() is
+    # polled instead, backing off exponentially while nothing changes.
+    # Checks are started by a ticker timer (so they pause with the window) and
+    # run on the blocking pool, one at a time, since on_change() lists the
+    # profile.
+    def __init__(self, service, on_change, is_enabled, poll_interval):
+        self.service = service
+        self.on_change = on_change
+        self.is_enabled = is_enabled
+        self.poll_interval = poll_interval  # callable, seconds
+
+        self.backoff = 1
+        self._last_fingerprint = None
+        self._next_poll = 0
+        self._checking = False
+
+    def start(self):
+        return ticker.every(PROFILE_STAT_INTERVAL, self._tick)
+
+    def _tick(self, timer):
+        if self._checking or not self.is_enabled():
+            return
+        self._checking = True
+        core.run_blocking(self._run_check)
+
+    def _run_check(self):
+        try:
+            self.check()
+        except Exception as e:
+            print(f"Error watching nix profile: {e}")
+        finally:
+            self._checking = False
+
+    def check(self):
+        fingerprint = profile_fingerprint()
+        if fingerprint is not None:
+            if fingerprint == self._last_fingerprint:
+                return
+            self._last_fingerprint = fingerprint
+            snapshot = self.service.current
+            # Changes made from the app were already reloaded
+            if snapshot is None or snapshot.fingerprint != fingerprint:
+                self.on_change()
+            return
+
+        # Fallback: nothing to stat, poll with backoff
+        now = time.time()
+        if now < self._next_poll:
+            return
+        before = self.service.current
+        self.on_change()
+        after = self.service.current
+        if before is not None and after is not None:
+            changed = before.signature() != after.signature()
+        else:
+            changed = before is not after
+        self.backoff = 1 if changed else min(self.backoff * 2, PROFILE_MAX_BACKOFF)
+        self._next_poll = now + max(1, self.poll_interval()) * self.backoff
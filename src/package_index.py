@@ -0,0 +1,327 @@
+import json
+import os
+import re
+import bisect
+import datetime
+import subprocess
+import threading
+from pathlib import Path
+from constants import INDEX_DIR
+from package_record import to_records
+
+# --- Offline Package Index ---
+# A local, per-channel copy of the package set so searches can be answered
+# without talking to search.nixos.org. The index is built from a dump
+# (`nix search --json`, a channel `packages.json`, or a fixture list of
+# search hits) and kept on disk under INDEX_DIR.
+
+# Field weights loosely follow the boosts used by the remote query
+FIELD_WEIGHTS = {"attr": 9.0, "programs": 9.0, "pname": 6.0, "desc": 1.3}
+PREFIX_FACTOR = 0.6
+WILDCARD_SCORE = 2.0
+
+_token_regex = re.compile(r"[a-z0-9]+")
+
+
+def _tokenize(text):
+    if not text:
+        return []
+    return _token_regex.findall(text.lower())
+
+
+def _as_list(value):
+    if not value:
+        return []
+    if isinstance(value, list):
+        return value
+    return [value]
+
+
+def _license_names(license_value):
+    names = []
+    for lic in _as_list(license_value):
+        if isinstance(lic, dict):
+            name = lic.get("spdxId") or lic.get("shortName") or lic.get("fullName")
+            if name:
+                names.append(name)
+        elif lic:
+            names.append(str(lic))
+    return names
+
+
+def _attr_set_for(attr_name):
+    parts = attr_name.split(".")
+    if len(parts) > 1:
+        return parts[0]
+    return "No package set"
+
+
+def index_path(channel):
+    safe_name = re.sub(r"[^\w\.\-]", "_", channel)
+    return os.path.join(INDEX_DIR, f"{safe_name}.json")
+
+
+def normalize_dump(data):
+    # Accepts the different dump formats and returns a list of package dicts
+    # shaped like the `_source` of a remote search hit.
+    packages = []
+
+    if isinstance(data, dict) and "packages" in data:
+        # Channel packages.json: {"version": 2, "packages": {attr: {...}}}
+        # or a fixture wrapper: {"packages": [hit, hit, ...]}
+        data = data["packages"]
+
+    if isinstance(data, list):
+        for hit in data:
+            if isinstance(hit, dict) and "_source" in hit:
+                hit = hit["_source"]
+            if isinstance(hit, dict) and hit.get("package_attr_name"):
+                packages.append(hit)
+        return packages
+
+    if not isinstance(data, dict):
+        return packages
+
+    for attr, info in data.items():
+        if not isinstance(info, dict):
+            continue
+
+        # `nix search --json` keys look like legacyPackages.<system>.<attr>
+        parts = attr.split(".")
+        if len(parts) > 2 and parts[0] in ("legacyPackages", "packages"):
+            attr = ".".join(parts[2:])
+
+        meta = info.get("meta", {}) or {}
+        description = info.get("description") or meta.get("description") or ""
+        programs = info.get("programs") or _as_list(meta.get("mainProgram"))
+
+        packages.append(
+            {
+                "package_attr_name": attr,
+                "package_attr_set": _attr_set_for(attr),
+                "package_pname": info.get("pname") or attr.split(".")[-1],
+                "package_pversion": info.get("version", ""),
+                "package_description": description,
+                "package_longDescription": meta.get("longDescription", ""),
+                "package_homepage": _as_list(meta.get("homepage")),
+                "package_license_set": _license_names(meta.get("license")),
+                "package_programs": _as_list(programs),
+                "package_position": meta.get("position", ""),
+            }
+        )
+    return packages
+
+
+class PackageIndex:
+    def __init__(self, channel, packages, built_at=None, source=None):
+        self.channel = channel
+        self.packages = to_records(packages)
+        self.built_at = built_at or datetime.datetime.now().isoformat()
+        self.source = source
+
+        # field -> token -> set(doc ids)
+        self.postings = {field: {} for field in FIELD_WEIGHTS}
+        # field -> sorted list of tokens (for prefix lookups)
+        self.vocabulary = {}
+        self.attr_names_lower = []
+        self.exact_attr = {}
+
+        self._build()
+
+    def __len__(self):
+        return len(self.packages)
+
+    def _add_tokens(self, field, tokens, doc_id):
+        postings = self.postings[field]
+        for token in tokens:
+            docs = postings.get(token)
+            if docs is None:
+                postings[token] = {doc_id}
+            else:
+                docs.add(doc_id)
+
+    def _build(self):
+        for doc_id, pkg in enumerate(self.packages):
+            attr_lower = pkg.get("package_attr_name", "").lower()
+            self.attr_names_lower.append(attr_lower)
+            self.exact_attr.setdefault(attr_lower, doc_id)
+
+            self._add_tokens("attr", _tokenize(attr_lower) + [attr_lower], doc_id)
+
+            pname_lower = (pkg.get("package_pname") or "").lower()
+            self._add_tokens("pname", _tokenize(pname_lower) + [pname_lower], doc_id)
+
+            programs = [p.lower() for p in pkg.get("package_programs") or []]
+            self._add_tokens("programs", programs, doc_id)
+
+            self._add_tokens("desc", _tokenize(pkg.get("package_description")), doc_id)
+
+        for field, postings in self.postings.items():
+            self.vocabulary[field] = sorted(postings)
+
+    def _prefix_tokens(self, field, term):
+        vocab = self.vocabulary[field]
+        start = bisect.bisect_left(vocab, term)
+        end = bisect.bisect_left(vocab, term + "\uffff")
+        return vocab[start:end]
+
+    def _term_scores(self, term):
+        # Returns doc id -> best score for a single query term across fields
+        scores = {}
+        for field, weight in FIELD_WEIGHTS.items():
+            postings = self.postings[field]
+            for token in self._prefix_tokens(field, term):
+                score = weight if token == term else weight * PREFIX_FACTOR
+                for doc_id in postings[token]:
+                    if score > scores.get(doc_id, 0):
+                        scores[doc_id] = score
+        return scores
+
+    def search(self, query, limit=20, offset=0):
+        query = (query or "").strip().lower()
+        if not query:
+            return []
+
+        terms = query.split()
+        combined = None
+        for term in terms:
+            # A term can span token boundaries (e.g. "python3packages.req"),
+            # so fall back to its sub tokens when it has no direct match.
+            term_scores = self._term_scores(term)
+            if not term_scores:
+                sub_tokens = _tokenize(term)
+                if len(sub_tokens) > 1:
+                    term_scores = self._term_scores(sub_tokens[-1])
+                    for sub in sub_tokens[:-1]:
+                        sub_scores = self._term_scores(sub)
+                        term_scores = {
+                            d: s + sub_scores[d]
+                            for d, s in term_scores.items()
+                            if d in sub_scores
+                        }
+
+            if combined is None:
+                combined = term_scores
+            else:
+                combined = {
+                    d: s + term_scores[d]
+                    for d, s in combined.items()
+                    if d in term_scores
+                }
+            if not combined:
+                break
+
+        combined = combined or {}
+
+        # Wildcard *query* on the attribute name, like the remote query does
+        for doc_id, attr_lower in enumerate(self.attr_names_lower):
+            if query in attr_lower:
+                combined[doc_id] = combined.get(doc_id, 0) + WILDCARD_SCORE
+
+        exact_id = self.exact_attr.get(query)
+        if exact_id is not None:
+            combined[exact_id] = combined.get(exact_id, 0) + 100
+
+        ranked = sorted(
+            combined.items(),
+            key=lambda x: (-x[1], len(self.attr_names_lower[x[0]]), x[0]),
+        )
+        return [self.packages[d] for d, _ in ranked[offset : offset + limit]]
+
+    def to_dict(self):
+        return {
+            "channel": self.channel,
+            "built_at": self.built_at,
+            "source": self.source,
+            "packages": [pkg.to_dict() for pkg in self.packages],
+        }
+
+    def save(self):
+        try:
+            Path(INDEX_DIR).mkdir(parents=True, exist_ok=True)
+            path = index_path(self.channel)
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.to_dict(), f)
+            os.replace(tmp_path, path)
+        except Exception as e:
+            print(f"Error saving package index: {e}")
+
+    @classmethod
+    def load(cls, channel):
+        path = index_path(channel)
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+            return cls(
+                channel,
+                data.get("packages", []),
+                built_at=data.get("built_at"),
+                source=data.get("source"),
+            )
+        except Exception as e:
+            print(f"Error loading package index: {e}")
+            return None
+
+
+# --- Loaded Index Registry ---
+_loaded_indexes = {}
+_missing_channels = set()
+_index_lock = threading.Lock()
+
+
+def get_index(channel):
+    with _index_lock:
+        if channel in _loaded_indexes:
+            return _loaded_indexes[channel]
+        if channel in _missing_channels:
+            return None
+        index = PackageIndex.load(channel)
+        if index is None:
+            _missing_channels.add(channel)
+        else:
+            _loaded_indexes[channel] = index
+        return index
+
+
+def _install_index(index):
+    index.save()
+    with _index_lock:
+        _loaded_indexes[index.channel] = index
+        _missing_channels.discard(index.channel)
+    return index
+
+
+def build_index_from_file(channel, dump_path):
+    with open(os.path.expanduser(dump_path), "r") as f:
+        data = json.load(f)
+    packages = normalize_dump(data)
+    if not packages:
+        raise ValueError(f"No packages found in {dump_path}")
+    return _install_index(PackageIndex(channel, packages, source=dump_path))
+
+
+def refresh_index(channel):
+    # Uses `nix search` (which fetches the channel remotely) to rebuild the dump
+    result = subprocess.run(
+        ["nix", "search", f"nixpkgs/{channel}", "^", "--json"],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        check=True,
+    )
+    packages = normalize_dump(json.loads(result.stdout))
+    if not packages:
+        raise ValueError(f"nix search returned no packages for {channel}")
+    return _install_index(PackageIndex(channel, packages, source="nix search"))
+
+
+def delete_index(channel):
+    path = index_path(channel)
+    with _index_lock:
+        _loaded_indexes.pop(channel, None)
+        _missing_channels.add(channel)
+    if os.path.exists(path):
+        os.remove(path)
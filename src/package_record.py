@@ -0,0 +1,122 @@
+import sys
+
+# --- Package Records ---
+# Search hits, installed elements and collection entries are carried around as
+# PackageRecord instead of raw `_source` dicts. A record keeps only the fields
+# the UI reads, in slots, and can't be changed after creation, so one instance
+# can be shared by the search results, the cart, favourites and lists.
+# Repeated strings (package sets, licenses, long descriptions) are interned.
+# Records still answer `.get("package_pname")` etc. so code written against
+# the dicts keeps working.
+
+# dict key -> slot name
+FIELDS = {
+    "package_attr_name": "attr_name",
+    "package_attr_set": "attr_set",
+    "package_pname": "pname",
+    "package_pversion": "pversion",
+    "package_description": "description",
+    "package_longDescription": "long_description",
+    "package_homepage": "homepage",
+    "package_license_set": "license_set",
+    "package_programs": "programs",
+    "package_position": "position",
+    "package_element_name": "element_name",
+    "is_installed": "is_installed",
+    "is_all_might": "is_all_might",
+}
+
+INTERNED_FIELDS = {"attr_set", "long_description", "position"}
+LIST_FIELDS = {"homepage", "license_set", "programs"}
+
+_MISSING = object()
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class PackageRecord:
+    __slots__ = tuple(FIELDS.values())
+
+    def __init__(self, **values):
+        for slot in self.__slots__:
+            value = values.get(slot, _MISSING)
+            if value is not _MISSING:
+                if slot in INTERNED_FIELDS:
+                    value = _intern(value)
+                elif slot in LIST_FIELDS and isinstance(value, list):
+                    value = tuple(_intern(v) for v in value)
+            object.__setattr__(self, slot, value)
+
+    @classmethod
+    def from_dict(cls, data):
+        if isinstance(data, PackageRecord):
+            return data
+        return cls(**{FIELDS[k]: v for k, v in data.items() if k in FIELDS})
+
+    def __setattr__(self, name, value):
+        raise AttributeError("PackageRecord is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("PackageRecord is immutable")
+
+    def replace(self, **changes):
+        # changes use dict keys, e.g. replace(package_description="...")
+        data = self.to_dict()
+        data.update(changes)
+        return PackageRecord.from_dict(data)
+
+    # --- Mapping-like access ---
+    def get(self, key, default=None):
+        slot = FIELDS.get(key)
+        if slot is None:
+            return default
+        value = getattr(self, slot)
+        return default if value is _MISSING else value
+
+    def __getitem__(self, key):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def keys(self):
+        return [key for key in FIELDS if key in self]
+
+    def __iter__(self):
+        return iter(self.keys())
+
+    def items(self):
+        return [(key, self[key]) for key in self.keys()]
+
+    def to_dict(self):
+        data = {}
+        for key, slot in FIELDS.items():
+            value = getattr(self, slot)
+            if value is _MISSING:
+                continue
+            data[key] = list(value) if isinstance(value, tuple) else value
+        return data
+
+    def __repr__(self):
+        return f"PackageRecord({self.get('package_attr_name')!r}, {self.get('package_pversion')!r})"
+
+
+def to_records(packages):
+    # Error entries ({"error": ...}) are passed through unchanged
+    return [
+        p
+        if isinstance(p, PackageRecord) or "error" in p
+        else PackageRecord.from_dict(p)
+        for p in packages
+    ]
+
+
+def package_to_dict(package):
+    if isinstance(package, PackageRecord):
+        return package.to_dict()
+    return dict(package)
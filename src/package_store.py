@@ -0,0 +1,78 @@
+# --- Package Metadata Store ---
+# Search hits are kept once, keyed by (attr_name, channel, version). The cart,
+# favourites, saved lists, history and tracked installs persist only that key
+# (the "ref") and, in memory, share the single PackageRecord stored here
+# instead of each holding its own copy of the package.
+
+from package_record import PackageRecord
+
+
+def package_ref(package, channel):
+    attr_name = package.get("package_attr_name") or package.get("package_pname") or ""
+    version = package.get("package_pversion") or ""
+    return f"{attr_name}::{channel}::{version}"
+
+
+class PackageStore:
+    def __init__(self):
+        self.packages = {}  # ref -> PackageRecord
+        self.loaded = False
+        self.dirty = False  # entries added or dropped since the last save
+
+    def load(self, packages):
+        # Entries interned before the store was loaded take precedence
+        for ref, package in packages.items():
+            if ref not in self.packages:
+                self.packages[ref] = PackageRecord.from_dict(package)
+        self.loaded = True
+
+    def intern(self, package, channel):
+        # Returns (ref, shared PackageRecord)
+        ref = package_ref(package, channel)
+        existing = self.packages.get(ref)
+        if existing is None:
+            existing = PackageRecord.from_dict(package)
+            self.packages[ref] = existing
+            self.dirty = True
+        return ref, existing
+
+    def get(self, ref):
+        return self.packages.get(ref)
+
+    def to_json(self):
+        return {ref: package.to_dict() for ref, package in self.packages.items()}
+
+    def pack_items(self, items):
+        # [{"package": record, "channel": ch}] -> [{"ref": ref, "channel": ch}]
+        return [
+            {
+                "ref": package_ref(item["package"], item["channel"]),
+                "channel": item["channel"],
+            }
+            for item in items
+        ]
+
+    def unpack_items(self, raw_items):
+        # Accepts refs as well as entries still carrying the full package
+        # (files written before the store existed)
+        items = []
+        for raw in raw_items:
+            channel = raw.get("channel")
+            if "package" in raw:
+                _, package = self.intern(raw["package"], channel)
+            else:
+                package = self.packages.get(raw.get("ref"))
+                if package is None:
+                    print(f"Missing package metadata for {raw.get('ref')}")
+                    continue
+            items.append({"package": package, "channel": channel})
+        return items
+
+    def prune(self, live_refs):
+        # Drops entries nothing refers to anymore; returns the dropped refs
+        dead = [ref for ref in self.packages if ref not in live_refs]
+        for ref in dead:
+            del self.packages[ref]
+        if dead:
+            self.dirty = True
+        return dead
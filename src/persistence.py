@@ -0,0 +1,142 @@
+import os
+import json
+import atexit
+import threading
+import time
+from pathlib import Path
+
+# --- Debounced Atomic Writes ---
+# Settings are saved on almost every UI change. Instead of rewriting the file
+# synchronously each time, callers hand the latest data to a DebouncedWriter
+# which waits for the burst to settle and then writes it once, atomically,
+# from a background thread. Each save restarts the wait, but a busy stream of
+# saves is still written at least every MAX_WRITE_DELAY seconds. Pending
+# writes are flushed at interpreter exit.
+# JsonStore wraps one writer per file so each part of the state is persisted
+# on its own. A store can require others: their pending writes land first, so
+# a file never refers to data that hasn't been written yet.
+
+DEFAULT_WRITE_DELAY = 0.5  # seconds
+MAX_WRITE_DELAY = 5  # seconds
+
+
+def atomic_write_json(path, data, indent=None, default=None):
+    # Write to a temp file in the same directory, fsync it, then rename over
+    # the target so a crash leaves either the old or the new file, never half.
+    directory = os.path.dirname(path)
+    if directory:
+        Path(directory).mkdir(parents=True, exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=indent, default=default)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class DebouncedWriter:
+    def __init__(
+        self,
+        path,
+        delay=DEFAULT_WRITE_DELAY,
+        indent=None,
+        requires=(),
+        max_delay=MAX_WRITE_DELAY,
+        default=None,
+    ):
+        self.path = path
+        self.delay = delay
+        self.max_delay = max(delay, max_delay)
+        self.indent = indent
+        self.default = default  # json.dump hook for non-JSON values
+        self.requires = list(requires)  # writers flushed before this one
+
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending = None
+        self._has_pending = False
+        self._timer = None
+        self._first_pending = None  # when the oldest unwritten change came in
+
+        _writers.append(self)
+
+    def schedule(self, data):
+        # data must not be mutated by the caller afterwards (pass a copy)
+        with self._lock:
+            self._pending = data
+            self._has_pending = True
+            now = time.monotonic()
+            if self._first_pending is None:
+                self._first_pending = now
+            # Restart the wait, but don't hold the data back past max_delay
+            delay = min(self.delay, self._first_pending + self.max_delay - now)
+            if self._timer is not None:
+                self._timer.cancel()
+            self._timer = threading.Timer(max(0, delay), self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        for writer in self.requires:
+            writer.flush()
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                self._first_pending = None
+                if not self._has_pending:
+                    return
+                data = self._pending
+                self._pending = None
+                self._has_pending = False
+            try:
+                atomic_write_json(
+                    self.path, data, indent=self.indent, default=self.default
+                )
+            except Exception as e:
+                print(f"Error writing {self.path}: {e}")
+
+
+class JsonStore:
+    # One independently persisted part of the app state. The file is only read
+    # when the data is first needed, and only written when save() is called
+    # for this store.
+    def __init__(
+        self, path, default=dict, delay=DEFAULT_WRITE_DELAY, indent=None, requires=()
+    ):
+        self.path = path
+        self.default = default  # factory for the empty value
+        self.writer = DebouncedWriter(
+            path,
+            delay=delay,
+            indent=indent,
+            requires=[store.writer for store in requires],
+        )
+
+    def exists(self):
+        return os.path.exists(self.path)
+
+    def load(self):
+        if not os.path.exists(self.path):
+            return self.default()
+        try:
+            with open(self.path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"Error loading {self.path}: {e}")
+            return self.default()
+
+    def save(self, data):
+        self.writer.schedule(data)
+
+
+_writers = []
+
+
+def flush_all():
+    for writer in list(_writers):
+        writer.flush()
+
+
+atexit.register(flush_all)
@@ -1,24 +1,60 @@
 import flet as ft
-import subprocess
+import os
+import asyncio
 import threading
 import shlex
 import uuid
 import time
+from collections import deque
+from pathlib import Path
 from state import state
+from constants import LOGS_DIR
+from job_scheduler import job_scheduler, job_kind_for, install_targets, INSTALL, READ
+from async_core import core
+from ticker import ticker
+
+# Only the most recent lines are kept in memory; the full output of every
+# process is streamed to LOGS_DIR/<id>.log and processes.json only stores
+# the path to it.
+LOG_BUFFER_LINES = 500
+
+# New output is queued and pushed to an open dialog at most LOG_UI_FPS times a
+# second, in one update per batch. The dialog shows at most LOG_BUFFER_LINES
+# lines; older ones are dropped from the view (they stay in the log file).
+LOG_UI_FPS = 10
+
+# How often the bulk overview re-reads the status of its jobs
+BULK_STATUS_INTERVAL = 0.5
+
+job_scheduler.configure(max_parallel=state.max_parallel_jobs)
 
 
 class ProcessView:
-    def __init__(self, title, cmd, on_complete=None):
+    def __init__(self, title, cmd, on_complete=None, kind=None):
         self.id = str(uuid.uuid4())
         self.created_at = time.time()
         self.title = title
         self.cmd = cmd
         self.on_complete = on_complete
 
+        # Scheduling (see job_scheduler)
+        self.kind = kind or job_kind_for(cmd)
+        self.targets = install_targets(cmd) if self.kind == INSTALL else []
+        self.leader = None  # job whose process also runs this one
+        self.followers = []  # jobs merged into this one's process
+        self.mergeable = True
+
         self.status = "Pending"
-        self.logs = []
+        self.logs = deque(maxlen=LOG_BUFFER_LINES)
+        self.log_path = os.path.join(LOGS_DIR, f"{self.id}.log")
+        self.log_line_count = 0
+        self._log_file = None
+        self._log_lock = threading.Lock()
+        self._tail_loaded = True  # False for restored processes until viewed
+        self._pending_lines = deque(maxlen=LOG_BUFFER_LINES)  # (line, color)
         self.return_code = None
         self.process = None
+        self._task = None  # async_core TaskHandle of the running command
         self.is_running = False
         self.was_cancelled = False  # Track user cancellation intent
 
@@ -32,7 +68,8 @@ class ProcessView:
             "title": self.title,
             "cmd": self.cmd,
             "status": self.status,
-            "logs": self.logs,
+            "log_file": self.log_path,
+            "log_lines": self.log_line_count,
             "return_code": self.return_code,
             # We don't save is_running as True, because if we reload, it's not running anymore
             "is_running": False,
@@ -49,7 +86,17 @@ class ProcessView:
         instance.id = data.get("id", str(uuid.uuid4()))
         instance.created_at = data.get("created_at", time.time())
         instance.status = data.get("status", "Pending")
-        instance.logs = data.get("logs", [])
+        instance.log_path = data.get("log_file") or os.path.join(
+            LOGS_DIR, f"{instance.id}.log"
+        )
+        instance.log_line_count = data.get("log_lines", 0)
+        if "logs" in data:
+            # Older entries kept the whole log inline: move it to the file
+            for line in data["logs"]:
+                instance.append_log(line)
+            instance.close_log()
+        else:
+            instance._tail_loaded = False
         instance.return_code = data.get("return_code")
         instance.is_running = (
             False  # data.get("is_running", False) -> force False on load
@@ -57,23 +104,127 @@ class ProcessView:
         instance.was_cancelled = data.get("was_cancelled", False)
 
         # If it was marked running but we reloaded, it's effectively interrupted/failed
-        if data.get("is_running", False):
+        if data.get("is_running", False) or instance.status in ("Queued", "Running"):
             instance.status = "Interrupted"
-            instance.logs.append("Process interrupted by application restart.")
+            instance.load_log_tail()
+            instance.append_log("Process interrupted by application restart.")
+            instance.close_log()
 
         return instance
 
+    # --- Log Buffer ---
+    def append_log(self, line, color=None):
+        for follower in self.followers:
+            follower.append_log(line, color)
+        with self._log_lock:
+            self.logs.append(line)
+            self.log_line_count += 1
+            if self.active_ui_refs:
+                self._pending_lines.append((line, color))
+            try:
+                if self._log_file is None:
+                    Path(LOGS_DIR).mkdir(parents=True, exist_ok=True)
+                    self._log_file = open(self.log_path, "a", buffering=1)
+                self._log_file.write(line + "\n")
+            except Exception as e:
+                print(f"Error writing process log: {e}")
+
+    def close_log(self):
+        with self._log_lock:
+            if self._log_file is not None:
+                try:
+                    self._log_file.close()
+                except Exception:
+                    pass
+                self._log_file = None
+
+    def load_log_tail(self):
+        # Restored processes read the end of their log file when first shown
+        if self._tail_loaded:
+            return
+        self._tail_loaded = True
+        try:
+            if os.path.exists(self.log_path):
+                with open(self.log_path, "r", errors="replace") as f:
+                    tail = deque((line.rstrip("\n") for line in f), LOG_BUFFER_LINES)
+                tail.extend(self.logs)
+                self.logs = deque(tail, maxlen=LOG_BUFFER_LINES)
+        except Exception as e:
+            print(f"Error reading process log: {e}")
+
+    def delete_log(self):
+        self.close_log()
+        try:
+            if os.path.exists(self.log_path):
+                os.remove(self.log_path)
+        except Exception as e:
+            print(f"Error deleting process log: {e}")
+
+    # --- Log Rendering ---
+    @staticmethod
+    def _log_line_control(line, color=None):
+        if color is None and ("Cancellation requested" in line or "Error:" in line):
+            color = "red"
+        return ft.Text(line, font_family="monospace", size=12, color=color)
+
+    def _log_note_text(self):
+        if self.log_line_count > LOG_BUFFER_LINES:
+            return f"Showing the last {LOG_BUFFER_LINES} of {self.log_line_count} lines. Full log: {self.log_path}"
+        return ""
+
+    def flush_log_view(self):
+        # Push queued lines to the open dialog in a single update
+        refs = self.active_ui_refs
+        with self._log_lock:
+            lines = list(self._pending_lines)
+            self._pending_lines.clear()
+        if not lines or not refs:
+            return
+        try:
+            log_view = refs["log_view"]
+            log_view.controls.extend(
+                self._log_line_control(line, color) for line, color in lines
+            )
+            excess = len(log_view.controls) - LOG_BUFFER_LINES
+            if excess > 0:
+                del log_view.controls[:excess]
+            changed = [log_view]
+
+            note = refs["log_note"]
+            note_text = self._log_note_text()
+            if note.value != note_text:
+                note.value = note_text
+                note.visible = bool(note_text)
+                changed.append(note)
+            # Sent with the ticker's update at the end of this tick
+            ticker.update(*changed)
+        except Exception:
+            pass
+
+    def _flush_tick(self, timer):
+        # Ticker callback while the job runs; the last one flushes what's left
+        if not self.is_running:
+            timer.cancel()
+        self.flush_log_view()
+
     def _build_ui(self):
         # Create fresh controls populated with current state
-        log_view = ft.Column(scroll=ft.ScrollMode.AUTO, expand=True)
-        # Populate existing logs
-        for line in self.logs:
-            col = (
-                "red" if "Cancellation requested" in line or "Error:" in line else None
-            )
-            log_view.controls.append(
-                ft.Text(line, font_family="monospace", size=12, color=col)
-            )
+        log_view = ft.ListView(expand=True, spacing=0, auto_scroll=True)
+        self.load_log_tail()
+        with self._log_lock:
+            # Everything queued so far is already in self.logs
+            self._pending_lines.clear()
+            lines = list(self.logs)
+        log_view.controls = [self._log_line_control(line) for line in lines]
+
+        note_text = self._log_note_text()
+        log_note = ft.Text(
+            note_text,
+            size=12,
+            italic=True,
+            color="onSurfaceVariant",
+            visible=bool(note_text),
+        )
 
         status_color = ft.Colors.BLUE_200
         if self.status == "Completed":
@@ -108,6 +259,7 @@ class ProcessView:
             btn_minimize.visible = False
             btn_cancel.visible = False
             btn_close.visible = True
+        self._sync_cancel_button(btn_cancel)
 
         action_row = ft.Row(
             alignment=ft.MainAxisAlignment.END,
@@ -120,6 +272,7 @@ class ProcessView:
             content=ft.Column(
                 [
                     ft.Row([status_text, ft.Container(expand=True)]),
+                    log_note,
                     ft.Divider(height=1, color="white24"),
                     ft.Container(
                         content=log_view,
@@ -138,6 +291,7 @@ class ProcessView:
         self.active_ui_refs = {
             "content": content,
             "log_view": log_view,
+            "log_note": log_note,
             "status_text": status_text,
             "action_row": action_row,
             "btn_cancel": btn_cancel,
@@ -161,8 +315,30 @@ class ProcessView:
             self.close_dialog_func = None
         self.active_ui_refs = None  # Detach UI refs
 
+    def _sync_cancel_button(self, btn_cancel):
+        # A merged job can't be cancelled on its own (see cancel())
+        if self.leader is not None:
+            btn_cancel.disabled = True
+            btn_cancel.tooltip = (
+                f"Installed together with {self.leader.title}; "
+                "cancel that job to stop the whole batch"
+            )
+        elif btn_cancel.tooltip:
+            btn_cancel.disabled = False
+            btn_cancel.tooltip = None
+
     def cancel(self):
-        if self.process and self.is_running:
+        if self.status == "Queued" and job_scheduler.cancel(self):
+            self.was_cancelled = True
+            self.append_log("Cancelled before it started.", color="red")
+            self._finish("Cancelled")
+            state.notify_process_update()
+            return
+        if self.leader is not None:
+            # Merged jobs share one process: only the leader can stop it, and
+            # that stops the install of every package in the batch
+            return
+        if self._task is not None and self.is_running:
             self.was_cancelled = True
             # Immediate feedback via refs
             if self.active_ui_refs:
@@ -175,26 +351,9 @@ class ProcessView:
                 except Exception:
                     pass
 
-            try:
-                self.process.terminate()
-                msg = "Cancellation requested..."
-                self.logs.append(msg)
-
-                # Update UI logs
-                if self.active_ui_refs:
-                    try:
-                        refs = self.active_ui_refs
-                        txt = ft.Text(
-                            msg, color="red", font_family="monospace", size=12
-                        )
-                        refs["log_view"].controls.append(txt)
-                        if refs["log_view"].page:
-                            refs["log_view"].update()
-                    except Exception:
-                        pass
-
-            except Exception as e:
-                print(f"Error cancelling: {e}")
+            # Cancelling the task terminates the process
+            self.append_log("Cancellation requested...", color="red")
+            self._task.cancel()
 
     def update_ui_status(self):
         # Refresh UI elements if visible
@@ -211,6 +370,7 @@ class ProcessView:
                     refs["btn_minimize"].visible = False
                     refs["btn_cancel"].visible = False
                     refs["btn_close"].visible = True
+                self._sync_cancel_button(refs["btn_cancel"])
 
                 if refs["action_row"].page:
                     refs["action_row"].update()
@@ -218,7 +378,9 @@ class ProcessView:
                 # Status Text
                 color = ft.Colors.BLUE_200
                 text = "Pending..."
-                if self.is_running:
+                if self.is_running and self.status == "Queued":
+                    text = "Queued..."
+                elif self.is_running:
                     text = "Running..."
                     color = ft.Colors.BLUE_400
                 elif self.status == "Completed":
@@ -241,9 +403,9 @@ class ProcessView:
 
     def start(self):
         self.is_running = True
-        self.status = "Running"
+        self.status = "Queued"
         # Initial Log to ensure container is not empty/broken visually
-        self.logs.append("Initializing process...")
+        self.append_log("Queued...")
 
         # Register in global state
         state.add_process_view(self.id, self)
@@ -251,78 +413,201 @@ class ProcessView:
         # If UI is open (rarely happens on start, usually show then start), update it
         self.update_ui_status()
 
-        threading.Thread(target=self._run_thread, daemon=True).start()
+        ticker.every(1 / LOG_UI_FPS, self._flush_tick)
+        job_scheduler.submit(self)
+
+    def launch(self, followers=()):
+        # Called by the scheduler when it's this job's turn. Followers are
+        # queued installs merged into this job's command.
+        self.followers = list(followers)
+        self.status = "Running"
+        if self.followers:
+            targets = list(self.targets)
+            for follower in self.followers:
+                targets.extend(t for t in follower.targets if t not in targets)
+            self.cmd = f"nix profile add {' '.join(targets)}"
+        for job in [self] + self.followers:
+            job.leader = self if job is not self else None
+            job.status = "Running"
+            job.update_ui_status()
+        for follower in self.followers:
+            follower.append_log(
+                f"Installing together with {self.title}, cancel that job to "
+                "stop the combined install."
+            )
+        self.append_log(f"Running: {self.cmd}")
+        self._task = core.submit(self._run())
+
+    def _finish(self, status, return_code=None):
+        self.status = status
+        self.return_code = return_code
+        # Also called for cancelled jobs so callers can count finished jobs
+        if self.on_complete:
+            try:
+                self.on_complete(status == "Completed")
+            except Exception as e:
+                print(f"Error in on_complete: {e}")
+        self.is_running = False
+        self.close_log()
+        self.update_ui_status()
 
-    def _run_thread(self):
+    def _retry_alone(self):
+        jobs = [self] + self.followers
+        self.followers = []
+        for job in jobs:
+            job.leader = None
+            job.mergeable = False
+            job.cmd = f"nix profile add {' '.join(job.targets)}"
+            job.status = "Queued"
+            job.append_log(
+                "Combined install failed, retrying this package on its own...",
+                color="orange",
+            )
+            job.update_ui_status()
+        job_scheduler.retry_alone(jobs)
+
+    def _set_process(self, process):
+        self.process = process
+
+    async def _run(self):
+        # Runs on the async core; output lines are rendered in batches by
+        # _flush_tick
+        return_code = None
         try:
-            self.process = subprocess.Popen(
+            return_code = await core.stream_process(
                 shlex.split(self.cmd),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
+                lambda line: self.append_log(line.strip()),
+                on_start=self._set_process,
             )
 
-            if self.process.stdout:
-                for line in self.process.stdout:
-                    clean_line = line.strip()
-                    self.logs.append(clean_line)
-
-                    # Update active UI if exists
-                    if self.active_ui_refs:
-                        try:
-                            refs = self.active_ui_refs
-                            if refs["log_view"].page:
-                                refs["log_view"].controls.append(
-                                    ft.Text(
-                                        clean_line, font_family="monospace", size=12
-                                    )
-                                )
-                                refs["log_view"].update()
-                        except Exception:
-                            pass
-
-            self.process.wait()
-            self.return_code = self.process.returncode
-
             # Check logic: user explicitly cancelled OR process returned negative code (signal)
-            if self.was_cancelled or self.return_code < 0:
-                self.status = "Cancelled"
-            elif self.return_code == 0:
-                self.status = "Completed"
-                if self.on_complete:
-                    try:
-                        self.on_complete(True)
-                    except Exception as e:
-                        print(f"Error in on_complete: {e}")
+            if self.was_cancelled or return_code < 0:
+                status = "Cancelled"
+            elif return_code == 0:
+                status = "Completed"
             else:
-                self.status = "Failed"
-                if self.on_complete:
-                    try:
-                        self.on_complete(False)
-                    except Exception as e:
-                        print(f"Error in on_complete: {e}")
+                status = "Failed"
 
+        except asyncio.CancelledError:
+            status = "Cancelled"
         except Exception as e:
-            self.status = "Error"
-            self.logs.append(f"Error: {e}")
-            if self.active_ui_refs:
-                try:
-                    refs = self.active_ui_refs
-                    refs["log_view"].controls.append(
-                        ft.Text(f"Error: {e}", color="red")
-                    )
-                    if refs["log_view"].page:
-                        refs["log_view"].update()
-                except Exception:
-                    pass
+            status = "Error"
+            self.append_log(f"Error: {e}", color="red")
+
+        # Completion callbacks may block (profile refresh), keep them off the loop
+        await core.to_thread(self._complete, status, return_code)
+
+    def _complete(self, status, return_code):
+        if status == "Failed" and self.followers:
+            # One bad package fails the whole combined install, so give every
+            # package its own attempt to find out which ones work
+            self._retry_alone()
+            return
+
+        for job in self.followers:
+            job.was_cancelled = self.was_cancelled
+        if self.kind == READ or status != "Completed":
+            for job in [self] + self.followers:
+                job._finish(status, return_code)
+        else:
+            # One profile refresh for the leader; the callbacks of the merged
+            # jobs don't list the profile again
+            with state.profile_refreshed():
+                for job in [self] + self.followers:
+                    job._finish(status, return_code)
+        state.notify_process_update()
+        job_scheduler.job_finished(self)
 
-            if self.on_complete:
-                try:
-                    self.on_complete(False)
-                except Exception as ex:
-                    print(f"Error in on_complete: {ex}")
 
-        self.is_running = False
-        self.update_ui_status()
-        state.notify_process_update()
+class BulkProcessView:
+    # One dialog for a batch of jobs started together (cart / list actions):
+    # a row per job with its live status and a button to open its output.
+    # Jobs the scheduler didn't merge run one after another, so showing any
+    # single job's dialog would hide the rest.
+    def __init__(self, title, views):
+        self.title = title
+        self.views = views
+        self.close_dialog_func = None
+
+    @staticmethod
+    def _status_color(view):
+        if view.status == "Completed":
+            return ft.Colors.GREEN_400
+        if view.status == "Cancelled":
+            return ft.Colors.ORANGE_400
+        if view.status == "Running":
+            return ft.Colors.BLUE_400
+        if view.is_running:
+            return ft.Colors.BLUE_200
+        return ft.Colors.RED_400
+
+    def _summary(self):
+        finished = sum(1 for view in self.views if not view.is_running)
+        return f"{finished} of {len(self.views)} finished"
+
+    def show(self, show_dialog_func):
+        status_texts = []
+        rows = []
+        for view in self.views:
+            status_text = ft.Text(
+                view.status, size=12, color=self._status_color(view), width=90
+            )
+            status_texts.append(status_text)
+            rows.append(
+                ft.Row(
+                    [
+                        ft.Text(view.title, size=13, expand=True, no_wrap=True),
+                        status_text,
+                        ft.TextButton(
+                            "Output",
+                            on_click=lambda e, v=view: self._open(v, show_dialog_func),
+                        ),
+                    ]
+                )
+            )
+        summary = ft.Text(self._summary(), weight=ft.FontWeight.BOLD)
+        job_list = ft.ListView(controls=rows, spacing=4, expand=True)
+
+        def refresh(timer):
+            changed = []
+            for view, status_text in zip(self.views, status_texts):
+                if status_text.value != view.status:
+                    status_text.value = view.status
+                    status_text.color = self._status_color(view)
+                    changed.append(status_text)
+            if changed:
+                summary.value = self._summary()
+                ticker.update(summary, *changed)
+            if not any(view.is_running for view in self.views):
+                timer.cancel()
+
+        content = ft.Container(
+            width=600,
+            height=400,
+            content=ft.Column(
+                [
+                    summary,
+                    ft.Divider(height=1, color="white24"),
+                    job_list,
+                    ft.Divider(height=1, color="white24"),
+                    ft.Row(
+                        alignment=ft.MainAxisAlignment.END,
+                        controls=[ft.TextButton("Close", on_click=self.close)],
+                    ),
+                ]
+            ),
+        )
+        self.close_dialog_func = show_dialog_func(
+            self.title, content, [], dismissible=False
+        )
+        ticker.every(BULK_STATUS_INTERVAL, refresh, owner=job_list)
+
+    def _open(self, view, show_dialog_func):
+        # The job's own dialog replaces this one
+        self.close_dialog_func = None
+        view.show(show_dialog_func)
+
+    def close(self, e=None):
+        if self.close_dialog_func:
+            self.close_dialog_func()
+            self.close_dialog_func = None
@@ -0,0 +1,135 @@
+import json
+import os
+import time
+import threading
+from collections import OrderedDict
+from constants import SEARCH_CACHE_FILE
+from package_record import package_to_dict
+from persistence import DebouncedWriter
+
+# --- Search Result Cache ---
+# Bounded LRU cache with a per-entry TTL for execute_nix_search.
+# Keys are (query, channel, limit, offset, backend), one entry per result
+# page; backend is "offline" or "online" so toggling the offline index
+# doesn't serve results from the other one.
+# Optionally mirrored to disk so repeated searches survive an app restart; the
+# mirror goes through a DebouncedWriter, so only the latest snapshot lands.
+
+
+class SearchCache:
+    def __init__(self, max_entries=64, ttl=600, persist=False, path=SEARCH_CACHE_FILE):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.persist = persist
+        self.path = path
+
+        self.entries = OrderedDict()  # key -> (expires_at, results)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._writer = DebouncedWriter(path, default=package_to_dict)
+        self._loaded_from_disk = False
+
+    @staticmethod
+    def make_key(query, channel, limit, offset=0, backend="online"):
+        return (query.strip(), channel, int(limit), int(offset), backend)
+
+    def configure(self, max_entries=None, ttl=None, persist=None):
+        with self._lock:
+            if max_entries is not None:
+                self.max_entries = max(1, int(max_entries))
+            if ttl is not None:
+                self.ttl = max(0, int(ttl))
+            if persist is not None:
+                self.persist = persist
+            self._evict_overflow()
+
+    def get(self, key):
+        self._load_from_disk()
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, results = entry
+            if expires_at < time.time():
+                del self.entries[key]
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return results
+
+    def put(self, key, results):
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            self.entries[key] = (time.time() + self.ttl, results)
+            self.entries.move_to_end(key)
+            self._evict_overflow()
+        self._save_to_disk()
+
+    def invalidate_channel(self, channel):
+        with self._lock:
+            for key in [k for k in self.entries if k[1] == channel]:
+                del self.entries[key]
+        self._save_to_disk()
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+        self._save_to_disk()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self.entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": (self.hits / total) if total else 0.0,
+            }
+
+    def _evict_overflow(self):
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    # --- Disk Mirror ---
+    def _load_from_disk(self):
+        if self._loaded_from_disk or not self.persist:
+            return
+        self._loaded_from_disk = True
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            now = time.time()
+            with self._lock:
+                for item in data:
+                    key = tuple(item["key"])
+                    if item["expires_at"] > now and key not in self.entries:
+                        self.entries[key] = (item["expires_at"], item["results"])
+                self._evict_overflow()
+        except Exception as e:
+            print(f"Error loading search cache: {e}")
+
+    def _save_to_disk(self):
+        if not self.persist:
+            return
+        # Records are immutable, so copying the lists is enough for a snapshot
+        with self._lock:
+            data = [
+                {"key": list(key), "expires_at": expires_at, "results": list(results)}
+                for key, (expires_at, results) in self.entries.items()
+            ]
+        self._writer.schedule(data)
+
+
+search_cache = SearchCache()
@@ -0,0 +1,366 @@
+import os
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from package_store import package_ref
+from package_record import package_to_dict
+
+# --- SQLite State Store ---
+# Optional backend for AppState (settings: storage_backend = "sqlite").
+# Cart, favourites, saved lists, tracked installs and the process history
+# live in indexed tables, and every mutation touches only its own row instead
+# of rewriting a whole JSON file. WAL mode keeps writes cheap and lets reads
+# proceed while a write is in flight. Package metadata is stored once in
+# `packages`; collection rows only hold its ref (see package_store).
+
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS collection_items (
+    collection TEXT NOT NULL,
+    list_name TEXT NOT NULL DEFAULT '',
+    pkg_id TEXT NOT NULL,
+    channel TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    ref TEXT NOT NULL,
+    PRIMARY KEY (collection, list_name, pkg_id, channel)
+);
+CREATE INDEX IF NOT EXISTS collection_items_order
+    ON collection_items (collection, list_name, position);
+CREATE INDEX IF NOT EXISTS collection_items_pkg
+    ON collection_items (pkg_id, channel);
+
+CREATE TABLE IF NOT EXISTS packages (
+    ref TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS saved_lists (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS tracked_installs (
+    key TEXT PRIMARY KEY,
+    pname TEXT NOT NULL,
+    channel TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tracked_installs_pname ON tracked_installs (pname);
+
+CREATE TABLE IF NOT EXISTS processes (
+    id TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+# Collections stored in collection_items
+CART = "cart"
+FAVOURITES = "favourites"
+LIST = "list"
+
+
+class SqliteStore:
+    def __init__(self, path):
+        Path(os.path.dirname(path)).mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version == 1:
+            self._migrate_v1()
+        self._conn.executescript(SCHEMA)
+        # A fresh database still needs the JSON data imported
+        self.is_new = version == 0
+
+        self._saved_processes = {}  # id -> last written JSON text
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _write(self, statements):
+        # statements: list of (sql, params), run in one transaction
+        with self._lock:
+            with self._conn:
+                for sql, params in statements:
+                    self._conn.execute(sql, params)
+
+    def _query(self, sql, params=()):
+        with self._lock:
+            return self._conn.execute(sql, params).fetchall()
+
+    def _migrate_v1(self):
+        # v1 embedded the full package JSON in every collection row
+        with self._conn:
+            self._conn.execute("DROP INDEX IF EXISTS collection_items_order")
+            self._conn.execute("DROP INDEX IF EXISTS collection_items_pkg")
+            self._conn.execute(
+                "ALTER TABLE collection_items RENAME TO collection_items_v1"
+            )
+        self._conn.executescript(SCHEMA)
+        with self._conn:
+            rows = self._conn.execute(
+                "SELECT collection, list_name, pkg_id, channel, position, package "
+                "FROM collection_items_v1"
+            ).fetchall()
+            for collection, list_name, pkg_id, channel, position, text in rows:
+                ref = package_ref(json.loads(text), channel)
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO packages (ref, data) VALUES (?, ?)",
+                    (ref, text),
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO collection_items "
+                    "(collection, list_name, pkg_id, channel, position, ref) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (collection, list_name, pkg_id, channel, position, ref),
+                )
+            self._conn.execute("DROP TABLE collection_items_v1")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    # --- Import ---
+    def import_state(self, cart, favourites, lists, tracking, processes, packages):
+        # Replaces everything in the database with the given state
+        statements = [
+            (f"DELETE FROM {table}", ())
+            for table in (
+                "collection_items",
+                "packages",
+                "saved_lists",
+                "tracked_installs",
+                "processes",
+            )
+        ]
+        statements.extend(
+            (
+                "INSERT OR REPLACE INTO packages (ref, data) VALUES (?, ?)",
+                (ref, json.dumps(package_to_dict(package))),
+            )
+            for ref, package in packages.items()
+        )
+        for position, item in enumerate(cart):
+            statements.extend(self._insert_item(CART, "", item, position))
+        for position, item in enumerate(favourites):
+            statements.extend(self._insert_item(FAVOURITES, "", item, position))
+        for list_position, (name, items) in enumerate(lists.items()):
+            statements.append(
+                (
+                    "INSERT OR REPLACE INTO saved_lists (name, position) VALUES (?, ?)",
+                    (name, list_position),
+                )
+            )
+            for position, item in enumerate(items):
+                statements.extend(self._insert_item(LIST, name, item, position))
+        for key, info in tracking.items():
+            statements.append(self._upsert_tracking(key, info))
+        saved_processes = {}
+        for position, data in enumerate(processes):
+            text = json.dumps(data)
+            statements.append(
+                (
+                    "INSERT OR REPLACE INTO processes (id, position, data) VALUES (?, ?, ?)",
+                    (data.get("id"), position, text),
+                )
+            )
+            saved_processes[data.get("id")] = text
+        statements.append((f"PRAGMA user_version = {SCHEMA_VERSION}", ()))
+        self._write(statements)
+        self._saved_processes = saved_processes
+        self.is_new = False
+
+    # --- Collections ---
+    @staticmethod
+    def _item_key(item):
+        # Must match AppState._get_pkg_id
+        package = item["package"]
+        if "package_attr_name" in package:
+            pkg_id = package["package_attr_name"]
+        else:
+            pkg_id = f"{package.get('package_pname')}-{package.get('package_pversion')}"
+        return pkg_id, item["channel"]
+
+    @staticmethod
+    def _upsert_package(item):
+        ref = package_ref(item["package"], item["channel"])
+        return ref, (
+            "INSERT OR REPLACE INTO packages (ref, data) VALUES (?, ?)",
+            (ref, json.dumps(package_to_dict(item["package"]))),
+        )
+
+    def _insert_item(self, collection, list_name, item, position):
+        pkg_id, channel = self._item_key(item)
+        ref, package_statement = self._upsert_package(item)
+        return [
+            package_statement,
+            (
+                "INSERT OR REPLACE INTO collection_items "
+                "(collection, list_name, pkg_id, channel, position, ref) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (collection, list_name, pkg_id, channel, position, ref),
+            ),
+        ]
+
+    def load_packages(self):
+        rows = self._query("SELECT ref, data FROM packages")
+        return {ref: json.loads(data) for ref, data in rows}
+
+    def put_packages(self, items):
+        self._write([self._upsert_package(item)[1] for item in items])
+
+    def delete_packages(self, refs):
+        self._write([("DELETE FROM packages WHERE ref = ?", (ref,)) for ref in refs])
+
+    # Items come back as {"ref": ..., "channel": ...}; PackageStore resolves them
+    def load_items(self, collection, list_name=""):
+        rows = self._query(
+            "SELECT ref, channel FROM collection_items "
+            "WHERE collection = ? AND list_name = ? ORDER BY position",
+            (collection, list_name),
+        )
+        return [{"ref": r, "channel": c} for r, c in rows]
+
+    def load_lists(self):
+        lists = {
+            name: []
+            for (name,) in self._query("SELECT name FROM saved_lists ORDER BY position")
+        }
+        rows = self._query(
+            "SELECT list_name, ref, channel FROM collection_items "
+            "WHERE collection = ? ORDER BY list_name, position",
+            (LIST,),
+        )
+        for name, ref, channel in rows:
+            lists.setdefault(name, []).append({"ref": ref, "channel": channel})
+        return lists
+
+    def put_item(self, collection, item, list_name=""):
+        # Upsert one row; new rows go to the end, existing rows keep their place
+        pkg_id, channel = self._item_key(item)
+        ref, package_statement = self._upsert_package(item)
+        self._write(
+            [
+                package_statement,
+                (
+                    "INSERT INTO collection_items "
+                    "(collection, list_name, pkg_id, channel, position, ref) "
+                    "VALUES (?, ?, ?, ?, (SELECT COALESCE(MAX(position), -1) + 1 "
+                    "FROM collection_items WHERE collection = ? AND list_name = ?), ?) "
+                    "ON CONFLICT (collection, list_name, pkg_id, channel) "
+                    "DO UPDATE SET ref = excluded.ref",
+                    (
+                        collection,
+                        list_name,
+                        pkg_id,
+                        channel,
+                        collection,
+                        list_name,
+                        ref,
+                    ),
+                ),
+            ]
+        )
+
+    def delete_item(self, collection, key, list_name=""):
+        pkg_id, channel = key
+        self._write(
+            [
+                (
+                    "DELETE FROM collection_items WHERE collection = ? "
+                    "AND list_name = ? AND pkg_id = ? AND channel = ?",
+                    (collection, list_name, pkg_id, channel),
+                )
+            ]
+        )
+
+    def replace_items(self, collection, items, list_name=""):
+        statements = [
+            (
+                "DELETE FROM collection_items WHERE collection = ? AND list_name = ?",
+                (collection, list_name),
+            )
+        ]
+        if collection == LIST:
+            statements.append(
+                (
+                    "INSERT OR IGNORE INTO saved_lists (name, position) VALUES "
+                    "(?, (SELECT COALESCE(MAX(position), -1) + 1 FROM saved_lists))",
+                    (list_name,),
+                )
+            )
+        for position, item in enumerate(items):
+            statements.extend(self._insert_item(collection, list_name, item, position))
+        self._write(statements)
+
+    def delete_list(self, name):
+        self._write(
+            [
+                (
+                    "DELETE FROM collection_items WHERE collection = ? AND list_name = ?",
+                    (LIST, name),
+                ),
+                ("DELETE FROM saved_lists WHERE name = ?", (name,)),
+            ]
+        )
+
+    # --- Tracking ---
+    @staticmethod
+    def _upsert_tracking(key, info):
+        return (
+            "INSERT INTO tracked_installs (key, pname, channel, data) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET pname = excluded.pname, "
+            "channel = excluded.channel, data = excluded.data",
+            (key, info.get("pname") or "", info.get("channel"), json.dumps(info)),
+        )
+
+    def load_tracking(self):
+        rows = self._query("SELECT key, data FROM tracked_installs")
+        return {key: json.loads(data) for key, data in rows}
+
+    def put_tracking(self, key, info):
+        self._write([self._upsert_tracking(key, info)])
+
+    def delete_tracking(self, keys):
+        self._write(
+            [("DELETE FROM tracked_installs WHERE key = ?", (key,)) for key in keys]
+        )
+
+    # --- Processes ---
+    def load_processes(self):
+        rows = self._query("SELECT id, data FROM processes ORDER BY position")
+        for pid, data in rows:
+            self._saved_processes[pid] = data
+        return [json.loads(data) for _, data in rows]
+
+    def sync_processes(self, processes):
+        # processes: list of dicts (ProcessView.to_dict) in display order.
+        # Only rows whose content changed are written.
+        statements = []
+        current_ids = set()
+        for data in processes:
+            pid = data.get("id")
+            current_ids.add(pid)
+            text = json.dumps(data)
+            if self._saved_processes.get(pid) == text:
+                continue
+            statements.append(
+                (
+                    "INSERT INTO processes (id, position, data) VALUES "
+                    "(?, (SELECT COALESCE(MAX(position), -1) + 1 FROM processes), ?) "
+                    "ON CONFLICT (id) DO UPDATE SET data = excluded.data",
+                    (pid, text),
+                )
+            )
+            self._saved_processes[pid] = text
+
+        for pid in [p for p in self._saved_processes if p not in current_ids]:
+            statements.append(("DELETE FROM processes WHERE id = ?", (pid,)))
+            del self._saved_processes[pid]
+
+        if statements:
+            self._write(statements)
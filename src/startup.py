@@ -0,0 +1,44 @@
+import asyncio
+import time
+from async_core import core
+
+# --- Startup Tasks ---
+# Work that used to run before the first frame (profile scan, process
+# history, Mastodon posts, module imports for other views) is registered here
+# and started once the first screen is on the page. Tasks run in parallel on
+# the async core's pool; a task listed in another's `after` finishes before
+# that one starts. A failing task is logged and doesn't stop its dependents.
+
+
+class StartupTasks:
+    def __init__(self):
+        self._tasks = {}  # name -> (fn, after), in registration order
+        self.timings = {}  # name -> seconds
+
+    def add(self, name, fn, after=()):
+        # Dependencies must be registered first, which rules out cycles
+        for dep in after:
+            if dep not in self._tasks:
+                raise ValueError(f"Unknown startup task: {dep}")
+        self._tasks[name] = (fn, tuple(after))
+
+    def run(self):
+        return core.submit(self._run())
+
+    async def _run(self):
+        running = {}
+
+        async def run_task(name):
+            fn, after = self._tasks[name]
+            for dep in after:
+                await running[dep]
+            started = time.perf_counter()
+            try:
+                await core.to_thread(fn)
+            except Exception as e:
+                print(f"Error in startup task {name}: {e}")
+            self.timings[name] = time.perf_counter() - started
+
+        async with asyncio.TaskGroup() as group:
+            for name in self._tasks:
+                running[name] = group.create_task(run_task(name))
@@ -1,11 +1,16 @@
 import flet as ft
+import copy
 import json
 import os
 import random
 import datetime
-import subprocess
-import re
+import threading
+from contextlib import contextmanager
 from pathlib import Path
+from nix_profile import profile_service, diff_snapshots
+from persistence import JsonStore, DEFAULT_WRITE_DELAY, atomic_write_json
+from sqlite_store import SqliteStore, CART, FAVOURITES, LIST
+from package_store import PackageStore, package_ref
 from constants import (
     CARD_DEFAULTS,
     DAILY_APPS,
@@ -16,12 +21,46 @@ from constants import (
     CONFIG_DIR,
     TRACKING_FILE,
     PROCESSES_FILE,
+    PACKAGES_FILE,
+    CART_FILE,
+    FAVOURITES_FILE,
+    LISTS_FILE,
+    HISTORY_FILE,
+    MASTODON_CACHE_FILE,
+    STATE_DB_FILE,
 )
 # We can't import ProcessView here due to circular import if ProcessView imports state
 # Solution: Import ProcessView inside the method or use a registry pattern.
 # For now, we'll do local import.
 
 
+MASTODON_CACHE_KEYS = [
+    "last_fetched_quote",
+    "last_fetched_app",
+    "last_fetched_tip",
+    "last_fetched_song",
+    "default_song_cache",
+    "last_fetched_carousel",
+]
+
+# Attributes that live in their own store and are loaded on first access
+LAZY_STORE_ATTRS = {
+    "cart_items": "cart",
+    "_cart_index": "cart",
+    "favourites": "favourites",
+    "_fav_index": "favourites",
+    "saved_lists": "lists",
+    "_list_index": "lists",
+    "_pkg_lists": "lists",
+    "recent_activity": "history",
+    "search_history": "history",
+    **{key: "mastodon" for key in MASTODON_CACHE_KEYS},
+}
+
+# Stores whose items reference the package store
+COLLECTION_STORES = {"cart", "favourites", "lists", "history"}
+
+
 # --- State Management ---
 class AppState:
     def __init__(self):
@@ -35,6 +74,12 @@ class AppState:
 
         # New Features
         self.search_limit = 30
+        self.live_search = False
+        self.live_search_delay = 300  # ms after the last keystroke
+        self.use_offline_index = True
+        self.search_cache_ttl = 600
+        self.search_cache_size = 64
+        self.persist_search_cache = False
         self.background_image = None
         self.background_opacity = 0.15
         self.background_blur = 0
@@ -114,7 +159,6 @@ class AppState:
         self.quote_style_italic = True
         self.quote_style_bold = True
         self.mastodon_quote_cache = None
-        self.last_fetched_quote = None
 
         # App Settings
         self.app_use_mastodon = False
@@ -122,7 +166,6 @@ class AppState:
         self.app_mastodon_account = ""
         self.app_mastodon_tag = ""
         self.app_mastodon_cache = None
-        self.last_fetched_app = None
 
         # Tip Settings
         self.tip_use_mastodon = False
@@ -130,7 +173,6 @@ class AppState:
         self.tip_mastodon_account = ""
         self.tip_mastodon_tag = ""
         self.tip_mastodon_cache = None
-        self.last_fetched_tip = None
 
         # Song Settings
         self.song_use_mastodon = False
@@ -138,8 +180,6 @@ class AppState:
         self.song_mastodon_account = ""
         self.song_mastodon_tag = ""
         self.song_mastodon_cache = None
-        self.last_fetched_song = None
-        self.default_song_cache = None
 
         # Carousel Settings
         self.carousel_use_mastodon = True
@@ -147,7 +187,6 @@ class AppState:
         self.carousel_mastodon_account = ""
         self.carousel_mastodon_tag = ""
         self.carousel_mastodon_cache = None
-        self.last_fetched_carousel = None
 
         self.auto_refresh_ui = False
         self.auto_refresh_interval = 10
@@ -157,8 +196,6 @@ class AppState:
         self.last_daily_date = ""
 
         # History
-        self.recent_activity = []
-        self.search_history = []
         self.enable_search_history = True
         self.search_history_limit = 20
         self.max_search_suggestions = 5
@@ -166,7 +203,12 @@ class AppState:
 
         # Active Process Views (New Feature)
         self.active_process_views = {}
+        self.processes_loaded = False
+        self.max_parallel_jobs = 3  # read-only jobs running at once
         self.process_listeners = []
+        self.profile_listeners = []
+        self.profile_snapshot = None  # Last snapshot applied to installed_items
+        self._profile_refreshed = threading.local()  # see profile_refreshed()
 
         # Separate configs for Single App vs Cart
         self.shell_single_prefix = "x-terminal-emulator -e"
@@ -176,12 +218,34 @@ class AppState:
 
         self.available_channels = ["nixos-unstable", "nixos-25.11"]
         self.active_channels = ["nixos-unstable", "nixos-25.11"]
-        self.cart_items = []
-        self.favourites = []
-        self.saved_lists = {}
         self.tracked_installs = {}
 
+        # Persistence: UI config, collections, history and Mastodon caches are
+        # separate files, each written in the background only when its own
+        # data changes. Collections, history and the Mastodon caches are
+        # loaded on first access (see __getattr__), the collections together
+        # with their (pkg_id, channel) indexes.
+        self.settings_save_delay = DEFAULT_WRITE_DELAY
+        # "sqlite" keeps collections, tracking and processes in STATE_DB_FILE
+        self.storage_backend = "json"
+        self.db = None
+        # Collections reference packages by key; the metadata lives here once
+        self.package_store = PackageStore()
+        packages = JsonStore(PACKAGES_FILE)
+        self._stores = {
+            "config": JsonStore(CONFIG_FILE, indent=4),
+            "packages": packages,
+            # Collections flush packages.json before their own file, so a ref
+            # is never on disk ahead of its metadata
+            "cart": JsonStore(CART_FILE, default=list, requires=[packages]),
+            "favourites": JsonStore(FAVOURITES_FILE, default=list, requires=[packages]),
+            "lists": JsonStore(LISTS_FILE, requires=[packages]),
+            "history": JsonStore(HISTORY_FILE, requires=[packages]),
+            "mastodon": JsonStore(MASTODON_CACHE_FILE),
+        }
+
         self.load_settings()
+        self._open_database()
         self.load_tracking()
         self.update_daily_indices()
 
@@ -216,6 +280,12 @@ class AppState:
                     self.nav_badge_size = data.get("nav_badge_size", 20)
 
                     self.search_limit = data.get("search_limit", 30)
+                    self.live_search = data.get("live_search", False)
+                    self.live_search_delay = data.get("live_search_delay", 300)
+                    self.use_offline_index = data.get("use_offline_index", True)
+                    self.search_cache_ttl = data.get("search_cache_ttl", 600)
+                    self.search_cache_size = data.get("search_cache_size", 64)
+                    self.persist_search_cache = data.get("persist_search_cache", False)
                     self.background_image = data.get("background_image", None)
                     self.background_opacity = data.get("background_opacity", 0.15)
                     self.background_blur = data.get("background_blur", 0)
@@ -400,22 +470,318 @@ class AppState:
                         "shell_cart_suffix", self.shell_single_suffix
                     )
 
-                    self.cart_items = data.get("cart_items", [])
-                    self.favourites = data.get("favourites", [])
-                    self.saved_lists = data.get("saved_lists", {})
-                    self.recent_activity = data.get("recent_activity", [])
-                    self.search_history = data.get("search_history", [])
+                    self.settings_save_delay = data.get(
+                        "settings_save_delay", DEFAULT_WRITE_DELAY
+                    )
+                    for store in self._stores.values():
+                        store.writer.delay = self.settings_save_delay
+                    self.storage_backend = data.get("storage_backend", "json")
                     self.enable_search_history = data.get("enable_search_history", True)
                     self.search_history_limit = data.get("search_history_limit", 20)
                     self.max_search_suggestions = data.get("max_search_suggestions", 5)
                     self.fuzzy_search_history = data.get("fuzzy_search_history", False)
+                    self.max_parallel_jobs = data.get("max_parallel_jobs", 3)
+
+                self._migrate_legacy_stores(data)
 
             except Exception as e:
                 print(f"Error loading settings: {e}")
 
+    def _migrate_legacy_stores(self, data):
+        # Older versions kept collections, history and Mastodon caches inside
+        # settings.json. Move them to their own files once.
+        legacy = {
+            "cart": data.get("cart_items"),
+            "favourites": data.get("favourites"),
+            "lists": data.get("saved_lists"),
+            "history": None,
+            "mastodon": None,
+        }
+        if "recent_activity" in data or "search_history" in data:
+            legacy["history"] = {
+                "recent_activity": data.get("recent_activity", []),
+                "search_history": data.get("search_history", []),
+            }
+        if any(key in data for key in MASTODON_CACHE_KEYS):
+            legacy["mastodon"] = {key: data.get(key) for key in MASTODON_CACHE_KEYS}
+
+        migrated = False
+        for name, value in legacy.items():
+            store = self._stores[name]
+            if value is None or store.exists():
+                continue
+            try:
+                atomic_write_json(store.path, value)
+                migrated = True
+            except Exception as e:
+                print(f"Error migrating {name} out of settings: {e}")
+
+        if migrated:
+            # Rewrites settings.json without the moved keys
+            self.save_settings()
+
+    def _open_database(self):
+        if self.storage_backend != "sqlite":
+            return
+        try:
+            db = SqliteStore(STATE_DB_FILE)
+            if db.is_new:
+                # First start on SQLite: carry over the JSON data
+                self._ensure_packages()
+                tracking = {}
+                if os.path.exists(TRACKING_FILE):
+                    with open(TRACKING_FILE, "r") as f:
+                        tracking = json.load(f)
+                processes = []
+                if os.path.exists(PROCESSES_FILE):
+                    with open(PROCESSES_FILE, "r") as f:
+                        processes = json.load(f)
+                unpack = self.package_store.unpack_items
+                db.import_state(
+                    cart=unpack(self._stores["cart"].load()),
+                    favourites=unpack(self._stores["favourites"].load()),
+                    lists={
+                        name: unpack(items)
+                        for name, items in self._stores["lists"].load().items()
+                    },
+                    tracking=tracking,
+                    processes=processes,
+                    packages=self.package_store.packages,
+                )
+            self.db = db
+        except Exception as e:
+            print(f"Error opening state database, using JSON files: {e}")
+            self.db = None
+
+    def switch_storage_backend(self, backend):
+        # Copies the current collections, tracked installs and process history
+        # into the other backend and uses it from now on, so both directions
+        # carry over every change. Returns False if the copy failed, in which
+        # case the current backend stays in use.
+        if backend == self.storage_backend:
+            return True
+        old_db = self.db
+        try:
+            # Everything still unloaded has to be read from the old backend
+            for attr, store_name in LAZY_STORE_ATTRS.items():
+                if store_name in COLLECTION_STORES:
+                    getattr(self, attr)
+            processes = [v.to_dict() for v in self.active_process_views.values()]
+            if not self.processes_loaded:
+                processes = self._read_saved_processes() + processes
+
+            if backend == "sqlite":
+                db = SqliteStore(STATE_DB_FILE)
+                db.import_state(
+                    cart=self.cart_items,
+                    favourites=self.favourites,
+                    lists=self.saved_lists,
+                    tracking=self.tracked_installs,
+                    processes=processes,
+                    packages=self.package_store.packages,
+                )
+                self.db = db
+            else:
+                self.db = None
+                pack = self.package_store.pack_items
+                self.package_store.dirty = False
+                self._stores["packages"].save(self.package_store.to_json())
+                self._stores["cart"].save(pack(self.cart_items))
+                self._stores["favourites"].save(pack(self.favourites))
+                self._stores["lists"].save(
+                    {name: pack(items) for name, items in self.saved_lists.items()}
+                )
+                for name in ("packages", "cart", "favourites", "lists"):
+                    self._stores[name].writer.flush()
+                atomic_write_json(TRACKING_FILE, self.tracked_installs, indent=4)
+                atomic_write_json(PROCESSES_FILE, processes, indent=4)
+                if old_db is not None:
+                    old_db.close()
+        except Exception as e:
+            print(f"Error switching storage to {backend}: {e}")
+            self.db = old_db
+            return False
+
+        self.storage_backend = backend
+        self.save_settings()
+        return True
+
+    def __getattr__(self, name):
+        # Only called for attributes that aren't set yet: lazily load the store
+        # that owns them
+        store_name = LAZY_STORE_ATTRS.get(name)
+        if store_name is None or "_stores" not in self.__dict__:
+            raise AttributeError(name)
+        self._load_store(store_name)
+        return self.__dict__[name]
+
+    def _ensure_packages(self):
+        if self.package_store.loaded:
+            return
+        if self.db is not None:
+            self.package_store.load(self.db.load_packages())
+        else:
+            self.package_store.load(self._stores["packages"].load())
+
+    def _load_store(self, store_name):
+        if store_name in COLLECTION_STORES:
+            self._ensure_packages()
+        unpack = self.package_store.unpack_items
+        if self.db is not None and store_name == "cart":
+            data = self.db.load_items(CART)
+        elif self.db is not None and store_name == "favourites":
+            data = self.db.load_items(FAVOURITES)
+        elif self.db is not None and store_name == "lists":
+            data = self.db.load_lists()
+        else:
+            data = self._stores[store_name].load()
+        if store_name == "cart":
+            self.cart_items = unpack(data)
+            self._cart_index = self._keys_of(self.cart_items)
+        elif store_name == "favourites":
+            self.favourites = unpack(data)
+            self._fav_index = self._keys_of(self.favourites)
+        elif store_name == "lists":
+            self.saved_lists = {name: unpack(items) for name, items in data.items()}
+            self._list_index = {}  # list name -> set of keys
+            self._pkg_lists = {}  # key -> set of list names
+            for list_name in self.saved_lists:
+                self._index_list(list_name)
+        elif store_name == "history":
+            self.recent_activity = unpack(data.get("recent_activity", []))
+            self.search_history = data.get("search_history", [])
+        elif store_name == "mastodon":
+            # Posts fetched before the cache was read are newer: keep them
+            for key in MASTODON_CACHE_KEYS:
+                if key not in self.__dict__:
+                    setattr(self, key, data.get(key))
+
+    def load_mastodon_cache(self):
+        # Reads the posts saved last session now rather than on first access
+        if not all(key in self.__dict__ for key in MASTODON_CACHE_KEYS):
+            self._load_store("mastodon")
+
+    # --- Package Metadata ---
+    def _intern_item(self, package, channel):
+        _, package = self.package_store.intern(package, channel)
+        return {"package": package, "channel": channel}
+
+    def _intern_items(self, items):
+        return [self._intern_item(i["package"], i["channel"]) for i in items]
+
+    def _live_package_refs(self):
+        # None until every collection is loaded: an unloaded one may still
+        # reference any package
+        if not all(
+            attr in self.__dict__
+            for attr, store_name in LAZY_STORE_ATTRS.items()
+            if store_name in COLLECTION_STORES
+        ):
+            return None
+        collections = [self.cart_items, self.favourites, self.recent_activity]
+        collections.extend(self.saved_lists.values())
+        live = {
+            package_ref(item["package"], item["channel"])
+            for items in collections
+            for item in items
+        }
+        for info in self.tracked_installs.values():
+            if info.get("package_ref"):
+                live.add(info["package_ref"])
+        return live
+
+    def save_packages(self, items=()):
+        # items: entries whose package must be (re)written. SQLite upserts
+        # only those rows; the JSON file is rewritten whole, so only when
+        # entries were added or dropped.
+        live = self._live_package_refs()
+        dead = self.package_store.prune(live) if live is not None else []
+        if self.db is None:
+            if self.package_store.dirty:
+                self.package_store.dirty = False
+                self._stores["packages"].save(self.package_store.to_json())
+            return
+        try:
+            if items:
+                self.db.put_packages(items)
+            if dead:
+                self.db.delete_packages(dead)
+        except Exception as e:
+            print(f"Error saving packages: {e}")
+
+    def save_cart(self):
+        self.save_packages()
+        self._stores["cart"].save(self.package_store.pack_items(self.cart_items))
+
+    def save_favourites(self):
+        self.save_packages()
+        self._stores["favourites"].save(self.package_store.pack_items(self.favourites))
+
+    def save_lists(self):
+        self.save_packages()
+        pack = self.package_store.pack_items
+        self._stores["lists"].save(
+            {name: pack(items) for name, items in self.saved_lists.items()}
+        )
+
+    # With the SQLite backend a mutation writes only the affected row; the
+    # JSON files are always rewritten whole
+    def _save_collection(self, collection, list_name=""):
+        if self.db is None:
+            if collection == CART:
+                self.save_cart()
+            elif collection == FAVOURITES:
+                self.save_favourites()
+            else:
+                self.save_lists()
+            return
+        try:
+            if collection == CART:
+                items = self.cart_items
+            elif collection == FAVOURITES:
+                items = self.favourites
+            else:
+                items = self.saved_lists[list_name]
+            self.db.replace_items(collection, items, list_name)
+            self.save_packages()
+        except Exception as e:
+            print(f"Error saving {collection}: {e}")
+
+    def _save_added(self, collection, item, list_name=""):
+        if self.db is None:
+            return self._save_collection(collection, list_name)
+        try:
+            self.db.put_item(collection, item, list_name)
+        except Exception as e:
+            print(f"Error saving {collection}: {e}")
+
+    def _save_removed(self, collection, key, remains, list_name=""):
+        if self.db is None:
+            return self._save_collection(collection, list_name)
+        if remains:
+            return  # duplicates share one row
+        try:
+            self.db.delete_item(collection, key, list_name)
+            self.save_packages()
+        except Exception as e:
+            print(f"Error saving {collection}: {e}")
+
+    def save_history(self):
+        self.save_packages(self.recent_activity)
+        self._stores["history"].save(
+            {
+                "recent_activity": self.package_store.pack_items(self.recent_activity),
+                "search_history": list(self.search_history),
+            }
+        )
+
+    def save_mastodon_cache(self):
+        self._stores["mastodon"].save(
+            {key: getattr(self, key) for key in MASTODON_CACHE_KEYS}
+        )
+
     def save_settings(self):
         try:
-            Path(CONFIG_DIR).mkdir(parents=True, exist_ok=True)
             data = {
                 "username": self.username,
                 "default_channel": self.default_channel,
@@ -425,6 +791,12 @@ class AppState:
                 "undo_timer": self.undo_timer,
                 "nav_badge_size": self.nav_badge_size,
                 "search_limit": self.search_limit,
+                "live_search": self.live_search,
+                "live_search_delay": self.live_search_delay,
+                "use_offline_index": self.use_offline_index,
+                "search_cache_ttl": self.search_cache_ttl,
+                "search_cache_size": self.search_cache_size,
+                "persist_search_cache": self.persist_search_cache,
                 "background_image": self.background_image,
                 "background_opacity": self.background_opacity,
                 "background_blur": self.background_blur,
@@ -472,28 +844,22 @@ class AppState:
                 "quote_mastodon_tag": self.quote_mastodon_tag,
                 "quote_style_italic": self.quote_style_italic,
                 "quote_style_bold": self.quote_style_bold,
-                "last_fetched_quote": self.last_fetched_quote,
                 "app_use_mastodon": self.app_use_mastodon,
                 "app_mastodon_server": self.app_mastodon_server,
                 "app_mastodon_account": self.app_mastodon_account,
                 "app_mastodon_tag": self.app_mastodon_tag,
-                "last_fetched_app": self.last_fetched_app,
                 "tip_use_mastodon": self.tip_use_mastodon,
                 "tip_mastodon_server": self.tip_mastodon_server,
                 "tip_mastodon_account": self.tip_mastodon_account,
                 "tip_mastodon_tag": self.tip_mastodon_tag,
-                "last_fetched_tip": self.last_fetched_tip,
                 "song_use_mastodon": self.song_use_mastodon,
                 "song_mastodon_server": self.song_mastodon_server,
                 "song_mastodon_account": self.song_mastodon_account,
                 "song_mastodon_tag": self.song_mastodon_tag,
-                "last_fetched_song": self.last_fetched_song,
-                "default_song_cache": self.default_song_cache,
                 "carousel_use_mastodon": self.carousel_use_mastodon,
                 "carousel_mastodon_server": self.carousel_mastodon_server,
                 "carousel_mastodon_account": self.carousel_mastodon_account,
                 "carousel_mastodon_tag": self.carousel_mastodon_tag,
-                "last_fetched_carousel": self.last_fetched_carousel,
                 "auto_refresh_ui": self.auto_refresh_ui,
                 "auto_refresh_interval": self.auto_refresh_interval,
                 "daily_indices": self.daily_indices,
@@ -504,24 +870,23 @@ class AppState:
                 "fetch_icons": self.fetch_icons,
                 "icon_size": self.icon_size,
                 "channel_selector_style": self.channel_selector_style,
-                "available_channels": self.available_channels,
-                "active_channels": self.active_channels,
+                "available_channels": list(self.available_channels),
+                "active_channels": list(self.active_channels),
                 "shell_single_prefix": self.shell_single_prefix,
                 "shell_single_suffix": self.shell_single_suffix,
                 "shell_cart_prefix": self.shell_cart_prefix,
                 "shell_cart_suffix": self.shell_cart_suffix,
-                "cart_items": self.cart_items,
-                "favourites": self.favourites,
-                "saved_lists": self.saved_lists,
-                "recent_activity": self.recent_activity,
-                "search_history": self.search_history,
                 "enable_search_history": self.enable_search_history,
                 "search_history_limit": self.search_history_limit,
                 "max_search_suggestions": self.max_search_suggestions,
                 "fuzzy_search_history": self.fuzzy_search_history,
+                "max_parallel_jobs": self.max_parallel_jobs,
+                "settings_save_delay": self.settings_save_delay,
+                "storage_backend": self.storage_backend,
             }
-            with open(CONFIG_FILE, "w") as f:
-                json.dump(data, f, indent=4)
+            # The UI edits the nested dicts (card config, expanded sections,
+            # daily indices) in place: hand the writer its own copy
+            self._stores["config"].save(copy.deepcopy(data))
         except Exception as e:
             print(f"Error saving settings: {e}")
 
@@ -609,55 +974,100 @@ class AppState:
             return package["package_attr_name"]
         return f"{package.get('package_pname')}-{package.get('package_pversion')}"
 
+    # --- Collection Indexes ---
+    # Hash sets keyed by (pkg_id, channel) for the cart, favourites and each
+    # saved list, plus a reverse index from package to the lists holding it.
+    # Every mutation below keeps them in sync with the underlying lists.
+    def _item_key(self, package, channel):
+        return (self._get_pkg_id(package), channel)
+
+    def _keys_of(self, items):
+        return {self._item_key(item["package"], item["channel"]) for item in items}
+
+    def _index_list(self, name):
+        keys = self._keys_of(self.saved_lists[name])
+        self._list_index[name] = keys
+        for key in keys:
+            self._pkg_lists.setdefault(key, set()).add(name)
+
+    def _unindex_list(self, name):
+        for key in self._list_index.pop(name, ()):
+            names = self._pkg_lists.get(key)
+            if names is not None:
+                names.discard(name)
+                if not names:
+                    del self._pkg_lists[key]
+
+    def _remove_item(self, items, key):
+        # Removes the first match; returns (removed, another_match_remains)
+        for i, item in enumerate(items):
+            if self._item_key(item["package"], item["channel"]) == key:
+                del items[i]
+                remains = any(
+                    self._item_key(rest["package"], rest["channel"]) == key
+                    for rest in items[i:]
+                )
+                return True, remains
+        return False, False
+
     def is_in_cart(self, package, channel):
-        pkg_id = self._get_pkg_id(package)
-        for item in self.cart_items:
-            if (
-                self._get_pkg_id(item["package"]) == pkg_id
-                and item["channel"] == channel
-            ):
-                return True
-        return False
+        return self._item_key(package, channel) in self._cart_index
 
     def add_to_cart(self, package, channel):
         if self.is_in_cart(package, channel):
             return False
-        self.cart_items.append({"package": package, "channel": channel})
-        self.save_settings()
+        item = self._intern_item(package, channel)
+        self.cart_items.append(item)
+        self._cart_index.add(self._item_key(package, channel))
+        self._save_added(CART, item)
         return True
 
     def remove_from_cart(self, package, channel):
-        pkg_id = self._get_pkg_id(package)
-        for i, item in enumerate(self.cart_items):
-            if (
-                self._get_pkg_id(item["package"]) == pkg_id
-                and item["channel"] == channel
-            ):
-                del self.cart_items[i]
-                self.save_settings()
-                return True
-        return False
+        key = self._item_key(package, channel)
+        if key not in self._cart_index:
+            return False
+        removed, remains = self._remove_item(self.cart_items, key)
+        if not remains:
+            self._cart_index.discard(key)
+        if removed:
+            self._save_removed(CART, key, remains)
+        return removed
 
     def clear_cart(self):
         self.cart_items = []
-        self.save_settings()
+        self._cart_index = set()
+        self._save_collection(CART)
 
     def restore_cart(self, items):
+        items = self._intern_items(items)
         self.cart_items = items
-        self.save_settings()
+        self._cart_index = self._keys_of(items)
+        self._save_collection(CART)
 
     def save_list(self, name, items):
-        self.saved_lists[name] = items
-        self.save_settings()
+        self._unindex_list(name)
+        self.saved_lists[name] = self._intern_items(items)
+        self._index_list(name)
+        self._save_collection(LIST, name)
 
     def delete_list(self, name):
         if name in self.saved_lists:
             del self.saved_lists[name]
-            self.save_settings()
+            self._unindex_list(name)
+            if self.db is None:
+                self.save_lists()
+            else:
+                try:
+                    self.db.delete_list(name)
+                    self.save_packages()
+                except Exception as e:
+                    print(f"Error deleting list: {e}")
 
     def restore_list(self, name, items):
-        self.saved_lists[name] = items
-        self.save_settings()
+        self._unindex_list(name)
+        self.saved_lists[name] = self._intern_items(items)
+        self._index_list(name)
+        self._save_collection(LIST, name)
 
     def add_to_history(self, package, channel):
         pkg_id = self._get_pkg_id(package)
@@ -666,13 +1076,13 @@ class AppState:
             for item in self.recent_activity
             if self._get_pkg_id(item["package"]) != pkg_id or item["channel"] != channel
         ]
-        self.recent_activity.insert(0, {"package": package, "channel": channel})
+        self.recent_activity.insert(0, self._intern_item(package, channel))
         self.recent_activity = self.recent_activity[:5]
-        self.save_settings()
+        self.save_history()
 
     def clear_history(self):
         self.recent_activity = []
-        self.save_settings()
+        self.save_history()
 
     def add_to_search_history(self, query):
         if not self.enable_search_history or not query.strip():
@@ -689,94 +1099,83 @@ class AppState:
         if len(self.search_history) > self.search_history_limit:
             self.search_history = self.search_history[: self.search_history_limit]
 
-        self.save_settings()
+        self.save_history()
 
     def remove_from_search_history(self, query):
         if query in self.search_history:
             self.search_history.remove(query)
-            self.save_settings()
+            self.save_history()
 
     def clear_search_history(self):
         self.search_history = []
-        self.save_settings()
+        self.save_history()
 
     def restore_search_history(self, history):
         self.search_history = history
-        self.save_settings()
+        self.save_history()
 
     def is_favourite(self, package, channel):
-        pkg_id = self._get_pkg_id(package)
-        for item in self.favourites:
-            if (
-                self._get_pkg_id(item["package"]) == pkg_id
-                and item["channel"] == channel
-            ):
-                return True
-        return False
+        return self._item_key(package, channel) in self._fav_index
 
     def toggle_favourite(self, package, channel):
-        pkg_id = self._get_pkg_id(package)
-        idx = -1
-        for i, item in enumerate(self.favourites):
-            if (
-                self._get_pkg_id(item["package"]) == pkg_id
-                and item["channel"] == channel
-            ):
-                idx = i
-                break
-
-        if idx >= 0:
-            del self.favourites[idx]
-            action = "removed"
-        else:
-            self.favourites.append({"package": package, "channel": channel})
-            action = "added"
-
-        self.save_settings()
-        return action
+        key = self._item_key(package, channel)
+        if key in self._fav_index:
+            _, remains = self._remove_item(self.favourites, key)
+            if not remains:
+                self._fav_index.discard(key)
+            self._save_removed(FAVOURITES, key, remains)
+            return "removed"
+
+        item = self._intern_item(package, channel)
+        self.favourites.append(item)
+        self._fav_index.add(key)
+        self._save_added(FAVOURITES, item)
+        return "added"
 
     def get_containing_lists(self, pkg, channel):
-        pkg_id = self._get_pkg_id(pkg)
-        containing = []
-        for list_name, items in self.saved_lists.items():
-            for item in items:
-                if (
-                    self._get_pkg_id(item["package"]) == pkg_id
-                    and item["channel"] == channel
-                ):
-                    containing.append(list_name)
-                    break
-        return containing
+        names = self._pkg_lists.get(self._item_key(pkg, channel))
+        if not names:
+            return []
+        # Keep the saved_lists order
+        return [name for name in self.saved_lists if name in names]
 
     def toggle_pkg_in_list(self, list_name, pkg, channel):
         if list_name not in self.saved_lists:
             return
-        pkg_id = self._get_pkg_id(pkg)
+        key = self._item_key(pkg, channel)
         items = self.saved_lists[list_name]
-        idx = -1
-        for i, item in enumerate(items):
-            if (
-                self._get_pkg_id(item["package"]) == pkg_id
-                and item["channel"] == channel
-            ):
-                idx = i
-                break
-        if idx >= 0:
-            del items[idx]
-            msg = f"Removed from {list_name}"
-        else:
-            items.append({"package": pkg, "channel": channel})
-            msg = f"Added to {list_name}"
-        self.saved_lists[list_name] = items
-        self.save_settings()
-        return msg
+        list_keys = self._list_index.setdefault(list_name, set())
+        if key in list_keys:
+            _, remains = self._remove_item(items, key)
+            if not remains:
+                list_keys.discard(key)
+                names = self._pkg_lists.get(key)
+                if names is not None:
+                    names.discard(list_name)
+                    if not names:
+                        del self._pkg_lists[key]
+            self._save_removed(LIST, key, remains, list_name)
+            return f"Removed from {list_name}"
+
+        item = self._intern_item(pkg, channel)
+        items.append(item)
+        list_keys.add(key)
+        self._pkg_lists.setdefault(key, set()).add(list_name)
+        self._save_added(LIST, item, list_name)
+        return f"Added to {list_name}"
 
     def get_base_color(self):
         return ft.Colors.WHITE if self.theme_mode == "dark" else ft.Colors.BLACK
 
     # --- Tracking Logic ---
     def load_tracking(self):
-        if os.path.exists(TRACKING_FILE):
+        if self.db is not None:
+            try:
+                self.tracked_installs = self.db.load_tracking()
+            except Exception as e:
+                print(f"Error loading tracking: {e}")
+                self.tracked_installs = {}
+        elif os.path.exists(TRACKING_FILE):
             try:
                 with open(TRACKING_FILE, "r") as f:
                     self.tracked_installs = json.load(f)
@@ -792,6 +1191,17 @@ class AppState:
         except Exception as e:
             print(f"Error saving tracking: {e}")
 
+    def _save_tracking_rows(self, changed=(), removed=()):
+        if self.db is None:
+            return self.save_tracking()
+        try:
+            for key in changed:
+                self.db.put_tracking(key, self.tracked_installs[key])
+            if removed:
+                self.db.delete_tracking(removed)
+        except Exception as e:
+            print(f"Error saving tracking: {e}")
+
     def _get_track_key(self, pname, channel):
         return f"{pname}::{channel}"
 
@@ -806,27 +1216,37 @@ class AppState:
         license_set=None,
         source_url=None,
         programs=None,
+        package=None,
     ):
         key = self._get_track_key(pname, channel)
-        self.tracked_installs[key] = {
+        info = {
             "pname": pname,
             "attr_name": attr_name,
             "channel": channel,
             "version": version,
-            "description": description,
-            "homepage": homepage,
-            "license": license_set,
             "source": source_url,
             "programs": programs,
             "installed_at": datetime.datetime.now().isoformat(),
         }
-        self.save_tracking()
+        if package is not None:
+            # Description, homepage and license come from the package store
+            self._ensure_packages()
+            item = self._intern_item(package, channel)
+            info["package_ref"] = package_ref(package, channel)
+        else:
+            info["description"] = description
+            info["homepage"] = homepage
+            info["license"] = license_set
+        self.tracked_installs[key] = info
+        self._save_tracking_rows(changed=[key])
+        if package is not None:
+            self.save_packages([item])
 
     def untrack_install(self, pname, channel):
         key = self._get_track_key(pname, channel)
         if key in self.tracked_installs:
             del self.tracked_installs[key]
-            self.save_tracking()
+            self._save_tracking_rows(removed=[key])
 
     def is_tracked(self, pname, channel):
         # We might need fuzzy matching if channel versions differ slightly,
@@ -834,6 +1254,18 @@ class AppState:
         key = self._get_track_key(pname, channel)
         return key in self.tracked_installs
 
+    def get_tracked_info(self, pname, channel):
+        info = self.tracked_installs.get(self._get_track_key(pname, channel))
+        if not info or not info.get("package_ref"):
+            return info
+        self._ensure_packages()
+        package = self.package_store.get(info["package_ref"]) or {}
+        info = dict(info)
+        info["description"] = package.get("package_description")
+        info["homepage"] = package.get("package_homepage", [])
+        info["license"] = package.get("package_license_set", [])
+        return info
+
     def get_tracked_channel(self, pname):
         # Check if pname is tracked under any channel
         # Keys are "pname::channel"
@@ -848,80 +1280,26 @@ class AppState:
         return None
 
     # --- Cache Logic ---
+    def load_cached_profile(self):
+        # Installed state as of the last session, for the first frame. The
+        # startup scan replaces it and only notifies what actually changed.
+        if self.profile_snapshot is not None:
+            return
+        snapshot = profile_service.load_cached()
+        if snapshot is not None:
+            self.profile_snapshot = snapshot
+            self.installed_items = snapshot.installed_items()
+
     def refresh_installed_cache(self):
         try:
-            result = subprocess.run(
-                ["nix", "profile", "list", "--json"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-            )
-            if result.returncode != 0:
+            snapshot = profile_service.refresh()
+            if snapshot is None or snapshot is self.profile_snapshot:
                 return
 
-            data = json.loads(result.stdout)
-            elements = data.get("elements", {})
-            new_items = {}
-            installed_pnames = set()
-
-            for key, info in elements.items():
-                store_paths = info.get("storePaths", [])
-                attr_path = info.get("attrPath", "")
-                if not store_paths:
-                    continue
-
-                # Heuristic: Pick the store path that looks most like the package main path
-                # Usually it ends with the version number.
-                best_store_path = store_paths[0]
-                version_match_regex = re.compile(r"-(\d+(\.\d+)*[a-zA-Z0-9_\.]*)$")
-
-                best_version = "?"
-                best_name = "?"
-
-                # Iterate to find the best candidate in storePaths
-                found_version = False
-                for path in store_paths:
-                    basename = os.path.basename(path)
-                    # Remove hash (32 chars) + dash = 33 chars
-                    if len(basename) > 33 and basename[32] == "-":
-                        rest = basename[33:]
-                    else:
-                        rest = basename
-
-                    # Check for version match at end
-                    match = version_match_regex.search(rest)
-                    if match:
-                        best_store_path = path
-                        best_version = match.group(1)
-                        best_name = rest[: match.start()]
-                        found_version = True
-                        break  # Found a good one
-
-                if not found_version:
-                    # Fallback to first path logic if no clear version found
-                    basename = os.path.basename(best_store_path)
-                    if len(basename) > 33 and basename[32] == "-":
-                        rest = basename[33:]
-                    else:
-                        rest = basename
-
-                    # Simple split fallback
-                    match = re.search(r"-(\d)", rest)
-                    if match:
-                        best_name = rest[: match.start()]
-                        best_version = rest[match.start() + 1 :]
-                    else:
-                        best_name = rest
-                        best_version = "?"
-
-                if best_name not in new_items:
-                    new_items[best_name] = []
-                new_items[best_name].append(
-                    {"key": key, "attrPath": attr_path, "version": best_version}
-                )
-                installed_pnames.add(best_name)
-
-            self.installed_items = new_items
+            diff = diff_snapshots(self.profile_snapshot, snapshot)
+            self.profile_snapshot = snapshot
+            self.installed_items = snapshot.installed_items()
+            installed_pnames = set(self.installed_items)
 
             # Reconcile Tracking: Remove tracked items that are no longer installed
             keys_to_remove = []
@@ -933,11 +1311,49 @@ class AppState:
             if keys_to_remove:
                 for key in keys_to_remove:
                     del self.tracked_installs[key]
-                self.save_tracking()
+                self._save_tracking_rows(removed=keys_to_remove)
+
+            if diff:
+                self.notify_profile_change(diff)
 
         except Exception as e:
             print(f"Error refreshing cache: {e}")
 
+    def add_profile_listener(self, cb):
+        if cb not in self.profile_listeners:
+            self.profile_listeners.append(cb)
+
+    def remove_profile_listener(self, cb):
+        if cb in self.profile_listeners:
+            self.profile_listeners.remove(cb)
+
+    def notify_profile_change(self, diff):
+        # Listeners get a ProfileDiff of what was added, removed or changed
+        for cb in list(self.profile_listeners):
+            try:
+                cb(diff)
+            except Exception as e:
+                print(f"Error in profile listener: {e}")
+
+    def on_profile_changed(self):
+        # After an install/uninstall the old snapshot must not be served again
+        if getattr(self._profile_refreshed, "active", False):
+            return
+        profile_service.invalidate()
+        self.refresh_installed_cache()
+
+    @contextmanager
+    def profile_refreshed(self):
+        # Refreshes the profile once; on_profile_changed() calls made inside
+        # the block on this thread are skipped. A finished job runs the
+        # callbacks of every package it installed in here.
+        self.on_profile_changed()
+        self._profile_refreshed.active = True
+        try:
+            yield
+        finally:
+            self._profile_refreshed.active = False
+
     def get_installed_version(self, pname):
         # 1. Try to get version from tracking if available (most accurate for what we installed)
         tracked_channel = self.get_tracked_channel(pname)
@@ -994,8 +1410,10 @@ class AppState:
         # It updates UI elements directly for logs.
         # So it IS safe to save here.
         self.save_processes()
+        self._notify_process_listeners()
 
-        for cb in self.process_listeners:
+    def _notify_process_listeners(self):
+        for cb in list(self.process_listeners):
             try:
                 cb()
             except Exception as e:
@@ -1007,31 +1425,54 @@ class AppState:
 
     def remove_process_view(self, process_id):
         if process_id in self.active_process_views:
-            del self.active_process_views[process_id]
+            view = self.active_process_views.pop(process_id)
+            view.delete_log()
             self.notify_process_update()
 
     def get_process_view(self, process_id):
         return self.active_process_views.get(process_id)
 
     def load_processes(self):
-        if os.path.exists(PROCESSES_FILE):
-            try:
-                # Local import to avoid circular dependency
-                from process_view import ProcessView
-
-                with open(PROCESSES_FILE, "r") as f:
-                    data = json.load(f)
+        # Runs as a startup task, after the first frame. Processes started in
+        # the meantime are kept and listed after the history.
+        history = {}
+        try:
+            # Local import to avoid circular dependency
+            from process_view import ProcessView
 
-                for p_data in data:
-                    # We pass None for on_complete as these are historical records
-                    view = ProcessView.from_dict(p_data, on_complete_placeholder=None)
-                    self.active_process_views[view.id] = view
-            except Exception as e:
-                print(f"Error loading processes: {e}")
+            for p_data in self._read_saved_processes():
+                # We pass None for on_complete as these are historical records
+                view = ProcessView.from_dict(p_data, on_complete_placeholder=None)
+                history[view.id] = view
+        except Exception as e:
+            print(f"Error loading processes: {e}")
+
+        started_early = dict(self.active_process_views)
+        history.update(started_early)
+        self.active_process_views = history
+        self.processes_loaded = True
+        if started_early:
+            self.save_processes()
+        self._notify_process_listeners()
+
+    def _read_saved_processes(self):
+        if self.db is not None:
+            return self.db.load_processes()
+        if os.path.exists(PROCESSES_FILE):
+            with open(PROCESSES_FILE, "r") as f:
+                return json.load(f)
+        return []
 
     def save_processes(self):
+        # Saving before the history is loaded would overwrite it
+        if not self.processes_loaded:
+            return
         try:
             data = [v.to_dict() for v in self.active_process_views.values()]
+            if self.db is not None:
+                # Only new or changed processes are written
+                self.db.sync_processes(data)
+                return
             with open(PROCESSES_FILE, "w") as f:
                 json.dump(data, f, indent=4)
         except Exception as e:
@@ -1039,5 +1480,3 @@ class AppState:
 
 
 state = AppState()
-state.load_processes()
-state.refresh_installed_cache()
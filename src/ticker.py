@@ -0,0 +1,189 @@
+import threading
+import time
+
+# --- Tick Scheduler ---
+# All periodic work (typewriter text, toast countdowns, the carousel, the
+# background rotation, process log output, the profile watcher, ...) runs as
+# callbacks on one ticker thread instead of one sleeping thread each. Slow
+# work is handed off from the callback (e.g. to core.run_blocking). A callback is registered with an interval and,
+# optionally, a lifetime in seconds and an owner control; it stops when the
+# lifetime runs out, when the owner leaves the page or when cancelled.
+#
+# Callbacks don't call control.update() themselves. They pass the controls
+# they changed to ticker.update(), and everything changed during a tick is
+# sent with one page.update(*controls) at the end of it.
+#
+# While the window is hidden or minimised the ticker is paused: nothing runs,
+# and countdowns resume where they stopped once the window is shown again.
+
+MIN_TICK = 0.02  # seconds; callbacks due within this window run together
+
+
+def mounted(control):
+    # control.page raises on some flet versions once the control is detached
+    try:
+        return control.page is not None
+    except Exception:
+        return False
+
+
+class Timer:
+    def __init__(self, callback, interval, lifetime, owner, on_expire, repeat):
+        self.callback = callback
+        self.interval = interval
+        self.lifetime = lifetime
+        self.owner = owner
+        self.on_expire = on_expire
+        self.repeat = repeat
+        self.started = time.monotonic()
+        self.due = self.started + interval
+        self.active = True
+
+    @property
+    def elapsed(self):
+        # Seconds since registration, not counting time spent paused
+        return time.monotonic() - self.started
+
+    def cancel(self):
+        self.active = False
+
+
+class Ticker:
+    def __init__(self):
+        self._timers = []
+        self._dirty = {}  # id(control) -> control
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._paused_at = None
+        self._thread = None
+
+    # --- Registration ---
+    def every(self, interval, callback, lifetime=None, owner=None, on_expire=None):
+        # callback(timer) runs every `interval` seconds. It may return a number
+        # to use as the delay before its next run instead.
+        return self._add(Timer(callback, interval, lifetime, owner, on_expire, True))
+
+    def after(self, delay, callback, owner=None):
+        # One-shot: callback(timer) runs once after `delay` seconds
+        return self._add(Timer(callback, delay, None, owner, None, False))
+
+    def _add(self, timer):
+        with self._lock:
+            self._timers.append(timer)
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="all-might-ticker", daemon=True
+                )
+                self._thread.start()
+            self._wake.notify()
+        return timer
+
+    def update(self, *controls):
+        # Queues controls for the flush at the end of the current tick
+        with self._lock:
+            for control in controls:
+                self._dirty[id(control)] = control
+            self._wake.notify()
+
+    # --- Window visibility ---
+    def pause(self):
+        with self._lock:
+            if self._paused_at is None:
+                self._paused_at = time.monotonic()
+
+    def resume(self):
+        with self._lock:
+            if self._paused_at is None:
+                return
+            # Shift every timer by the time spent paused
+            hidden_for = time.monotonic() - self._paused_at
+            self._paused_at = None
+            for timer in self._timers:
+                timer.started += hidden_for
+                timer.due += hidden_for
+            self._wake.notify()
+
+    @property
+    def paused(self):
+        return self._paused_at is not None
+
+    # --- Loop ---
+    def _run(self):
+        while True:
+            with self._lock:
+                while True:
+                    self._timers = [t for t in self._timers if t.active]
+                    if self._paused_at is None:
+                        if self._dirty:
+                            break
+                        now = time.monotonic()
+                        next_due = min((t.due for t in self._timers), default=None)
+                        if next_due is not None and next_due - now <= MIN_TICK:
+                            break
+                        timeout = None if next_due is None else next_due - now
+                    else:
+                        timeout = None
+                    self._wake.wait(timeout)
+                now = time.monotonic()
+                due = [t for t in self._timers if t.due - now <= MIN_TICK]
+
+            for timer in due:
+                self._fire(timer, now)
+            self._flush()
+
+    def _fire(self, timer, now):
+        if not timer.active:
+            return
+        if timer.owner is not None and not mounted(timer.owner):
+            timer.cancel()
+            return
+        if timer.lifetime is not None and timer.elapsed >= timer.lifetime - MIN_TICK:
+            timer.cancel()
+            if timer.on_expire:
+                try:
+                    timer.on_expire()
+                except Exception as e:
+                    print(f"Error in ticker callback: {e}")
+            return
+        try:
+            delay = timer.callback(timer)
+        except Exception as e:
+            # One failed run doesn't stop a repeating timer
+            print(f"Error in ticker callback: {e}")
+            delay = None
+        if not timer.repeat:
+            timer.cancel()
+            return
+        if isinstance(delay, (int, float)):
+            timer.due = now + delay
+        else:
+            timer.due = now + timer.interval
+        if timer.lifetime is not None:
+            timer.due = min(timer.due, timer.started + timer.lifetime)
+
+    def _flush(self):
+        with self._lock:
+            controls = list(self._dirty.values())
+            self._dirty.clear()
+        if not controls:
+            return
+
+        # One update per page for everything changed during this tick
+        by_page = {}
+        for control in controls:
+            try:
+                page = control.page
+            except Exception:
+                page = None
+            if page is None:
+                continue
+            by_page.setdefault(id(page), (page, []))[1].append(control)
+
+        for page, page_controls in by_page.values():
+            try:
+                page.update(*page_controls)
+            except Exception as e:
+                print(f"Error flushing UI updates: {e}")
+
+
+ticker = Ticker()
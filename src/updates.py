@@ -1,36 +1,28 @@
-import json
-import subprocess
 import os
 import re
-import threading
 import flet as ft
-from controls import NixPackageCard
+from controls import NixPackageCard, LazyCardList
 from state import state
+from nix_profile import profile_service
+from package_record import PackageRecord
+from async_core import core
 
+# Reuse a profile snapshot this recent instead of re-running `nix profile list`
+PROFILE_MAX_AGE = 10
 
-def get_store_path_info(store_path):
-    # Format: /nix/store/<hash>-<name>-<version>
-    # or /nix/store/<hash>-<name>
 
-    basename = os.path.basename(store_path)
-    # Remove hash (32 chars) + dash
-    if len(basename) > 33 and basename[32] == "-":
-        rest = basename[33:]
-    else:
-        rest = basename
+class InstalledView(ft.Container):
+    # Follows profile changes only while it's on the page, so a view that is
+    # built but never shown (or navigated away from) doesn't keep its cards
+    def __init__(self, on_profile_change, **kwargs):
+        super().__init__(**kwargs)
+        self.on_profile_change = on_profile_change
 
-    # Heuristic to split name and version
-    # Find the first dash followed by a digit
-    match = re.search(r"-(\d)", rest)
-    if match:
-        idx = match.start()
-        name = rest[:idx]
-        version = rest[idx + 1 :]
-    else:
-        name = rest
-        version = ""
+    def did_mount(self):
+        state.add_profile_listener(self.on_profile_change)
 
-    return name, version
+    def will_unmount(self):
+        state.remove_profile_listener(self.on_profile_change)
 
 
 def get_binaries(store_path):
@@ -88,35 +80,26 @@ def extract_attr_set(attr_path):
     return attr_path  # Fallback
 
 
-def get_installed_packages():
+def get_installed_packages(max_age=PROFILE_MAX_AGE):
     try:
-        result = subprocess.run(
-            ["nix", "profile", "list", "--json"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            check=True,
-        )
-        data = json.loads(result.stdout)
-        elements = data.get("elements", {})
+        snapshot = profile_service.get(max_age=max_age)
+        if snapshot is None:
+            return []
 
         packages = []
-        for key, info in elements.items():
-            store_paths = info.get("storePaths", [])
-            if not store_paths:
-                continue
-
-            store_path = store_paths[0]
-            name, version = get_store_path_info(store_path)
+        for element in snapshot.elements:
+            key = element.key
+            name = element.name
+            version = element.version if element.version != "?" else ""
 
             if name == "home-manager-path":
                 continue
 
             # Try to get programs
-            programs = get_binaries(store_path)
+            programs = get_binaries(element.store_path)
 
-            attr_path = info.get("attrPath", "")
-            original_url = info.get("originalUrl", "")
+            attr_path = element.attr_path
+            original_url = element.original_url
 
             # Determine channel
             channel = extract_channel_from_url(original_url) or state.default_channel
@@ -126,9 +109,7 @@ def get_installed_packages():
             tracked_data = None
 
             if is_tracked:
-                tracked_data = state.tracked_installs.get(
-                    state._get_track_key(name, channel)
-                )
+                tracked_data = state.get_tracked_info(name, channel)
 
             if not is_tracked:
                 # Fallback: Check if tracked under any channel
@@ -136,9 +117,7 @@ def get_installed_packages():
                 if tracked_channel:
                     is_tracked = True
                     channel = tracked_channel
-                    tracked_data = state.tracked_installs.get(
-                        state._get_track_key(name, tracked_channel)
-                    )
+                    tracked_data = state.get_tracked_info(name, tracked_channel)
 
             # Default/Fallback Data
             clean_attr_set = extract_attr_set(attr_path)
@@ -200,7 +179,9 @@ def get_installed_packages():
                 else:
                     pkg_data["package_attr_name"] = name  # Fallback to pname
 
-            packages.append({"pkg": pkg_data, "channel": channel})
+            packages.append(
+                {"pkg": PackageRecord.from_dict(pkg_data), "channel": channel}
+            )
 
         return packages
     except Exception as e:
@@ -218,8 +199,47 @@ def get_installed_view(
     # Filter State
     filter_state = {"selected": "all-might"}  # default to all-might
 
-    def update_view():
-        packages = get_installed_packages()
+    # element key -> (signature, card); cards are built when update_list
+    # first shows them and reused across updates and filter changes, only new
+    # or changed profile elements get a new card
+    cards = {}
+    packages_state = {"items": [], "mounted": False}
+
+    def card_signature(item):
+        pkg_data = item["pkg"]
+        return (
+            pkg_data.get("package_pversion"),
+            pkg_data.get("package_attr_name"),
+            pkg_data["is_all_might"],
+            item["channel"],
+        )
+
+    def build_card(item):
+        key = item["pkg"]["package_element_name"]
+        signature = card_signature(item)
+        existing = cards.get(key)
+        if existing and existing[0] == signature:
+            return existing[1]
+        card = NixPackageCard(
+            package_data=item["pkg"],
+            page_ref=page,
+            initial_channel=item["channel"],
+            on_cart_change=on_cart_change_callback,
+            is_cart_view=False,
+            show_toast_callback=show_toast_callback,
+            on_menu_open=None,
+            show_dialog_callback=show_dialog_callback,
+        )
+        cards[key] = (signature, card)
+        return card
+
+    def drop_stale_cards(packages):
+        seen = {item["pkg"]["package_element_name"] for item in packages}
+        for key in [k for k in cards if k not in seen]:
+            del cards[key]
+
+    def render(keep_window=False):
+        packages = packages_state["items"]
 
         count_all = len(packages)
         count_all_might = len([p for p in packages if p["pkg"]["is_all_might"]])
@@ -244,10 +264,8 @@ def get_installed_view(
         else:  # all
             filtered_packages = packages
 
-        update_list.controls.clear()
-
         if not filtered_packages:
-            update_list.controls.append(
+            update_list.show_message(
                 ft.Container(
                     content=ft.Text("No packages found.", color="onSurface"),
                     alignment=ft.alignment.center,
@@ -255,34 +273,34 @@ def get_installed_view(
                 )
             )
         else:
-            for item in filtered_packages:
-                pkg_data = item["pkg"]
-                channel = item["channel"]
-
-                card = NixPackageCard(
-                    package_data=pkg_data,
-                    page_ref=page,
-                    initial_channel=channel,
-                    on_cart_change=on_cart_change_callback,
-                    is_cart_view=False,
-                    show_toast_callback=show_toast_callback,
-                    on_menu_open=None,
-                    on_install_change=lambda: update_view(),
-                    show_dialog_callback=show_dialog_callback,
-                )
-                update_list.controls.append(card)
+            update_list.set_items(filtered_packages, keep_window=keep_window)
 
         if update_list.page:
+            packages_state["mounted"] = True
             update_list.update()
 
-    update_list = ft.Column(spacing=10, scroll=ft.ScrollMode.AUTO)
+    def update_view():
+        packages = get_installed_packages()
+        drop_stale_cards(packages)
+        packages_state["items"] = packages
+        render(keep_window=packages_state["mounted"])
+
+    def on_profile_change(diff):
+        try:
+            if update_list.page:
+                update_view()
+        except RuntimeError:
+            pass
+
+    # The bottom nav spacer sits below the list in this view
+    update_list = LazyCardList(build_card, footer_height=None)
 
     def on_filter_change(e):
         filter_state["selected"] = e.control.data
         for control in filter_row.controls:
             control.selected = control.data == filter_state["selected"]
         filter_row.update()
-        update_view()
+        render()
 
     filter_row = ft.Row(
         controls=[
@@ -323,9 +341,10 @@ def get_installed_view(
     # We delay the initial load slightly to allow the UI to render the skeleton first if needed,
     # but here we just call it.
 
-    threading.Thread(target=update_view, daemon=True).start()
+    core.run_blocking(update_view)
 
-    return ft.Container(
+    return InstalledView(
+        on_profile_change,
         expand=True,
         padding=20,
         content=ft.Column(
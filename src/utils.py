@@ -1,21 +1,78 @@
 import json
-import urllib.request
 import base64
 import xml.etree.ElementTree as ET
 import re
 from state import state
+from package_index import get_index
+from search_cache import search_cache
+from package_record import to_records
+from http_client import http_client
+
+search_cache.configure(
+    max_entries=state.search_cache_size,
+    ttl=state.search_cache_ttl,
+    persist=state.persist_search_cache,
+)
 
 # --- Logic: Search ---
 
 
-def execute_nix_search(query, channel):
-    if not query:
-        return []
+def dedupe_hits(raw_results):
+    seen = set()
+    unique_results = []
+    for pkg in raw_results:
+        # Use safely .get in case fields are missing
+        pname = pkg.get("package_pname", "")
+        pversion = pkg.get("package_pversion", "")
+        sig = (pname, pversion)
+
+        if sig not in seen:
+            seen.add(sig)
+            unique_results.append(pkg)
+
+    return unique_results
+
+
+# Pages a query loads on its own while its (filtered) results don't fill the
+# first screen; after that, only scrolling loads more
+MAX_FILL_PAGES = 5
 
+
+def search_page_size():
+    # search_limit is the size of one result page
     try:
-        limit_val = int(state.search_limit)
+        return int(state.search_limit)
     except (ValueError, TypeError):
-        limit_val = 20
+        return 20
+
+
+def execute_nix_search(query, channel, offset=0):
+    # Returns one page of results, starting at hit number `offset`.
+    # An empty page means there are no more results.
+    if not query:
+        return []
+
+    limit_val = search_page_size()
+
+    backend = "offline" if state.use_offline_index else "online"
+    cache_key = search_cache.make_key(query, channel, limit_val, offset, backend)
+    cached = search_cache.get(cache_key)
+    if cached is not None:
+        return to_records(cached)
+
+    results = to_records(_search_uncached(query, channel, limit_val, offset))
+    # Errors are not cached so the next attempt retries
+    if not (results and "error" in results[0]):
+        search_cache.put(cache_key, results)
+    return list(results)
+
+
+def _search_uncached(query, channel, limit_val, offset=0):
+    # Answer from the offline index when one has been built for this channel
+    if state.use_offline_index:
+        index = get_index(channel)
+        if index is not None:
+            return dedupe_hits(index.search(query, limit=limit_val, offset=offset))
 
     # Map "nixos-unstable" or specific versions to the backend index format
     # nh logic: if channel starts with nixos-, use it. if it's unstable, use nixos-unstable.
@@ -26,7 +83,7 @@ def execute_nix_search(query, channel):
 
     # Construct the ElasticSearch query matching nh's implementation
     query_dsl = {
-        "from": 0,
+        "from": offset,
         "size": limit_val,
         "query": {
             "bool": {
@@ -86,38 +143,24 @@ def execute_nix_search(query, channel):
     }
 
     try:
-        req = urllib.request.Request(
+        response = http_client.post(
             url,
             data=json.dumps(query_dsl).encode("utf-8"),
             headers=headers,
-            method="POST",
+            timeout=10,
         )
 
-        with urllib.request.urlopen(req, timeout=10) as response:
-            if response.status != 200:
-                print(f"Nix Search HTTP Error: {response.status}")
-                return [{"error": f"HTTP Error: {response.status}"}]
-
-            response_body = response.read()
-            data = json.loads(response_body)
+        if response.status != 200:
+            print(f"Nix Search HTTP Error: {response.status}")
+            return [{"error": f"HTTP Error: {response.status}"}]
 
-            # The 'hits' array contains the documents in '_source'
-            hits = data.get("hits", {}).get("hits", [])
-            raw_results = [hit["_source"] for hit in hits]
+        data = response.json()
 
-            seen = set()
-            unique_results = []
-            for pkg in raw_results:
-                # Use safely .get in case fields are missing
-                pname = pkg.get("package_pname", "")
-                pversion = pkg.get("package_pversion", "")
-                sig = (pname, pversion)
+        # The 'hits' array contains the documents in '_source'
+        hits = data.get("hits", {}).get("hits", [])
+        raw_results = [hit["_source"] for hit in hits]
 
-                if sig not in seen:
-                    seen.add(sig)
-                    unique_results.append(pkg)
-
-            return unique_results
+        return dedupe_hits(raw_results)
 
     except Exception as e:
         print(f"Nix Search Failed: {e}")
@@ -131,14 +174,12 @@ def get_mastodon_feed(account, tag, limit=5, server="mstdn.social"):
 
     url = f"https://{clean_server}/@{clean_account}/tagged/{clean_tag}.rss"
 
-    headers = {
-        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-    }
-
     try:
-        req = urllib.request.Request(url, headers=headers)
-        with urllib.request.urlopen(req, timeout=10) as response:
-            rss_content = response.read()
+        response = http_client.get(url, timeout=10)
+        if response.status != 200:
+            print(f"Error fetching Mastodon feed: HTTP {response.status}")
+            return None
+        rss_content = response.body
 
         root = ET.fromstring(rss_content)
 
@@ -184,17 +225,17 @@ def get_mastodon_feed(account, tag, limit=5, server="mstdn.social"):
         return None
 
 
+# The og: tags are in <head>; there's no need to download the whole page
+OPENGRAPH_MAX_BYTES = 512 * 1024
+
+
 def fetch_opengraph_data(url):
     try:
-        req = urllib.request.Request(
-            url,
-            headers={
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
-            },
-        )
-
-        with urllib.request.urlopen(req, timeout=10) as response:
-            html_content = response.read().decode("utf-8", errors="ignore")
+        response = http_client.get(url, timeout=10, max_bytes=OPENGRAPH_MAX_BYTES)
+        if response.status != 200:
+            print(f"Error fetching OpenGraph data: HTTP {response.status}")
+            return None
+        html_content = response.text()
 
         title_match = re.search(
             r'<meta\s+property="og:title"\s+content="([^"]+)"',
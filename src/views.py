@@ -1,5 +1,4 @@
 import flet as ft
-import threading
 from state import state
 from controls import GlassContainer, AutoCarousel, TypewriterControl
 import controls as controls_mod  # Alias to avoid conflict if any, but explicit import is needed
@@ -16,6 +15,11 @@ import subprocess
 import datetime
 import re
 from utils import get_mastodon_quote, get_mastodon_feed, fetch_opengraph_data
+import package_index
+from search_cache import search_cache
+from icons import icon_cache
+from job_scheduler import job_scheduler
+from async_core import core
 
 
 class SettingsScrollColumn(ft.Column):
@@ -81,17 +85,8 @@ def get_search_view(
         controls=[
             ft.Row(controls=header_controls),
             result_count_text,
-            ft.Container(
-                expand=True,
-                content=ft.Column(
-                    expand=True,
-                    scroll=ft.ScrollMode.AUTO,
-                    controls=[
-                        results_column,
-                        ft.Container(height=100),  # Spacer for bottom nav
-                    ],
-                ),
-            ),
+            # LazyCardList scrolls itself and ends with the bottom nav spacer
+            ft.Container(expand=True, content=results_column),
         ]
     )
 
@@ -117,17 +112,7 @@ def get_cart_view(refresh_cart_view, cart_header, cart_list):
         content=ft.Column(
             controls=[
                 cart_header,
-                ft.Container(
-                    expand=True,
-                    content=ft.Column(
-                        expand=True,
-                        scroll=ft.ScrollMode.AUTO,
-                        controls=[
-                            cart_list,
-                            ft.Container(height=100),  # Spacer for bottom nav
-                        ],
-                    ),
-                ),
+                ft.Container(expand=True, content=cart_list),
             ]
         ),
     )
@@ -228,14 +213,7 @@ def get_lists_view(
                             ],
                         ),
                     ),
-                    ft.Column(
-                        expand=True,
-                        scroll=ft.ScrollMode.AUTO,
-                        controls=[
-                            list_detail_col,
-                            ft.Container(height=100),  # Spacer for bottom nav
-                        ],
-                    ),
+                    ft.Container(expand=True, content=list_detail_col),
                 ],
             ),
         )
@@ -367,16 +345,16 @@ class SongCard(GlassContainer):
     def did_mount(self):
         # Always fetch fresh data on mount (app launch/refresh) to ensure latest link
         if state.song_use_mastodon:
-            threading.Thread(target=self.fetch_mastodon_meta, daemon=True).start()
+            core.run_blocking(self.fetch_mastodon_meta)
         else:
-            threading.Thread(target=self.fetch_default_meta, daemon=True).start()
+            core.run_blocking(self.fetch_default_meta)
 
     def fetch_default_meta(self):
         data = fetch_opengraph_data(self.default_url)
         if data:
             data["fetched_at"] = datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             state.default_song_cache = data
-            state.save_settings()
+            state.save_mastodon_cache()
             self.title_text = data.get("title", "Song of the Day")
             self.artist_text = "All-Might Pick"
             self.bg_image = data.get("image")
@@ -408,7 +386,7 @@ class SongCard(GlassContainer):
             )
             state.song_mastodon_cache = fetched
             state.last_fetched_song = fetched
-            state.save_settings()
+            state.save_mastodon_cache()
 
             self.apply_cache_data(fetched)
 
@@ -517,9 +495,9 @@ class SongCard(GlassContainer):
 
             # Reuse the fetch method
             if state.song_use_mastodon:
-                threading.Thread(target=self.fetch_mastodon_meta, daemon=True).start()
+                core.run_blocking(self.fetch_mastodon_meta)
             else:
-                threading.Thread(target=self.fetch_default_meta, daemon=True).start()
+                core.run_blocking(self.fetch_default_meta)
 
         # Get fetched time
         fetched_at = "Unknown"
@@ -597,6 +575,37 @@ class SongCard(GlassContainer):
             )
 
 
+def refresh_home_mastodon_caches():
+    # Fetches the app and tip posts shown on the home view when they aren't
+    # cached yet. Runs off the UI thread; returns True if a post arrived.
+    changed = False
+    if state.app_use_mastodon and not state.app_mastodon_cache:
+        fetched = get_mastodon_quote(
+            state.app_mastodon_account,
+            state.app_mastodon_tag,
+            server=state.app_mastodon_server,
+        )
+        if fetched:
+            state.app_mastodon_cache = fetched
+            state.last_fetched_app = fetched
+            changed = True
+
+    if state.tip_use_mastodon and not state.tip_mastodon_cache:
+        fetched = get_mastodon_quote(
+            state.tip_mastodon_account,
+            state.tip_mastodon_tag,
+            server=state.tip_mastodon_server,
+        )
+        if fetched:
+            state.tip_mastodon_cache = fetched
+            state.last_fetched_tip = fetched
+            changed = True
+
+    if changed:
+        state.save_mastodon_cache()
+    return changed
+
+
 def get_home_view():
     state.update_daily_indices()
     colors = list(COLOR_NAME_MAP.values())
@@ -698,23 +707,12 @@ def get_home_view():
         app_click = None
 
         if state.app_use_mastodon:
-            if not state.app_mastodon_cache:
-                fetched = get_mastodon_quote(
-                    state.app_mastodon_account,
-                    state.app_mastodon_tag,
-                    server=state.app_mastodon_server,
-                )
-                if fetched:
-                    state.app_mastodon_cache = fetched
-                    state.last_fetched_app = fetched
-                    state.save_settings()
-                elif state.last_fetched_app:
-                    state.app_mastodon_cache = state.last_fetched_app
-
-            if state.app_mastodon_cache:
+            # Fetched in the background (refresh_home_mastodon_caches)
+            app_post = state.app_mastodon_cache or state.last_fetched_app
+            if app_post:
                 app_title = "Community Pick"
-                app_desc = state.app_mastodon_cache.get("text", "...")
-                link = state.app_mastodon_cache.get("link", "")
+                app_desc = app_post.get("text", "...")
+                link = app_post.get("link", "")
                 if link:
                     app_tooltip = f"Open on Mastodon: {link}"
                     app_click = create_dynamic_card_click_handler(link)
@@ -790,23 +788,12 @@ def get_home_view():
         tip_click = None
 
         if state.tip_use_mastodon:
-            if not state.tip_mastodon_cache:
-                fetched = get_mastodon_quote(
-                    state.tip_mastodon_account,
-                    state.tip_mastodon_tag,
-                    server=state.tip_mastodon_server,
-                )
-                if fetched:
-                    state.tip_mastodon_cache = fetched
-                    state.last_fetched_tip = fetched
-                    state.save_settings()
-                elif state.last_fetched_tip:
-                    state.tip_mastodon_cache = state.last_fetched_tip
-
-            if state.tip_mastodon_cache:
+            # Fetched in the background (refresh_home_mastodon_caches)
+            tip_post = state.tip_mastodon_cache or state.last_fetched_tip
+            if tip_post:
                 tip_title = "Community Tip"
-                tip_code = state.tip_mastodon_cache.get("text", "...")
-                link = state.tip_mastodon_cache.get("link", "")
+                tip_code = tip_post.get("text", "...")
+                link = tip_post.get("link", "")
                 if link:
                     tip_tooltip = f"Open on Mastodon: {link}"
                     tip_click = create_dynamic_card_click_handler(link)
@@ -897,7 +884,7 @@ def get_home_view():
                 elif fetched:
                     state.mastodon_quote_cache = fetched
                     state.last_fetched_quote = fetched
-                    state.save_settings()
+                    state.save_mastodon_cache()
 
                     q_text_control.value = fetched.get("text", "...")
                     link = fetched.get("link", "")
@@ -913,9 +900,7 @@ def get_home_view():
 
         def refresh_quote_action():
             state.mastodon_quote_cache = None
-            threading.Thread(
-                target=lambda: fetch_fresh_quote(force_refresh=True), daemon=True
-            ).start()
+            core.run_blocking(fetch_fresh_quote, force_refresh=True)
 
         if state.use_mastodon_quote and state.mastodon_quote_cache:
             q_text_val = state.mastodon_quote_cache.get("text", "...")
@@ -977,7 +962,7 @@ def get_home_view():
         )
 
         # Background Fetch for Quote
-        threading.Thread(target=fetch_fresh_quote, daemon=True).start()
+        core.run_blocking(fetch_fresh_quote)
 
     # Build Song Card
     cfg = get_cfg("song")
@@ -1034,7 +1019,7 @@ def get_home_view():
                 if feed:
                     state.carousel_mastodon_cache = feed
                     state.last_fetched_carousel = feed
-                    state.save_settings()
+                    state.save_mastodon_cache()
 
                     new_items = []
                     for i, item in enumerate(feed):
@@ -1057,7 +1042,7 @@ def get_home_view():
             except Exception as e:
                 print(f"Background fetch failed: {e}")
 
-    threading.Thread(target=fetch_fresh_carousel_data, daemon=True).start()
+    core.run_blocking(fetch_fresh_carousel_data)
 
     view_controls = []
 
@@ -2649,6 +2634,18 @@ def get_settings_view(
         state.fetch_icons = e.control.value
         state.save_settings()
 
+    def describe_icon_cache():
+        stats = icon_cache.stats()
+        return f"Cached icons: {stats['icons']} ({stats['negative']} without icon)"
+
+    icon_cache_text = ft.Text(describe_icon_cache(), size=12, color="onSurfaceVariant")
+
+    def clear_icon_cache(e):
+        icon_cache.clear()
+        icon_cache_text.value = describe_icon_cache()
+        icon_cache_text.update()
+        show_toast("Icon cache cleared")
+
     def update_icon_size(e):
         state.icon_size = int(e.control.value)
         state.save_settings()
@@ -3174,6 +3171,17 @@ def get_settings_view(
                             ],
                             alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
                         ),
+                        ft.Row(
+                            [
+                                icon_cache_text,
+                                ft.TextButton(
+                                    "Clear",
+                                    icon=ft.Icons.DELETE_SWEEP,
+                                    on_click=clear_icon_cache,
+                                ),
+                            ],
+                            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                        ),
                         ft.Container(height=10),
                         txt_icon_size,
                         ft.Slider(
@@ -3261,6 +3269,148 @@ def get_settings_view(
 
             update_channel_list()
 
+            # Search Cache Logic
+            def describe_search_cache():
+                stats = search_cache.stats()
+                return (
+                    f"{stats['entries']} cached searches, "
+                    f"{stats['hits']} hits / {stats['misses']} misses"
+                )
+
+            cache_stats_text = ft.Text(
+                describe_search_cache(), size=12, color="onSurfaceVariant"
+            )
+
+            def update_search_cache_ttl(e):
+                try:
+                    val = max(0, int(e.control.value))
+                    state.search_cache_ttl = val
+                    search_cache.configure(ttl=val)
+                    state.save_settings()
+                except Exception:
+                    pass
+
+            def update_live_search(e):
+                state.live_search = e.control.value
+                state.save_settings()
+
+            def update_live_search_delay(e):
+                try:
+                    state.live_search_delay = max(0, int(e.control.value))
+                    state.save_settings()
+                except Exception:
+                    pass
+
+            live_search_delay_input = ft.TextField(
+                value=str(state.live_search_delay),
+                width=100,
+                height=40,
+                text_size=12,
+                content_padding=10,
+                filled=True,
+                bgcolor=ft.Colors.with_opacity(0.1, "onSurface"),
+                on_submit=update_live_search_delay,
+                on_blur=update_live_search_delay,
+            )
+
+            def update_persist_search_cache(e):
+                state.persist_search_cache = e.control.value
+                search_cache.configure(persist=e.control.value)
+                state.save_settings()
+
+            def clear_search_cache(e):
+                search_cache.clear()
+                cache_stats_text.value = describe_search_cache()
+                cache_stats_text.update()
+                show_toast("Search cache cleared")
+
+            cache_ttl_input = ft.TextField(
+                value=str(state.search_cache_ttl),
+                width=100,
+                height=40,
+                text_size=12,
+                content_padding=10,
+                filled=True,
+                bgcolor=ft.Colors.with_opacity(0.1, "onSurface"),
+                on_submit=update_search_cache_ttl,
+                on_blur=update_search_cache_ttl,
+            )
+
+            # Offline Index Logic
+            def describe_index():
+                index = package_index.get_index(state.default_channel)
+                if index is None:
+                    return f"No offline index for {state.default_channel}"
+                built = index.built_at.split("T")[0] if index.built_at else "?"
+                return f"{state.default_channel}: {len(index)} packages (built {built})"
+
+            index_status_text = ft.Text(
+                f"Checking offline index for {state.default_channel}...",
+                size=12,
+                color="onSurfaceVariant",
+            )
+
+            def show_index_status():
+                # Loading the index can take a while; never on the UI thread
+                def worker():
+                    index_status_text.value = describe_index()
+                    if index_status_text.page:
+                        index_status_text.update()
+
+                core.run_blocking(worker)
+
+            show_index_status()
+            index_dump_input = ft.TextField(
+                hint_text="Path to packages.json / nix search --json dump",
+                expand=True,
+                height=40,
+                text_size=12,
+                content_padding=10,
+                filled=True,
+                bgcolor=ft.Colors.with_opacity(0.1, "onSurface"),
+            )
+
+            def update_use_offline_index(e):
+                state.use_offline_index = e.control.value
+                state.save_settings()
+
+            def run_index_job(job, label):
+                channel = state.default_channel
+                index_status_text.value = f"{label} index for {channel}..."
+                index_status_text.update()
+
+                def worker():
+                    try:
+                        job(channel)
+                        search_cache.invalidate_channel(channel)
+                        show_toast(f"Offline index ready for {channel}")
+                    except Exception as ex:
+                        print(f"Error building package index: {ex}")
+                        show_toast(f"Index build failed: {ex}")
+                    index_status_text.value = describe_index()
+                    if index_status_text.page:
+                        index_status_text.update()
+
+                core.run_blocking(worker)
+
+            def refresh_offline_index(e):
+                run_index_job(package_index.refresh_index, "Building")
+
+            def import_offline_index(e):
+                dump_path = index_dump_input.value.strip()
+                if not dump_path:
+                    show_toast("Please enter a dump file path")
+                    return
+                run_index_job(
+                    lambda ch: package_index.build_index_from_file(ch, dump_path),
+                    "Importing",
+                )
+
+            def delete_offline_index(e):
+                package_index.delete_index(state.default_channel)
+                search_cache.invalidate_channel(state.default_channel)
+                show_index_status()
+
             # Suggestion Logic
             today = datetime.date.today()
             yy = today.year % 100
@@ -3288,7 +3438,56 @@ def get_settings_view(
                     [
                         ft.Text("Search Limit", weight=ft.FontWeight.BOLD),
                         ft.Row(
-                            [ft.Text("Max results:", size=12), search_limit_input],
+                            [ft.Text("Results per page:", size=12), search_limit_input],
+                            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                        ),
+                        ft.Container(height=20),
+                        ft.Text("Live Search", weight=ft.FontWeight.BOLD),
+                        ft.Row(
+                            [
+                                ft.Text("Search while typing:", size=12),
+                                ft.Switch(
+                                    value=state.live_search,
+                                    on_change=update_live_search,
+                                ),
+                            ],
+                            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                        ),
+                        ft.Row(
+                            [
+                                ft.Text("Delay after typing (ms):", size=12),
+                                live_search_delay_input,
+                            ],
+                            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                        ),
+                        ft.Container(height=20),
+                        ft.Text("Result Cache", weight=ft.FontWeight.BOLD),
+                        ft.Row(
+                            [
+                                ft.Text("Keep results for (seconds):", size=12),
+                                cache_ttl_input,
+                            ],
+                            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                        ),
+                        ft.Row(
+                            [
+                                ft.Text("Keep cache across restarts:", size=12),
+                                ft.Switch(
+                                    value=state.persist_search_cache,
+                                    on_change=update_persist_search_cache,
+                                ),
+                            ],
+                            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                        ),
+                        ft.Row(
+                            [
+                                cache_stats_text,
+                                ft.TextButton(
+                                    "Clear",
+                                    icon=ft.Icons.DELETE_SWEEP,
+                                    on_click=clear_search_cache,
+                                ),
+                            ],
                             alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
                         ),
                         ft.Container(height=20),
@@ -3308,6 +3507,55 @@ def get_settings_view(
                     ],
                 ),
                 ft.Container(height=10),
+                make_settings_tile(
+                    "Offline Package Index",
+                    [
+                        ft.Text(
+                            "Answer searches from a local copy of the package set instead of search.nixos.org.",
+                            size=12,
+                            color="onSurfaceVariant",
+                        ),
+                        ft.Row(
+                            [
+                                ft.Text("Use offline index when available:"),
+                                ft.Switch(
+                                    value=state.use_offline_index,
+                                    on_change=update_use_offline_index,
+                                ),
+                            ],
+                            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                        ),
+                        index_status_text,
+                        ft.Container(height=5),
+                        ft.Row(
+                            [
+                                ft.ElevatedButton(
+                                    "Build with nix search",
+                                    icon=ft.Icons.SYNC,
+                                    on_click=refresh_offline_index,
+                                ),
+                                ft.TextButton(
+                                    "Delete",
+                                    icon=ft.Icons.DELETE_OUTLINE,
+                                    style=ft.ButtonStyle(color=ft.Colors.RED_400),
+                                    on_click=delete_offline_index,
+                                ),
+                            ],
+                            wrap=True,
+                        ),
+                        ft.Row(
+                            [
+                                index_dump_input,
+                                ft.IconButton(
+                                    ft.Icons.FILE_UPLOAD,
+                                    tooltip="Import dump",
+                                    on_click=import_offline_index,
+                                ),
+                            ]
+                        ),
+                    ],
+                ),
+                ft.Container(height=10),
                 make_settings_tile(
                     "Channel Management",
                     [
@@ -3452,6 +3700,27 @@ def get_settings_view(
                 except Exception:
                     pass
 
+            def update_max_parallel_jobs(e):
+                try:
+                    val = max(1, int(e.control.value))
+                    state.max_parallel_jobs = val
+                    state.save_settings()
+                    job_scheduler.configure(max_parallel=val)
+                except Exception:
+                    pass
+
+            parallel_input = ft.TextField(
+                value=str(state.max_parallel_jobs),
+                width=100,
+                height=40,
+                text_size=12,
+                content_padding=10,
+                filled=True,
+                bgcolor=ft.Colors.with_opacity(0.1, "onSurface"),
+                on_submit=update_max_parallel_jobs,
+                on_blur=update_max_parallel_jobs,
+            )
+
             interval_input = ft.TextField(
                 value=str(state.auto_refresh_interval),
                 width=100,
@@ -3476,6 +3745,11 @@ def get_settings_view(
                             size=12,
                             color="onSurfaceVariant",
                         ),
+                        ft.Text(
+                            "Profile changes are picked up as they happen. The interval is only used when the profile can't be watched, and grows while nothing changes.",
+                            size=12,
+                            color="onSurfaceVariant",
+                        ),
                         ft.Container(height=10),
                         ft.Row(
                             [
@@ -3493,6 +3767,21 @@ def get_settings_view(
                         ),
                     ],
                 ),
+                make_settings_tile(
+                    "Jobs",
+                    [
+                        ft.Text(
+                            "Installs and removals run one at a time; installs waiting together are combined into one 'nix profile add'. Other jobs run in parallel up to this limit.",
+                            size=12,
+                            color="onSurfaceVariant",
+                        ),
+                        ft.Container(height=10),
+                        ft.Row(
+                            [ft.Text("Parallel jobs:"), parallel_input],
+                            alignment=ft.MainAxisAlignment.SPACE_BETWEEN,
+                        ),
+                    ],
+                ),
             ]
         elif category == "debug":
 
@@ -3500,6 +3789,19 @@ def get_settings_view(
                 state.show_refresh_button = e.control.value
                 state.save_settings()
 
+            def update_storage_backend(e):
+                backend = e.control.selected.pop()
+                if state.switch_storage_backend(backend):
+                    show_toast(
+                        "Now using SQLite"
+                        if backend == "sqlite"
+                        else "Now using JSON files"
+                    )
+                else:
+                    e.control.selected = {state.storage_backend}
+                    e.control.update()
+                    show_toast(f"Switching storage to {backend} failed")
+
             controls_list = [
                 ft.Text("Debug Settings", size=24, weight=ft.FontWeight.BOLD),
                 ft.Divider(),
@@ -3518,6 +3820,25 @@ def get_settings_view(
                         )
                     ],
                 ),
+                make_settings_tile(
+                    "Storage",
+                    [
+                        ft.Text(
+                            "Where cart, favourites, lists, tracked installs and process history are kept. SQLite writes only the changed entry instead of the whole file. Switching copies everything to the selected backend.",
+                            size=12,
+                            color="onSurfaceVariant",
+                        ),
+                        ft.Container(height=10),
+                        ft.SegmentedButton(
+                            selected={state.storage_backend},
+                            on_change=update_storage_backend,
+                            segments=[
+                                ft.Segment(value="json", label=ft.Text("JSON files")),
+                                ft.Segment(value="sqlite", label=ft.Text("SQLite")),
+                            ],
+                        ),
+                    ],
+                ),
             ]
         elif category == "experimental":
             controls_list = [
@@ -0,0 +1,26 @@
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+# The app keeps its state under ~/.config/all-might, resolved when constants is
+# imported: point HOME at a throwaway directory before any src module loads.
+_home = tempfile.TemporaryDirectory(prefix="all-might-tests-")
+os.environ["HOME"] = _home.name
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+
+@pytest.fixture
+def config_dir():
+    # A clean config directory for each test
+    from constants import CONFIG_DIR
+    from persistence import flush_all
+
+    flush_all()
+    shutil.rmtree(CONFIG_DIR, ignore_errors=True)
+    os.makedirs(CONFIG_DIR)
+    yield CONFIG_DIR
+    flush_all()
@@ -0,0 +1,15 @@
+import sys
+
+from async_core import core
+
+
+def test_stream_process_handles_lines_over_64k():
+    script = "import sys; sys.stdout.write('a' * 200000 + '\\nshort\\nlast')"
+    lines = []
+
+    return_code = core.submit(
+        core.stream_process([sys.executable, "-c", script], lines.append)
+    ).result(30)
+
+    assert return_code == 0
+    assert [len(line) for line in lines] == [200000, 5, 4]
@@ -0,0 +1,80 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_client import HttpClient
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.server.paths.append(self.path)
+        body = b"x" * 1000
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_CONNECT(self):
+        # Records the tunnel request, but doesn't open one
+        self.server.paths.append(f"CONNECT {self.path}")
+        self.send_response(502)
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.paths = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_goes_through_the_proxy(server, monkeypatch):
+    monkeypatch.setenv("http_proxy", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.delenv("no_proxy", raising=False)
+    monkeypatch.delenv("NO_PROXY", raising=False)
+
+    response = HttpClient().get("http://packages.example/search?q=hello")
+
+    assert response.ok
+    assert server.paths == ["http://packages.example/search?q=hello"]
+
+
+def test_https_is_tunnelled_through_the_proxy(server, monkeypatch):
+    monkeypatch.setenv("https_proxy", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.delenv("no_proxy", raising=False)
+    monkeypatch.delenv("NO_PROXY", raising=False)
+
+    with pytest.raises(OSError):
+        HttpClient().get("https://packages.example/search")
+
+    assert server.paths == ["CONNECT packages.example:443"]
+
+
+def test_no_proxy_hosts_are_fetched_directly(server, monkeypatch):
+    monkeypatch.setenv("http_proxy", "http://127.0.0.1:9")
+    monkeypatch.setenv("no_proxy", "127.0.0.1")
+
+    response = HttpClient().get(f"http://127.0.0.1:{server.server_port}/icon")
+
+    assert response.ok
+    assert server.paths == ["/icon"]
+
+
+def test_body_is_capped_at_max_bytes(server, monkeypatch):
+    monkeypatch.delenv("http_proxy", raising=False)
+    monkeypatch.delenv("HTTP_PROXY", raising=False)
+    client = HttpClient()
+    url = f"http://127.0.0.1:{server.server_port}/page"
+
+    capped = client.get(url, max_bytes=100)
+    assert len(capped.body) == 100 and capped.truncated
+
+    full = client.get(url, max_bytes=1000)
+    assert len(full.body) == 1000 and not full.truncated
@@ -0,0 +1,26 @@
+from persistence import flush_all
+from state import AppState
+
+
+def test_mastodon_cache_is_read_back(config_dir):
+    state = AppState()
+    state.last_fetched_app = {"content": "An app", "fetched_at": "today"}
+    state.save_mastodon_cache()
+    flush_all()
+
+    reopened = AppState()
+    assert reopened.last_fetched_app == {"content": "An app", "fetched_at": "today"}
+    assert reopened.last_fetched_tip is None
+
+
+def test_fetched_post_wins_over_cache(config_dir):
+    state = AppState()
+    state.last_fetched_tip = {"content": "Old tip"}
+    state.save_mastodon_cache()
+    flush_all()
+
+    reopened = AppState()
+    reopened.last_fetched_tip = {"content": "New tip"}
+    # First read of another key loads the file; it must not undo the fetch
+    assert reopened.last_fetched_app is None
+    assert reopened.last_fetched_tip == {"content": "New tip"}
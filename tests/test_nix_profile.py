@@ -0,0 +1,75 @@
+import threading
+import time
+
+import nix_profile
+from nix_profile import ProfileService, ProfileSnapshot, ProfileWatcher
+
+
+def test_refresh_does_not_reuse_a_scan_started_before_the_request():
+    service = ProfileService()
+    scan_running = threading.Event()
+    finish_scan = threading.Event()
+    calls = []
+
+    def load():
+        # Stands in for `nix profile list`: the first call is a watcher scan
+        # that is still running when the install finishes
+        started_at = time.time()
+        calls.append(started_at)
+        if len(calls) == 1:
+            scan_running.set()
+            finish_scan.wait(5)
+        return ProfileSnapshot([], started_at=started_at)
+
+    service._load = load
+
+    watcher = threading.Thread(target=service.refresh)
+    watcher.start()
+    assert scan_running.wait(5)
+
+    # The install completes while the scan runs, then asks for a refresh
+    time.sleep(0.01)
+    results = []
+    installer = threading.Thread(target=lambda: results.append(service.refresh()))
+    installer.start()
+    time.sleep(0.05)
+    finish_scan.set()
+    watcher.join(5)
+    installer.join(5)
+
+    assert len(calls) == 2
+    assert results[0].started_at == calls[1]
+    assert service.current is results[0]
+
+
+def test_refresh_reuses_a_scan_started_after_the_request():
+    service = ProfileService()
+    snapshot = ProfileSnapshot([], started_at=time.time() + 60)
+    service._snapshot = snapshot
+    service._load = lambda: ProfileSnapshot([])
+
+    assert service.refresh() is snapshot
+
+
+def test_watcher_runs_one_check_at_a_time_off_the_ticker(monkeypatch):
+    monkeypatch.setattr(nix_profile, "profile_fingerprint", lambda: None)
+    release = threading.Event()
+    checks = []
+
+    def on_change():
+        # The fallback poll, standing in for a slow `nix profile list`
+        checks.append(threading.current_thread().name)
+        release.wait(5)
+
+    watcher = ProfileWatcher(
+        ProfileService(), on_change, is_enabled=lambda: True, poll_interval=lambda: 0
+    )
+    watcher._tick(None)
+    watcher._tick(None)  # still checking: skipped
+    release.set()
+    deadline = time.time() + 5
+    while watcher._checking and time.time() < deadline:
+        time.sleep(0.01)
+
+    assert len(checks) == 1
+    assert checks[0] != threading.current_thread().name
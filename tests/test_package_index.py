@@ -0,0 +1,100 @@
+import json
+import os
+
+import pytest
+
+import package_index
+import utils
+from http_client import HttpResponse
+from package_index import PackageIndex, build_index_from_file, get_index, index_path
+from state import state
+
+CHANNEL = "nixos-unstable"
+
+# `nix search --json` output
+DUMP = {
+    "legacyPackages.x86_64-linux.ripgrep": {
+        "pname": "ripgrep",
+        "version": "14.1.0",
+        "description": "Line-oriented search tool",
+    },
+    "legacyPackages.x86_64-linux.ripgrep-all": {
+        "pname": "ripgrep-all",
+        "version": "0.10.6",
+        "description": "Ripgrep, but also search in PDFs and archives",
+    },
+    "legacyPackages.x86_64-linux.fd": {
+        "pname": "fd",
+        "version": "10.1.0",
+        "description": "Simple, fast alternative to find",
+    },
+    "legacyPackages.x86_64-linux.python3Packages.requests": {
+        "pname": "requests",
+        "version": "2.32.3",
+        "description": "HTTP library for Python",
+    },
+}
+
+
+@pytest.fixture
+def registry(config_dir, monkeypatch):
+    # Each test starts without any loaded or known-missing index
+    monkeypatch.setattr(package_index, "_loaded_indexes", {})
+    monkeypatch.setattr(package_index, "_missing_channels", set())
+    return config_dir
+
+
+def attr_names(results):
+    return [pkg.get("package_attr_name") for pkg in results]
+
+
+def test_build_from_file_is_saved_and_loaded(registry, tmp_path):
+    dump_path = tmp_path / "dump.json"
+    dump_path.write_text(json.dumps(DUMP))
+
+    index = build_index_from_file(CHANNEL, str(dump_path))
+
+    assert len(index) == 4
+    requests = index.search("requests")[0]
+    assert requests.get("package_attr_set") == "python3Packages"
+    assert requests.get("package_pversion") == "2.32.3"
+
+    reloaded = PackageIndex.load(CHANNEL)
+    assert reloaded.source == str(dump_path)
+    assert attr_names(reloaded.packages) == attr_names(index.packages)
+
+
+def test_exact_attr_ranks_first_then_paging_by_offset(registry):
+    index = PackageIndex(CHANNEL, package_index.normalize_dump(DUMP))
+
+    assert attr_names(index.search("ripgrep")) == ["ripgrep", "ripgrep-all"]
+    # Equal scores: the shorter attribute name first
+    assert attr_names(index.search("search")) == ["ripgrep", "ripgrep-all"]
+    assert attr_names(index.search("python3packages.req")) == [
+        "python3Packages.requests"
+    ]
+
+    first = index.search("ripgrep", limit=1)
+    second = index.search("ripgrep", limit=1, offset=1)
+    assert attr_names(first + second) == ["ripgrep", "ripgrep-all"]
+    assert index.search("ripgrep", limit=1, offset=2) == []
+
+
+def test_without_an_index_search_falls_back_to_the_backend(registry, monkeypatch):
+    assert get_index(CHANNEL) is None
+    assert not os.path.exists(index_path(CHANNEL))
+
+    requests = []
+
+    def post(url, **kwargs):
+        requests.append(url)
+        body = {"hits": {"hits": [{"_source": {"package_attr_name": "hello"}}]}}
+        return HttpResponse(200, {}, json.dumps(body).encode(), url)
+
+    monkeypatch.setattr(utils.http_client, "post", post)
+    monkeypatch.setattr(state, "use_offline_index", True)
+
+    results = utils._search_uncached("hello", CHANNEL, 20)
+
+    assert attr_names(results) == ["hello"]
+    assert len(requests) == 1
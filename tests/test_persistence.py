@@ -0,0 +1,83 @@
+import json
+import time
+
+import persistence
+from constants import CART_FILE, CONFIG_FILE, PACKAGES_FILE
+from persistence import JsonStore, flush_all
+from state import AppState
+
+CHANNEL = "nixos-unstable"
+
+
+def make_package(name):
+    return {"package_attr_name": name, "package_pname": name, "package_pversion": "1"}
+
+
+def test_required_store_is_written_first(tmp_path, monkeypatch):
+    written = []
+    monkeypatch.setattr(
+        persistence,
+        "atomic_write_json",
+        lambda path, data, **kwargs: written.append(path),
+    )
+    packages = JsonStore(str(tmp_path / "packages.json"))
+    cart = JsonStore(str(tmp_path / "cart.json"), requires=[packages])
+
+    packages.save({"a": {}})
+    cart.save([{"ref": "a"}])
+    cart.writer.flush()
+
+    assert written == [packages.path, cart.path]
+
+
+def test_writer_waits_for_the_burst_to_settle(tmp_path):
+    path = tmp_path / "settings.json"
+    writer = persistence.DebouncedWriter(str(path), delay=0.2, max_delay=0.5)
+
+    for i in range(3):
+        writer.schedule({"n": i})
+        time.sleep(0.1)
+    # Still saving every 0.1s: nothing written yet
+    assert not path.exists()
+
+    for i in range(3, 10):
+        writer.schedule({"n": i})
+        time.sleep(0.1)
+    # ...but not held back longer than max_delay
+    assert path.exists()
+
+    time.sleep(0.4)
+    assert path.read_text() == '{"n": 9}'
+
+
+def test_packages_file_only_rewritten_for_new_packages(config_dir, monkeypatch):
+    state = AppState()
+    state.add_to_cart(make_package("hello"), CHANNEL)
+    flush_all()
+
+    written = []
+    monkeypatch.setattr(
+        persistence,
+        "atomic_write_json",
+        lambda path, data, **kwargs: written.append(path),
+    )
+    # Already known: only the favourites file changes
+    state.toggle_favourite(make_package("hello"), CHANNEL)
+    flush_all()
+    assert PACKAGES_FILE not in written
+
+    written.clear()
+    state.add_to_cart(make_package("ripgrep"), CHANNEL)
+    flush_all()
+    assert written.index(PACKAGES_FILE) < written.index(CART_FILE)
+
+
+def test_settings_are_saved_as_a_snapshot(config_dir):
+    state = AppState()
+    state.last_settings_expanded = {"appearance": True}
+    state.save_settings()
+    state.last_settings_expanded["search"] = True
+    flush_all()
+
+    with open(CONFIG_FILE) as f:
+        assert json.load(f)["last_settings_expanded"] == {"appearance": True}
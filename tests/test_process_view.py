@@ -0,0 +1,55 @@
+from nix_profile import ProfileSnapshot, profile_service
+from process_view import ProcessView
+from state import state
+
+
+def test_merged_install_refreshes_the_profile_once(monkeypatch):
+    listings = []
+
+    def load():
+        listings.append(1)
+        return ProfileSnapshot([])
+
+    monkeypatch.setattr(profile_service, "_load", load)
+    finished = []
+
+    def on_complete(success):
+        # What the package cards do after an install
+        finished.append(success)
+        state.on_profile_changed()
+
+    leader, *followers = [
+        ProcessView(f"Installing {name}", f"nix profile add {name}", on_complete)
+        for name in ("hello", "ripgrep", "fd")
+    ]
+    leader.followers = followers
+
+    leader._complete("Completed", 0)
+
+    assert finished == [True, True, True]
+    assert len(listings) == 1
+    # Outside a finished job the calls refresh again
+    state.on_profile_changed()
+    assert len(listings) == 2
+
+
+def test_cancelling_a_merged_job_leaves_the_batch_running():
+    class Task:
+        cancelled = False
+
+        def cancel(self):
+            self.cancelled = True
+
+    leader, follower = [
+        ProcessView(f"Installing {name}", f"nix profile add {name}")
+        for name in ("hello", "ripgrep")
+    ]
+    leader.is_running = follower.is_running = True
+    leader._task = Task()
+    leader.followers = [follower]
+    follower.leader = leader
+
+    follower.cancel()
+
+    assert not leader._task.cancelled
+    assert not leader.was_cancelled and not follower.was_cancelled
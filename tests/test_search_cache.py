@@ -0,0 +1,42 @@
+import json
+
+from package_record import PackageRecord
+from search_cache import SearchCache
+
+
+def test_disk_mirror_keeps_only_the_latest_snapshot(tmp_path):
+    path = tmp_path / "search_cache.json"
+    cache = SearchCache(persist=True, path=str(path))
+    hello = [PackageRecord.from_dict({"package_attr_name": "hello"})]
+
+    cache.put(cache.make_key("hello", "nixos-unstable", 20), hello)
+    cache.put(cache.make_key("hello", "nixos-24.05", 20), hello)
+    cache.invalidate_channel("nixos-unstable")
+    cache._writer.flush()
+
+    data = json.loads(path.read_text())
+    assert [item["key"][1] for item in data] == ["nixos-24.05"]
+    assert data[0]["results"] == [{"package_attr_name": "hello"}]
+
+    reloaded = SearchCache(persist=True, path=str(path))
+    assert reloaded.get(reloaded.make_key("hello", "nixos-24.05", 20)) is not None
+    assert reloaded.get(reloaded.make_key("hello", "nixos-unstable", 20)) is None
+
+
+def test_toggling_offline_index_bypasses_cached_pages(monkeypatch):
+    import utils
+    from state import state
+
+    monkeypatch.setattr(
+        utils,
+        "_search_uncached",
+        lambda query, channel, limit, offset=0: [
+            {"package_attr_name": "offline" if state.use_offline_index else "online"}
+        ],
+    )
+    monkeypatch.setattr(utils, "search_cache", SearchCache())
+    monkeypatch.setattr(state, "use_offline_index", False)
+    assert utils.execute_nix_search("hello", "nixos-unstable")[0].attr_name == "online"
+
+    state.use_offline_index = True
+    assert utils.execute_nix_search("hello", "nixos-unstable")[0].attr_name == "offline"
@@ -0,0 +1,70 @@
+import json
+
+from constants import PROCESSES_FILE, TRACKING_FILE
+from persistence import flush_all
+from state import AppState
+
+CHANNEL = "nixos-unstable"
+
+
+def make_package(name):
+    return {
+        "package_attr_name": name,
+        "package_pname": name,
+        "package_pversion": "1.0",
+        "package_description": f"{name} description",
+    }
+
+
+def cart_names(state):
+    return [item["package"]["package_attr_name"] for item in state.cart_items]
+
+
+def reopen():
+    # What the next start of the app sees
+    flush_all()
+    return AppState()
+
+
+def test_switching_backend_twice_keeps_every_change(config_dir):
+    state = AppState()
+    state.add_to_cart(make_package("hello"), CHANNEL)
+    state.track_install("hello", CHANNEL, attr_name="hello", version="1.0")
+    with open(PROCESSES_FILE, "w") as f:
+        json.dump([{"id": "p1", "title": "Install hello", "cmd": "true"}], f)
+
+    assert state.switch_storage_backend("sqlite")
+    assert state.db is not None
+    state.add_to_cart(make_package("ripgrep"), CHANNEL)
+    state.save_list("tools", [{"package": make_package("ripgrep"), "channel": CHANNEL}])
+
+    assert state.switch_storage_backend("json")
+    assert state.db is None
+    assert cart_names(state) == ["hello", "ripgrep"]
+    state.add_to_cart(make_package("fd"), CHANNEL)
+
+    assert state.switch_storage_backend("sqlite")
+    assert cart_names(state) == ["hello", "ripgrep", "fd"]
+
+    reopened = reopen()
+    assert reopened.storage_backend == "sqlite"
+    assert cart_names(reopened) == ["hello", "ripgrep", "fd"]
+    assert list(reopened.saved_lists) == ["tools"]
+    assert "hello::nixos-unstable" in reopened.tracked_installs
+    assert [p["id"] for p in reopened.db.load_processes()] == ["p1"]
+
+
+def test_switching_back_to_json_writes_the_files(config_dir):
+    state = AppState()
+    assert state.switch_storage_backend("sqlite")
+    state.add_to_cart(make_package("ripgrep"), CHANNEL)
+    state.track_install("ripgrep", CHANNEL, attr_name="ripgrep", version="14.0")
+
+    assert state.switch_storage_backend("json")
+
+    reopened = reopen()
+    assert reopened.storage_backend == "json"
+    assert reopened.db is None
+    assert cart_names(reopened) == ["ripgrep"]
+    with open(TRACKING_FILE) as f:
+        assert "ripgrep::nixos-unstable" in json.load(f)
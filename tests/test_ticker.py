@@ -0,0 +1,21 @@
+import time
+
+from ticker import Ticker
+
+
+def test_repeating_timer_survives_a_failing_callback():
+    ticker = Ticker()
+    runs = []
+
+    def flaky(timer):
+        runs.append(timer)
+        if len(runs) == 1:
+            raise RuntimeError("boom")
+
+    repeating = ticker.every(0.05, flaky)
+    one_shot = ticker.after(0.05, lambda timer: 1 / 0)
+    time.sleep(0.3)
+    repeating.cancel()
+
+    assert len(runs) >= 3
+    assert not one_shot.active
@@ -0,0 +1,16 @@
+from state import state
+from updates import InstalledView
+
+
+def test_installed_view_listens_only_while_mounted():
+    def on_profile_change(diff):
+        pass
+
+    view = InstalledView(on_profile_change)
+    assert on_profile_change not in state.profile_listeners
+
+    view.did_mount()
+    assert on_profile_change in state.profile_listeners
+
+    view.will_unmount()
+    assert on_profile_change not in state.profile_listeners